@@ -1,33 +1,121 @@
-
-
-# no anda nada de esto 
-
-
-
 # app/api/graph_api.py
 from __future__ import annotations
-import os, math, csv
+import os, math, sys, time, asyncio, threading, hmac
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Tuple, Dict, Any
+from typing import Optional, List, Tuple, Dict, Any, Union
 
-import networkx as nx
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-# ... tus otros endpoints (ej. /route) sobre `router`
+# path_search usa imports planos (from csr_graph import ...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "path_search"))
+from snapshot import default_snapshot_path, load_or_build  # noqa: E402
+from draft_classes import DraftClasses  # noqa: E402
+from snapping import NodeSnapper, load_or_build_snapper, snapper_path  # noqa: E402
+from edge_updates import EdgeUpdate, apply_updates  # noqa: E402
+from cost_model import CostModel, OBJECTIVES  # noqa: E402
+from heuristicas_geo import GeoHeuristic  # noqa: E402
+from path_search import (SEARCH_MODES, SearchBudgetExceeded, init_matrix_worker,  # noqa: E402
+                         isochrone, many_to_many)
+from .route_cache import RouteCache  # noqa: E402
+
+# Límites de /route (configurables por entorno)
+ROUTE_WORKERS = int(os.getenv("ROUTE_WORKERS", "2"))                # hilos para A*
+ROUTE_MAX_CONCURRENT = int(os.getenv("ROUTE_MAX_CONCURRENT", "8"))  # en curso + en cola; más -> 503
+ROUTE_MAX_EXPANSIONS = int(os.getenv("ROUTE_MAX_EXPANSIONS", "2000000"))
+ROUTE_TIMEOUT_S = float(os.getenv("ROUTE_TIMEOUT_S", "10"))
+MAX_SNAP_KM = float(os.getenv("MAX_SNAP_KM", "100"))
+ROUTE_CACHE_ENTRIES = int(os.getenv("ROUTE_CACHE_ENTRIES", "4096"))
+ROUTE_CACHE_MB = float(os.getenv("ROUTE_CACHE_MB", "64"))
+MATRIX_WORKERS = int(os.getenv("MATRIX_WORKERS", str(min(4, os.cpu_count() or 1))))  # 0/1: sin procesos
+MATRIX_MAX_POINTS = int(os.getenv("MATRIX_MAX_POINTS", "100"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # sin token, /admin/* queda deshabilitado
+
+
 class Coord(BaseModel):
     lat: float
     lon: float
 
 
+class SnapInfo(BaseModel):
+    # punto pedido -> nodo navegable más cercano (path_search/snapping.py)
+    requested: Coord
+    node_id: int
+    node: Coord
+    distance_km: float
+
+
+class RouteReq(BaseModel):
+    origin: Coord
+    destination: Coord
+    objective: str = "distance"                       # ver cost_model.OBJECTIVES
+    vessel_profile: Optional[Union[str, float]] = None  # nombre de VESSEL_PROFILES o calado (m)
+    mode: str = "forward"                             # ver path_search.SEARCH_MODES
+    max_expansions: Optional[int] = None              # acotados por ROUTE_MAX_EXPANSIONS
+    timeout_s: Optional[float] = None                 # acotado por ROUTE_TIMEOUT_S
+
+
+class MatrixReq(BaseModel):
+    origins: List[Coord]
+    destinations: Optional[List[Coord]] = None  # por defecto, los mismos orígenes
+    objective: str = "distance"
+    vessel_profile: Optional[Union[str, float]] = None
+    include_paths: bool = False
+
+
+class MatrixResp(BaseModel):
+    costs: List[List[Optional[float]]]  # None: destino inalcanzable
+    origins: List[SnapInfo]
+    destinations: List[SnapInfo]
+    paths: Optional[List[List[Optional[List[int]]]]] = None
+    vessel_profile: Optional[Dict[str, Any]] = None
+
+
+class IsochroneReq(BaseModel):
+    origin: Coord
+    budget: float                      # en unidades del objetivo (km, horas, combustible, ...)
+    objective: str = "time"
+    vessel_profile: Optional[Union[str, float]] = None
+    include_nodes: bool = False        # además del borde, todos los nodos alcanzables
+
+
+class IsochroneResp(BaseModel):
+    origin: SnapInfo
+    budget: float
+    objective: str
+    reachable_count: int
+    max_cost: float
+    boundary: List[Coord]              # nodos alcanzables con aristas hacia afuera
+    hull: List[Coord]                  # envolvente convexa (lon/lat) del alcance, anillo cerrado
+    node_ids: Optional[List[int]] = None
+    node_costs: Optional[List[float]] = None
+    vessel_profile: Optional[Dict[str, Any]] = None
+
+
+class EdgeUpdateReq(BaseModel):
+    attribute: str                                    # columna de edge_attrs (wind_speed, risk_index, ...)
+    value: float
+    edges: List[int] = []                             # índices de arista
+    bbox: Optional[Tuple[float, float, float, float]] = None  # lat_min, lon_min, lat_max, lon_max
+
+
+class EdgeUpdatesReq(BaseModel):
+    updates: List[EdgeUpdateReq]
+
+
 class RouteResp(BaseModel):
     total_distance_km: float
     node_ids: List[int]
     coords: List[Coord]
-    # vessel_profile: dict
-    # snapped: dict
-    # warnings: List[str] = []
+    total_cost: float = 0.0
+    expanded: int = 0
+    vessel_profile: Optional[Dict[str, Any]] = None
+    snapped: Dict[str, SnapInfo] = {}  # "origin" / "destination"
+
 
 app = FastAPI(title="Graph API", version="1.0.0")
 
@@ -37,7 +125,7 @@ allow = origins.split(",") if origins and origins != "*" else ["*"]
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allow,      # qué orígenes (dominios/puertos) pueden pegarle al API
-    allow_credentials=True,   # si se permiten credenciales (cookies, Authorization, etc.)
+    allow_credentials=allow != ["*"],  # credenciales (cookies, Authorization) sólo con orígenes explícitos
     allow_methods=["*"],      # métodos HTTP permitidos (GET, POST, ...)
     allow_headers=["*"],      # headers permitidos (Content-Type, Authorization, ...)
 )
@@ -47,12 +135,358 @@ app.add_middleware(
 def health():
     return {"ok": True}
 
-@app.on_event("startup")
-def on_startup():
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Los endpoints /admin/* modifican el estado compartido: exigen el header X-Admin-Token."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (set ADMIN_TOKEN)")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token")
+
+
+def _load_graph(state) -> None:
+    """Carga (o recarga) el grafo y todo lo que depende de él en ``state``."""
     base = Path(os.getenv("DATA_DIR", ".")).resolve()
     nodes = Path(os.getenv("NODES_CSV", "sudamerica_atlantico_sur_nodes.csv"))
     edges = Path(os.getenv("EDGES_CSV", "sudamerica_atlantico_sur_edges.csv"))
     nodes_path = nodes if nodes.is_absolute() else base / nodes
     edges_path = edges if edges.is_absolute() else base / edges
 
+    # El grafo se carga una sola vez (snapshot mapeado en memoria) y se comparte
+    # entre requests; el builder escribe cada arista una vez -> symmetric.
+    symmetric = os.getenv("GRAPH_SYMMETRIC", "1") != "0"
+    snapshot = Path(os.getenv("SNAPSHOT_PATH", "")) if os.getenv("SNAPSHOT_PATH") else default_snapshot_path(nodes_path)
+    # modo 'c' (copy-on-write): /admin/edges escribe en memoria sin tocar el snapshot
+    graph = load_or_build(nodes_path, edges_path, snapshot, symmetric=symmetric, mode="c")
+    classes = DraftClasses(graph)
+    snapper = load_or_build_snapper(graph, snapper_path(snapshot), classes)
+    if graph.num_nodes:
+        graph.get_neighbors(0)  # arma las listas de adyacencia antes de la primera consulta
+    # Las búsquedas en curso conservan sus referencias al estado anterior
+    with state.graph_lock:
+        state.graph = graph
+        state.draft_classes = classes
+        state.snapper = snapper
+        state.cost_model = CostModel(graph)
+        state.heuristics = {}
+        state.route_cache.clear()
+    # Los procesos de /matrix mapean el mismo snapshot; se recrean al recargar.
+    # 'spawn': la recarga corre en un hilo y fork con hilos activos puede colgarse.
+    old_pool = getattr(state, "matrix_pool", None)
+    state.matrix_pool = None
+    if MATRIX_WORKERS > 1:
+        state.matrix_pool = ProcessPoolExecutor(MATRIX_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=init_matrix_worker, initargs=(str(snapshot),))
+    if old_pool is not None:
+        old_pool.shutdown(wait=False)
+
+
+@app.on_event("startup")
+def on_startup():
+    state = app.state
+    state.route_cache = RouteCache(ROUTE_CACHE_ENTRIES, int(ROUTE_CACHE_MB * (1 << 20)))
+    state.route_pool = ThreadPoolExecutor(max_workers=ROUTE_WORKERS, thread_name_prefix="route")
+    state.route_slots = asyncio.Semaphore(ROUTE_MAX_CONCURRENT)
+    state.update_lock = threading.Lock()  # recargas y actualizaciones de aristas, de a una
+    # versión del grafo, tablas de costo, vistas, heurísticas y caché: se
+    # cambian juntos bajo este lock y las búsquedas los toman juntos
+    state.graph_lock = threading.Lock()
+    _load_graph(state)
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    for name in ("route_pool", "matrix_pool"):
+        pool = getattr(app.state, name, None)
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _heuristic(cache: Dict[str, Any], graph, objective: str):
+    """Heurística admisible por objetivo (con los pesos por defecto), cacheada en ``cache``."""
+    h = cache.get(objective)
+    if h is None:
+        p = OBJECTIVES[objective]
+        if objective == "distance":
+            h = GeoHeuristic.for_distance(graph)
+        elif objective == "fuel":
+            h = GeoHeuristic.for_fuel(graph, **p)
+        elif objective == "safe":
+            h = GeoHeuristic.for_safe(graph, **p)
+        elif objective == "time":
+            h = GeoHeuristic.for_time(graph, v_max=p["nominal_sp"])
+        else:
+            h = GeoHeuristic.for_combined(graph, v_max=p["nominal_sp"], w_fuel=p["w_fuel"],
+                                          w_time=p["w_time"], w_safe=p["w_safe"])
+        cache[objective] = h
+    return h
+
+
+def _snap_info(graph, coord: Coord, node: int, km: float) -> SnapInfo:
+    lat, lon = graph.coord(node)
+    return SnapInfo(requested=coord, node_id=node, node=Coord(lat=lat, lon=lon), distance_km=km)
+
+
+def _prepare_route(state, req: RouteReq) -> Dict[str, Any]:
+    """Valida el pedido y "snapea" los extremos (barato: corre en el event loop)."""
+    classes: DraftClasses = state.draft_classes
+    snapper: NodeSnapper = state.snapper
+    try:
+        draft = None if req.vessel_profile is None else classes.resolve(req.vessel_profile)
+        cost_key = state.cost_model.key(req.objective)
+        search = SEARCH_MODES[req.mode]
+    except KeyError:
+        raise HTTPException(status_code=422, detail=f"Unknown search mode: {req.mode}")
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    nodes, kms = snapper.snap_many([req.origin.lat, req.destination.lat],
+                                   [req.origin.lon, req.destination.lon], draft, max_km=MAX_SNAP_KM)
+    if (nodes < 0).any():
+        raise HTTPException(status_code=422,
+                            detail=f"No navigable node within {MAX_SNAP_KM} km of origin/destination")
+    start, goal = int(nodes[0]), int(nodes[1])
+    return {"graph": state.graph, "classes": classes, "cost_model": state.cost_model,
+            "draft": draft, "search": search, "start": start, "goal": goal, "kms": kms,
+            "cost_key": cost_key, "key": RouteCache.key(start, goal, draft, cost_key, state.graph)}
+
+
+def _solve_route(state, req: RouteReq, job: Dict[str, Any]):
+    """Trabajo CPU de /route; corre en route_pool, nunca en el event loop."""
+    graph, draft = job["graph"], job["draft"]
+    with state.graph_lock:
+        # Clave (con la versión del grafo), tabla de costos, vista y heurística
+        # del mismo estado: /admin/edges no puede quedar a medias entre ellos.
+        key = RouteCache.key(job["start"], job["goal"], draft, job["cost_key"], graph)
+        cost_fn = job["cost_model"].cost_fn(req.objective)
+        view = job["classes"].view(draft)
+        # tras una recarga, no mezclar heurísticas del grafo viejo con el nuevo
+        heuristic = _heuristic(state.heuristics if state.graph is graph else {}, graph, req.objective)
+    max_expansions = min(req.max_expansions or ROUTE_MAX_EXPANSIONS, ROUTE_MAX_EXPANSIONS)
+    timeout = min(req.timeout_s or ROUTE_TIMEOUT_S, ROUTE_TIMEOUT_S)
+    stats: Dict[str, Any] = {}
+    try:
+        path = job["search"](job["start"], job["goal"], view.get_neighbors, cost_fn,
+                             heuristic, view, stats=stats,
+                             max_expansions=max_expansions, deadline=time.monotonic() + timeout)
+    except SearchBudgetExceeded as exc:
+        # límite del servidor, no un error del pedido: 503 y reintentar más tarde
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "5"})
+    if path is None:
+        # no se cachea: un presupuesto o una recarga pueden cambiar el resultado
+        raise HTTPException(status_code=404, detail="No route between origin and destination")
+
+    edges = [view.get_edge_data(a, b) for a, b in zip(path, path[1:])]
+    return state.route_cache.put(key, path,
+                                 total_distance_km=float(sum(e["distance"] for e in edges)),
+                                 total_cost=float(sum(cost_fn(e) for e in edges)),
+                                 expanded=stats.get("expanded", 0))
+
+
+def _route_response(req: RouteReq, job: Dict[str, Any], cached) -> RouteResp:
+    graph, draft, kms = job["graph"], job["draft"], job["kms"]
+    path = cached.path.tolist()
+    return RouteResp(
+        total_distance_km=cached.total_distance_km,
+        node_ids=path,
+        coords=[Coord(lat=lat, lon=lon) for lat, lon in graph.coords_of(path)],
+        total_cost=cached.total_cost,
+        expanded=cached.expanded,
+        vessel_profile=None if draft is None else {"name": req.vessel_profile, "draft_m": draft},
+        snapped={"origin": _snap_info(graph, req.origin, job["start"], float(kms[0])),
+                 "destination": _snap_info(graph, req.destination, job["goal"], float(kms[1]))},
+    )
+
+
+@app.post("/route", response_model=RouteResp)
+async def route(req: RouteReq):
+    state = app.state
+    if not hasattr(state, "graph"):
+        raise HTTPException(status_code=503, detail="Graph not loaded")
+    job = _prepare_route(state, req)
+    cached = state.route_cache.get(job["key"])
+    if cached is None:
+        # Back-pressure: si ya hay ROUTE_MAX_CONCURRENT búsquedas en curso/cola, 503 inmediato
+        if state.route_slots.locked():
+            raise HTTPException(status_code=503, detail="Too many concurrent route searches",
+                                headers={"Retry-After": "1"})
+        async with state.route_slots:
+            loop = asyncio.get_running_loop()
+            cached = await loop.run_in_executor(state.route_pool, _solve_route, state, req, job)
+    return _route_response(req, job, cached)
+
+
+def _edge_weights(state, objective: str, draft: Optional[float]) -> Tuple[Any, np.ndarray]:
+    """
+    (grafo, costo por arista del objetivo), con la restricción de calado como
+    costo infinito; se toman juntos bajo ``graph_lock`` para no mezclar estados.
+    """
+    with state.graph_lock:
+        graph = state.graph
+        weights = state.cost_model.costs(objective)
+        if draft is not None:
+            weights = np.where(state.draft_classes.edge_mask(draft), weights, np.inf)
+    return graph, weights
+
+
+def _solve_matrix(state, req: MatrixReq) -> MatrixResp:
+    classes: DraftClasses = state.draft_classes
+    origins = req.origins
+    destinations = req.destinations if req.destinations is not None else req.origins
+    if not origins or not destinations:
+        raise HTTPException(status_code=422, detail="origins and destinations must not be empty")
+    if max(len(origins), len(destinations)) > MATRIX_MAX_POINTS:
+        raise HTTPException(status_code=422, detail=f"At most {MATRIX_MAX_POINTS} origins/destinations")
+    try:
+        draft = None if req.vessel_profile is None else classes.resolve(req.vessel_profile)
+        graph, weights = _edge_weights(state, req.objective, draft)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    # Los procesos mapean el snapshot en disco: sólo se usan mientras el grafo
+    # en memoria es ese mismo (sin recarga de por medio ni cambios de /admin/edges).
+    pool = state.matrix_pool
+    if graph is not state.graph or graph.version != 0:
+        pool = None
+
+    points = origins + destinations
+    nodes, kms = state.snapper.snap_many([p.lat for p in points], [p.lon for p in points],
+                                         draft, max_km=MAX_SNAP_KM)
+    missing = [i for i, n in enumerate(nodes.tolist()) if n < 0]
+    if missing:
+        raise HTTPException(status_code=422,
+                            detail=f"No navigable node within {MAX_SNAP_KM} km of points {missing}")
+    k = len(origins)
+    matrix, paths = many_to_many(graph, nodes[:k], nodes[k:], weights, with_paths=req.include_paths,
+                                 executor=pool, workers=MATRIX_WORKERS)
+    snaps = [_snap_info(graph, p, int(n), float(km)) for p, n, km in zip(points, nodes.tolist(), kms)]
+    return MatrixResp(
+        costs=[[c if math.isfinite(c) else None for c in row] for row in matrix.tolist()],
+        origins=snaps[:k],
+        destinations=snaps[k:],
+        paths=paths,
+        vessel_profile=None if draft is None else {"name": req.vessel_profile, "draft_m": draft},
+    )
+
+
+@app.post("/matrix", response_model=MatrixResp)
+async def matrix(req: MatrixReq):
+    state = app.state
+    if not hasattr(state, "graph"):
+        raise HTTPException(status_code=503, detail="Graph not loaded")
+    if state.route_slots.locked():
+        raise HTTPException(status_code=503, detail="Too many concurrent route searches",
+                            headers={"Retry-After": "1"})
+    async with state.route_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(state.route_pool, _solve_matrix, state, req)
+
+
+def _hull(graph, nodes: np.ndarray) -> List[Coord]:
+    from scipy.spatial import ConvexHull, QhullError
+    if len(nodes) < 3:
+        return [Coord(lat=lat, lon=lon) for lat, lon in graph.coords_of(nodes.tolist())]
+    pts = np.column_stack((graph.lons[nodes], graph.lats[nodes]))
+    try:
+        ring = ConvexHull(pts).vertices
+    except QhullError:  # puntos alineados
+        ring = np.array([np.argmin(pts[:, 0]), np.argmax(pts[:, 0])])
+    ring = np.append(ring, ring[0])
+    return [Coord(lat=float(pts[i, 1]), lon=float(pts[i, 0])) for i in ring]
+
+
+def _solve_isochrone(state, req: IsochroneReq) -> IsochroneResp:
+    classes: DraftClasses = state.draft_classes
+    if not (req.budget >= 0 and math.isfinite(req.budget)):
+        raise HTTPException(status_code=422, detail="budget must be a finite non-negative number")
+    try:
+        draft = None if req.vessel_profile is None else classes.resolve(req.vessel_profile)
+        graph, weights = _edge_weights(state, req.objective, draft)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    snap = state.snapper.snap(req.origin.lat, req.origin.lon, draft, max_km=MAX_SNAP_KM)
+    if snap.node < 0:
+        raise HTTPException(status_code=422, detail=f"No navigable node within {MAX_SNAP_KM} km of origin")
+
+    nodes, node_costs, boundary = isochrone(graph, snap.node, req.budget, weights)
+    return IsochroneResp(
+        origin=_snap_info(graph, req.origin, snap.node, snap.distance_km),
+        budget=req.budget,
+        objective=req.objective,
+        reachable_count=len(nodes),
+        max_cost=float(node_costs[-1]) if len(node_costs) else 0.0,
+        boundary=[Coord(lat=lat, lon=lon) for lat, lon in graph.coords_of(boundary.tolist())],
+        hull=_hull(graph, boundary if len(boundary) >= 3 else nodes),
+        node_ids=nodes.tolist() if req.include_nodes else None,
+        node_costs=node_costs.tolist() if req.include_nodes else None,
+        vessel_profile=None if draft is None else {"name": req.vessel_profile, "draft_m": draft},
+    )
+
+
+@app.post("/isochrone", response_model=IsochroneResp)
+async def isochrone_endpoint(req: IsochroneReq):
+    state = app.state
+    if not hasattr(state, "graph"):
+        raise HTTPException(status_code=503, detail="Graph not loaded")
+    if state.route_slots.locked():
+        raise HTTPException(status_code=503, detail="Too many concurrent route searches",
+                            headers={"Retry-After": "1"})
+    async with state.route_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(state.route_pool, _solve_isochrone, state, req)
+
+
+@app.get("/route/cache")
+def route_cache_stats():
+    return app.state.route_cache.stats()
+
+
+def _update_edges(state, req: EdgeUpdatesReq) -> Dict[str, Any]:
+    updates = [EdgeUpdate(u.attribute, u.value, edges=u.edges, bbox=u.bbox) for u in req.updates]
+    with state.update_lock, state.graph_lock:
+        graph = state.graph
+        try:
+            report = apply_updates(graph, updates)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+        model, classes = state.cost_model, state.draft_classes
+
+        def only_increased(cost_key, draft) -> bool:
+            # se decide con los costos de antes y después, no por el atributo
+            return model.only_increased(report, cost_key) and (draft is None or classes.only_restricted(report))
+
+        cheaper = sorted(o for o in OBJECTIVES if not model.only_increased(report, model.key(o)))
+        refreshed = model.refresh(report)
+        views_reset = classes.refresh(report)
+        if views_reset:
+            state.snapper.invalidate_drafts()
+        # las cotas calibradas de un objetivo que se abarató pueden dejar de ser admisibles
+        state.heuristics = {o: h for o, h in state.heuristics.items() if o not in cheaper}
+        dropped = state.route_cache.apply_update(report, graph, only_increased) if not report.empty else 0
+    return {"version": report.version, "edges_updated": int(len(report.edge_ids)),
+            "attributes": sorted(report.attributes), "bbox": report.bbox,
+            "cheaper_objectives": cheaper, "drafts_gained_edges": not classes.only_restricted(report),
+            "objectives_refreshed": refreshed, "draft_views_reset": views_reset,
+            "routes_invalidated": dropped}
+
+
+@app.post("/admin/edges", dependencies=[Depends(require_admin)])
+async def update_edges(req: EdgeUpdatesReq):
+    """Actualiza atributos de aristas en memoria (sin recargar) e invalida sólo lo afectado."""
+    if not hasattr(app.state, "graph"):
+        raise HTTPException(status_code=503, detail="Graph not loaded")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.route_pool, _update_edges, app.state, req)
+
+
+def _reload(state) -> None:
+    with state.update_lock:
+        _load_graph(state)
+
 
+@app.post("/admin/reload", dependencies=[Depends(require_admin)])
+async def reload_graph():
+    """Recarga grafo y pesos desde disco; invalida el caché de rutas."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(app.state.route_pool, _reload, app.state)
+    g = app.state.graph
+    return {"ok": True, "num_nodes": g.num_nodes, "num_edges": g.num_edges, "checksum": g.checksum}
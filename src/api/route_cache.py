@@ -0,0 +1,141 @@
+# app/api/route_cache.py
+"""
+Caché LRU de rutas ya resueltas para /route.
+
+La clave es ``(nodo_inicio, nodo_destino, calado, clave_de_costo, versión_grafo)``:
+los extremos ya "snapeados" (dos pedidos a pocos metros caen en el mismo par
+de nodos), el calado resuelto (None = sin restricción), la clave de
+``CostModel.key`` (objetivo + pesos completos) y la versión del grafo
+(checksum de las fuentes + ``graph.version``). Un cambio de grafo o de pesos
+cambia la clave, así nunca se sirve una ruta vieja; además ``clear()`` libera
+la memoria al recargar y ``apply_update()`` conserva, tras una actualización
+de aristas, las rutas que no pasan por la región tocada.
+
+El caché está acotado en cantidad de entradas y en bytes (estimados con el
+tamaño de los arrays guardados) y es seguro entre hilos: las búsquedas corren
+en el pool de /route.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+ENTRY_OVERHEAD_BYTES = 256  # dict, tupla de clave, floats; aproximado
+
+
+@dataclass(frozen=True)
+class CachedRoute:
+    path: np.ndarray          # ids de nodo (int32, solo lectura)
+    total_distance_km: float
+    total_cost: float
+    expanded: int
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.path.nbytes) + ENTRY_OVERHEAD_BYTES
+
+
+def graph_version(graph) -> Tuple[str, int]:
+    return (graph.checksum, getattr(graph, "version", 0))
+
+
+class RouteCache:
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, CachedRoute]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(start: int, goal: int, draft: Optional[float], cost_key: Tuple[Any, ...],
+            graph) -> Tuple[Any, ...]:
+        return (start, goal, draft, cost_key, graph_version(graph))
+
+    def get(self, key: Hashable) -> Optional[CachedRoute]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, path, total_distance_km: float, total_cost: float,
+            expanded: int) -> CachedRoute:
+        arr = np.asarray(path, dtype=np.int32)
+        arr.flags.writeable = False
+        entry = CachedRoute(arr, total_distance_km, total_cost, expanded)
+        if entry.nbytes > self.max_bytes:
+            return entry  # no entra nunca: no desalojar todo por una sola ruta
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._data[key] = entry
+            self._bytes += entry.nbytes
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+        return entry
+
+    def apply_update(self, report, graph,
+                     only_increased: Callable[[Tuple[Any, ...], Optional[float]], bool]) -> int:
+        """
+        Invalida según un ``edge_updates.UpdateReport`` (``graph`` ya con la
+        versión nueva). ``only_increased(clave_de_costo, calado)`` dice si el
+        cambio no abarató ninguna arista para esa función de costo y calado
+        (ver ``CostModel.only_increased``). En ese caso una ruta que no pasa
+        por ninguna arista tocada sigue siendo óptima: se conserva y se
+        re-etiqueta con la versión nueva; si no, se descarta. Devuelve cuántas
+        entradas se descartaron.
+        """
+        new_version = graph_version(graph)
+        old_version = (new_version[0], report.version - 1)
+        verdicts: Dict[Tuple[Any, ...], bool] = {}
+        with self._lock:
+            kept: "OrderedDict[Hashable, CachedRoute]" = OrderedDict()
+            for key, entry in self._data.items():
+                if key[-1] != old_version:
+                    continue
+                draft, cost_key = key[2], key[3]
+                verdict = verdicts.get((cost_key, draft))
+                if verdict is None:
+                    verdict = verdicts[(cost_key, draft)] = only_increased(cost_key, draft)
+                if verdict and not report.touches_path(graph, entry.path.tolist()):
+                    kept[key[:-1] + (new_version,)] = entry
+            dropped = len(self._data) - len(kept)
+            self._data = kept
+            self._bytes = sum(e.nbytes for e in kept.values())
+            self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
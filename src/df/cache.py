@@ -0,0 +1,136 @@
+"""
+Caché en disco de productos derivados del ráster para reconstrucciones incrementales.
+
+Estructura de ``cache_dir``::
+
+    digests.json                          hash de contenido de cada .tif (memo por tamaño/mtime)
+    <hash>-rf<resize_factor>/
+        elev.npy, ocean_mask.npy, dist_to_land.npy   rásteres derivados (mapeables)
+        meta.json                                    transform, bounds, dist_cap
+        nodes-ct<umbral>-sc<step_coast>-so<step_open>.npz   nodos muestreados
+
+Los rásteres dependen sólo del contenido del TIFF y de ``resize_factor``; la
+distancia a tierra se guarda saturada en ``dist_cap`` y sirve para cualquier
+``coastal_threshold <= dist_cap``. Los nodos dependen además de los
+parámetros de muestreo. Así, variar ``k_neighbors`` o ``max_connection_km``
+no recalcula nada del ráster y variar ``step_coast``/``step_open`` sólo
+vuelve a muestrear.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import rasterio
+
+from tiling import (RasterProducts, SampledNodes, process_raster_tiled,
+                    sample_from_products)
+
+
+def file_digest(path: Path, cache_dir: Path) -> str:
+    """
+    blake2b del contenido del archivo.
+
+    El resultado se memoriza en ``cache_dir/digests.json`` junto con el tamaño
+    y el mtime, para no volver a leer TIFFs de varios GB si no cambiaron.
+    """
+    path = Path(path).resolve()
+    memo_path = Path(cache_dir) / "digests.json"
+    try:
+        memo = json.loads(memo_path.read_text())
+    except (OSError, ValueError):
+        memo = {}
+    st = path.stat()
+    entry = memo.get(str(path))
+    if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+        return entry["digest"]
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 22), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    memo[str(path)] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest}
+    memo_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = memo_path.with_name(f"digests.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(memo, indent=1))
+    os.replace(tmp, memo_path)
+    return digest
+
+
+def _write_meta(products: RasterProducts) -> None:
+    meta = {
+        "transform": list(products.transform)[:6],
+        "bounds": list(products.bounds),
+        "dist_cap": products.dist_cap,
+        "shape": list(products.shape),
+    }
+    tmp = products.workdir / "meta.json.tmp"
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, products.workdir / "meta.json")  # meta.json marca la entrada como completa
+
+
+def _load_products(raster_dir: Path) -> Optional[RasterProducts]:
+    try:
+        meta = json.loads((raster_dir / "meta.json").read_text())
+        arrays = [np.load(raster_dir / f"{name}.npy", mmap_mode="r")
+                  for name in ("elev", "ocean_mask", "dist_to_land")]
+    except (OSError, ValueError):
+        return None
+    return RasterProducts(*arrays, dist_cap=meta["dist_cap"],
+                          transform=rasterio.Affine(*meta["transform"]),
+                          bounds=tuple(meta["bounds"]), workdir=raster_dir)
+
+
+def _nodes_path(raster_dir: Path, coastal_threshold: float, step_coast: int, step_open: int) -> Path:
+    return raster_dir / f"nodes-ct{coastal_threshold:g}-sc{step_coast}-so{step_open}.npz"
+
+
+def _save_nodes(path: Path, nodes: SampledNodes) -> None:
+    tmp = path.with_name(path.stem + ".tmp.npz")
+    np.savez(tmp, rows=nodes.rows, cols=nodes.cols, depths=nodes.depths)
+    os.replace(tmp, path)
+
+
+def cached_raster_products(
+    tif_path: Path,
+    cache_dir: Path,
+    coastal_threshold: float,
+    step_coast: int,
+    step_open: int,
+    resize_factor: float = 1.0,
+    max_memory_mb: float = 512,
+    executor: Optional[Executor] = None,
+) -> Tuple[RasterProducts, SampledNodes, Dict[str, bool]]:
+    """
+    Rásteres derivados y nodos muestreados, reutilizando lo que ya esté en caché.
+
+    Retorna también ``{"raster": hit, "nodes": hit}`` para reportar qué etapas
+    se saltearon.
+    """
+    cache_dir = Path(cache_dir)
+    digest = file_digest(tif_path, cache_dir)
+    raster_dir = cache_dir / f"{digest}-rf{resize_factor:g}"
+    nodes_path = _nodes_path(raster_dir, coastal_threshold, step_coast, step_open)
+
+    products = _load_products(raster_dir)
+    if products is not None and products.dist_cap >= coastal_threshold:
+        if nodes_path.exists():
+            with np.load(nodes_path) as z:
+                nodes = SampledNodes(z["rows"], z["cols"], z["depths"])
+            return products, nodes, {"raster": True, "nodes": True}
+        nodes = sample_from_products(products, coastal_threshold, step_coast, step_open, max_memory_mb)
+        _save_nodes(nodes_path, nodes)
+        return products, nodes, {"raster": True, "nodes": False}
+
+    # sin caché (o con una distancia saturada por debajo del umbral pedido)
+    (raster_dir / "meta.json").unlink(missing_ok=True)
+    products, nodes = process_raster_tiled(tif_path, coastal_threshold, step_coast, step_open,
+                                           resize_factor=resize_factor, max_memory_mb=max_memory_mb,
+                                           workdir=raster_dir, executor=executor)
+    _write_meta(products)
+    _save_nodes(nodes_path, nodes)
+    return products, nodes, {"raster": False, "nodes": False}
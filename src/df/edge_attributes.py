@@ -0,0 +1,184 @@
+"""
+Muestreo vectorizado de rásteres de atributos (riesgo, olas, viento) sobre aristas.
+
+``costs.py`` espera ``risk_index``, ``wave_size`` y ``wind_speed`` por arista,
+pero el builder sólo escribía distancia y profundidad. Esta etapa toma un
+ráster por atributo (GeoTIFF, o ``.npy`` con un ``.json`` al lado que trae el
+``transform``) y lo muestrea a lo largo de *todas* las aristas de una vez:
+
+- cada arista se parte en ``ceil(distancia / spacing_km) + 1`` muestras
+  equiespaciadas (interpolación lineal en lat/lon, respetando el antimeridiano);
+- las muestras de todas las aristas se indexan en el ráster con un único
+  acceso vectorizado, por bloques de ``max_samples_per_chunk`` para acotar memoria;
+- se reducen por arista con ``np.add.reduceat`` (media) o ``np.fmax.reduceat``
+  (máximo), ignorando ``nodata``/NaN.
+
+Las aristas sin ninguna muestra válida (fuera del ráster) quedan con
+``fill`` (0, el default de csr_graph.EDGE_ATTRIBUTES). Las longitudes se
+llevan al rango del propio ráster, así sirven grillas en -180..180 y en 0..360.
+Sólo se aceptan los atributos de ``DEFAULT_REDUCE`` (las columnas que leen
+``costs.py`` y ``csr_graph``).
+
+Formato del ``.json`` de un ``.npy``::
+
+    {"transform": [a, b, c, d, e, f], "nodata": -9999}   # como rasterio.Affine
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import rasterio
+
+# Reducción por defecto de cada atributo: el riesgo de una arista es el del
+# peor tramo; viento y olas, el promedio del recorrido.
+DEFAULT_REDUCE: Dict[str, str] = {
+    "risk_index": "max",
+    "wave_size": "mean",
+    "wind_speed": "mean",
+}
+REDUCERS = ("mean", "max")
+
+
+@dataclass
+class AttributeRaster:
+    data: np.ndarray                  # (filas, columnas)
+    transform: "rasterio.Affine"      # píxel -> (lon, lat)
+    nodata: Optional[float] = None
+
+    @classmethod
+    def open(cls, path: Path, band: int = 1) -> "AttributeRaster":
+        """GeoTIFF (con rasterio) o ``.npy`` + ``.json`` con el transform."""
+        path = Path(path)
+        if path.suffix == ".npy":
+            meta = json.loads(path.with_suffix(".json").read_text())
+            return cls(np.load(path, mmap_mode="r"), rasterio.Affine(*meta["transform"][:6]),
+                       meta.get("nodata"))
+        with rasterio.open(path) as src:
+            return cls(src.read(band), src.transform, src.nodata)
+
+    @classmethod
+    def from_grid(cls, data: np.ndarray, lon_min: float, lat_max: float, res_lon: float,
+                  res_lat: Optional[float] = None, nodata: Optional[float] = None) -> "AttributeRaster":
+        """Grilla regular norte-arriba (fila 0 = ``lat_max``), p.ej. un array de NumPy en memoria."""
+        res_lat = res_lon if res_lat is None else res_lat
+        return cls(np.asarray(data), rasterio.Affine(res_lon, 0.0, lon_min, 0.0, -res_lat, lat_max), nodata)
+
+    @property
+    def lon_min(self) -> float:
+        """Longitud del borde oeste (norte-arriba: sin rotación en el transform)."""
+        t = self.transform
+        return float(min(t.c, t.c + t.a * self.data.shape[1]))
+
+    def sample(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Valor del píxel que contiene cada punto (NaN fuera del ráster o en
+        nodata). Las longitudes se llevan a ``[lon_min, lon_min + 360)``.
+        """
+        lon_min = self.lon_min
+        lons = lon_min + (np.asarray(lons, dtype=np.float64) - lon_min) % 360.0
+        inv = ~self.transform
+        cols = np.floor(inv.a * lons + inv.b * lats + inv.c).astype(np.int64)
+        rows = np.floor(inv.d * lons + inv.e * lats + inv.f).astype(np.int64)
+        n_rows, n_cols = self.data.shape
+        inside = (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+        values = np.full(len(lats), np.nan)
+        values[inside] = self.data[rows[inside], cols[inside]]
+        if self.nodata is not None:
+            values[values == self.nodata] = np.nan
+        return values
+
+
+def sample_along_edges(
+    raster: AttributeRaster,
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    lat2: np.ndarray,
+    lon2: np.ndarray,
+    dist_km: np.ndarray,
+    spacing_km: float = 5.0,
+    how: str = "mean",
+    fill: float = 0.0,
+    max_samples_per_chunk: int = 4_000_000,
+) -> np.ndarray:
+    """Media o máximo de ``raster`` a lo largo de cada arista (lat1, lon1) -> (lat2, lon2)."""
+    if how not in REDUCERS:
+        raise ValueError(f"Unknown reduction {how!r} (expected one of {REDUCERS})")
+    lat1, lon1, lat2, lon2 = (np.asarray(a, dtype=np.float64) for a in (lat1, lon1, lat2, lon2))
+    n = len(lat1)
+    out = np.full(n, np.nan)
+    if n == 0:
+        return out
+    dlon = (lon2 - lon1 + 180.0) % 360.0 - 180.0  # tramo corto en el antimeridiano
+    dist = np.nan_to_num(np.asarray(dist_km, dtype=np.float64), nan=0.0)
+    n_samples = np.maximum(2, np.ceil(dist / spacing_km).astype(np.int64) + 1)
+
+    cum = np.cumsum(n_samples)
+    start = 0
+    while start < n:
+        done = cum[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(cum, done + max_samples_per_chunk, side="right")))
+        seg = slice(start, stop)
+        counts = n_samples[seg]
+        seg_id = np.repeat(np.arange(stop - start), counts)
+        first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        t = (np.arange(counts.sum()) - first[seg_id]) / (counts[seg_id] - 1)
+        lats = lat1[seg][seg_id] + t * (lat2[seg] - lat1[seg])[seg_id]
+        lons = lon1[seg][seg_id] + t * dlon[seg][seg_id]  # sample() las lleva al rango del ráster
+        values = raster.sample(lats, lons)
+
+        if how == "max":
+            out[seg] = np.fmax.reduceat(values, first)
+        else:
+            valid = ~np.isnan(values)
+            total = np.add.reduceat(np.where(valid, values, 0.0), first)
+            count = np.add.reduceat(valid.astype(np.int64), first)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[seg] = total / count
+        start = stop
+
+    out[np.isnan(out)] = fill
+    return out
+
+
+def sample_edge_attributes(
+    edges_df: pd.DataFrame,
+    rasters: Dict[str, AttributeRaster],
+    spacing_km: float = 5.0,
+    reduce: Optional[Dict[str, str]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Columnas de atributos para un DataFrame de aristas del builder
+    (lat_origen, lon_origen, lat_destino, lon_destino, distancia_km).
+    """
+    check_attributes(rasters)
+    reduce = {**DEFAULT_REDUCE, **(reduce or {})}
+    ends = tuple(edges_df[c].to_numpy() for c in ("lat_origen", "lon_origen", "lat_destino", "lon_destino"))
+    dist_km = edges_df["distancia_km"].to_numpy()
+    return {name: sample_along_edges(raster, *ends, dist_km, spacing_km=spacing_km,
+                                     how=reduce.get(name, "mean")).astype(np.float32)
+            for name, raster in rasters.items()}
+
+
+def check_attributes(names: Iterable[str]) -> None:
+    """``ValueError`` si algún nombre no es una columna de atributos conocida."""
+    unknown = sorted(set(names) - set(DEFAULT_REDUCE))
+    if unknown:
+        raise ValueError(f"Unknown edge attributes {unknown} (expected some of {sorted(DEFAULT_REDUCE)})")
+
+
+def parse_assignments(items, what: str) -> Dict[str, str]:
+    """
+    ``["wind_speed=viento.tif", ...]`` -> ``{"wind_speed": "viento.tif"}`` (para
+    la CLI). Los nombres tienen que ser atributos conocidos (``check_attributes``).
+    """
+    out: Dict[str, str] = {}
+    for item in items or ():
+        name, sep, value = item.partition("=")
+        if not sep or not name or not value:
+            raise ValueError(f"Expected <attribute>=<{what}>, got {item!r}")
+        out[name.strip()] = value.strip()
+    check_attributes(out)
+    return out
@@ -0,0 +1,195 @@
+"""
+Construcción vectorizada de aristas candidatas entre nodos.
+
+Los vecinos se buscan con un único ``cKDTree.query`` sobre vectores unitarios
+3D (la distancia de cuerda es monótona con la distancia de gran círculo, así
+que no hay distorsión por latitud ni problemas en el antimeridiano) y las
+distancias se calculan con haversine sobre arrays completos.
+"""
+import importlib.util
+import sys
+from concurrent.futures import Executor
+from functools import partial
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def _load_geo():
+    """
+    ``src/path_search/geo.py`` (radio y vectores unitarios que usa la búsqueda),
+    cargado por ruta: el builder depende de la biblioteca de búsqueda y no al
+    revés, sin tocar ``sys.path``.
+    """
+    name = "path_search_geo"
+    if name not in sys.modules:
+        path = Path(__file__).resolve().parent.parent / "path_search" / "geo.py"
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+_geo = _load_geo()
+EARTH_RADIUS_KM = _geo.EARTH_RADIUS_KM
+to_unit_vectors = _geo.unit_vectors
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distancia de gran círculo en km, elemento a elemento."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64))
+                              for a in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2)
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def km_to_chord(km: float) -> float:
+    """Distancia de cuerda (esfera unitaria) equivalente a ``km`` sobre la superficie."""
+    return 2.0 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2.0)
+
+
+def candidate_edges(
+    lats: np.ndarray,
+    lons: np.ndarray,
+    k_neighbors: int,
+    max_connection_km: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Aristas candidatas de cada nodo a sus ``k_neighbors`` vecinos más cercanos.
+
+    Retorna arrays (src, dst, dist_km) con una fila por par (nodo, vecino)
+    dentro de ``max_connection_km``, en el mismo orden que el barrido nodo a
+    nodo (por src y luego por cercanía).
+    """
+    n = len(lats)
+    if n < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    xyz = to_unit_vectors(lats, lons)
+    tree = cKDTree(xyz)
+    k = min(k_neighbors + 1, n)
+    # distance_upper_bound descarta de entrada a los vecinos fuera de radio
+    # (quedan con índice n y distancia inf); el margen cubre el redondeo.
+    _, idx = tree.query(xyz, k=k, distance_upper_bound=km_to_chord(max_connection_km) * (1 + 1e-9))
+    idx = idx[:, 1:]  # la primera columna es el propio nodo
+
+    src = np.repeat(np.arange(n, dtype=np.int64), idx.shape[1])
+    dst = idx.ravel().astype(np.int64)
+    valid = dst < n
+    src, dst = src[valid], dst[valid]
+
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    dist_km = haversine_km(lats[src], lons[src], lats[dst], lons[dst])
+    within = dist_km <= max_connection_km
+    return src[within], dst[within], dist_km[within]
+
+
+def port_edge_depth(src: np.ndarray, dst: np.ndarray, elevation: np.ndarray, n_ocean: int) -> np.ndarray:
+    """
+    ``depth_min`` inicial de cada arista (m, positiva) cuando algún extremo es
+    un puerto (ids >= ``n_ocean``): la profundidad del extremo oceánico. Entre
+    dos puertos no hay dato (NaN): decide la profundidad de los nodos, y los
+    puertos no restringen el calado (ver ``draft_classes.water_depth``).
+    Las aristas océano-océano se miden después con :func:`segments_over_ocean`.
+    """
+    water = -np.asarray(elevation, dtype=np.float64)
+    depth_min = np.where(src < n_ocean, water[src], water[dst])
+    depth_min[(src >= n_ocean) & (dst >= n_ocean)] = np.nan
+    return depth_min
+
+
+def segments_over_ocean(
+    i1: np.ndarray,
+    j1: np.ndarray,
+    i2: np.ndarray,
+    j2: np.ndarray,
+    ocean_mask: np.ndarray,
+    elev: Optional[np.ndarray] = None,
+    samples_per_pixel: float = 1.0,
+    max_samples_per_chunk: int = 4_000_000,
+):
+    """
+    Verifica de una vez si cada segmento (i1, j1) -> (i2, j2) pasa solo por océano.
+
+    Cada segmento se muestrea con ``samples_per_pixel`` puntos por píxel de
+    largo (en la dirección dominante), así que las aristas largas no pueden
+    saltearse islas delgadas como pasaba con 20 puntos fijos. Las muestras
+    se procesan por bloques de ``max_samples_per_chunk`` para acotar memoria.
+
+    Retorna la máscara booleana de segmentos válidos y, si se pasa ``elev``,
+    también la profundidad mínima (en metros, positiva) encontrada en el
+    recorrido, es decir ``-max(elev)`` sobre las muestras.
+    """
+    i1, j1, i2, j2 = (np.asarray(a, dtype=np.float64) for a in (i1, j1, i2, j2))
+    n = len(i1)
+    over_ocean = np.zeros(n, dtype=bool)
+    depth_min = np.full(n, np.nan) if elev is not None else None
+    if n == 0:
+        return (over_ocean, depth_min) if elev is not None else over_ocean
+
+    length_px = np.maximum(np.abs(i2 - i1), np.abs(j2 - j1))
+    n_samples = np.maximum(2, np.ceil(length_px * samples_per_pixel).astype(np.int64) + 1)
+    max_row, max_col = ocean_mask.shape[0] - 1, ocean_mask.shape[1] - 1
+
+    # bloques de segmentos consecutivos con a lo sumo max_samples_per_chunk muestras
+    cum = np.cumsum(n_samples)
+    start = 0
+    while start < n:
+        done = cum[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(cum, done + max_samples_per_chunk, side="right")))
+        seg = slice(start, stop)
+        counts = n_samples[seg]
+        seg_id = np.repeat(np.arange(stop - start), counts)
+        first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        t = (np.arange(counts.sum()) - first[seg_id]) / (counts[seg_id] - 1)
+        rows = np.rint(i1[seg][seg_id] + t * (i2[seg] - i1[seg])[seg_id]).astype(np.int64)
+        cols = np.rint(j1[seg][seg_id] + t * (j2[seg] - j1[seg])[seg_id]).astype(np.int64)
+        np.clip(rows, 0, max_row, out=rows)
+        np.clip(cols, 0, max_col, out=cols)
+
+        over_ocean[seg] = np.logical_and.reduceat(ocean_mask[rows, cols], first)
+        if elev is not None:
+            depth_min[seg] = -np.maximum.reduceat(elev[rows, cols].astype(np.float64), first)
+        start = stop
+
+    return (over_ocean, depth_min) if elev is not None else over_ocean
+
+
+def _segments_over_ocean_task(ocean_path: Path, elev_path: Path, samples_per_pixel: float, chunk):
+    ocean_mask = np.load(ocean_path, mmap_mode="r")
+    elev = np.load(elev_path, mmap_mode="r")
+    return segments_over_ocean(*chunk, ocean_mask, elev=elev, samples_per_pixel=samples_per_pixel)
+
+
+def segments_over_ocean_parallel(
+    i1: np.ndarray,
+    j1: np.ndarray,
+    i2: np.ndarray,
+    j2: np.ndarray,
+    ocean_path: Path,
+    elev_path: Path,
+    executor: Optional[Executor] = None,
+    samples_per_pixel: float = 1.0,
+    chunk_edges: int = 100_000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ``segments_over_ocean`` sobre rásteres .npy, repartido en bloques de aristas.
+
+    Cada worker abre la máscara y la elevación con ``mmap_mode='r'``, así que
+    no se copian entre procesos. Los bloques se reúnen en orden, por lo que el
+    resultado es el mismo con o sin ``executor``.
+    """
+    n = len(i1)
+    chunks = [tuple(np.asarray(a[s:s + chunk_edges]) for a in (i1, j1, i2, j2))
+              for s in range(0, n, chunk_edges)]
+    task = partial(_segments_over_ocean_task, ocean_path, elev_path, samples_per_pixel)
+    results = list(executor.map(task, chunks) if executor else map(task, chunks))
+    if not results:
+        return np.zeros(0, dtype=bool), np.zeros(0)
+    return (np.concatenate([r[0] for r in results]),
+            np.concatenate([r[1] for r in results]))
@@ -1,209 +1,296 @@
-import rasterio
-import numpy as np
-import pandas as pd
-import networkx as nx
-from scipy.ndimage import distance_transform_edt
-from skimage.transform import resize
-from scipy.spatial import cKDTree
-from pathlib import Path
-from geopy.distance import geodesic
-
-# === CONFIGURACIÓN GENERAL ===
-data_dir = Path("../data")         # carpeta donde están los .tif
-ports_file = data_dir / "UpdatedPub150.csv"  # archivo de puertos
-coastal_threshold = 50             # píxeles para considerar "costa"
-step_coast = 3                     # densidad cerca de tierra
-step_open = 100                    # densidad mar adentro
-resize_factor = 1.0
-max_connection_km = 50             # radio máximo de conexión (~50 km)
-k_neighbors = 4                    # cantidad de vecinos más cercanos
-
-
-# === FUNCIONES AUXILIARES ===
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Distancia en km entre dos coordenadas (usa geodesic)."""
-    return geodesic((lat1, lon1), (lat2, lon2)).km
-
-def path_is_over_ocean(i1, j1, i2, j2, ocean_mask, num_points=20):
-    """Verifica si el segmento entre dos nodos pasa solo por océano."""
-    rows = np.linspace(i1, i2, num_points).astype(int)
-    cols = np.linspace(j1, j2, num_points).astype(int)
-    return np.all(ocean_mask[rows, cols])
-
-# === 1. Leer puertos (PUB150) ===
-ports_df = pd.read_csv(ports_file)
-
+"""
+Construcción de grafos de navegación a partir de rásteres GEBCO (+ puertos PUB150).
 
-# Normalizar nombres
-ports_df.columns = [c.strip().lower().replace(" ", "") for c in ports_df.columns]
+Uso desde consola (desde ``src/df``)::
 
-# Fijar columnas directamente
-lat_col = "latitude"
-lon_col = "longitude"
+    python grafo_load.py --data-dir ../data --workers 4
 
+o como librería::
 
-print(f"⚙️ {len(ports_df)} puertos con coordenadas válidas después de limpieza.\n")
+    from grafo_load import BuildConfig, build_all
+    build_all(BuildConfig(data_dir=Path("../data")), workers=4)
 
+Con varias regiones, cada región se procesa en un proceso del pool. Con una
+sola región, el pool se usa dentro de la región para las ventanas del ráster
+(distancia a tierra, muestreo) y para la verificación de aristas sobre océano.
+La salida es la misma para cualquier cantidad de workers.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, List, Optional
 
-print(f"⚓ Se cargaron {len(ports_df)} puertos desde {ports_file.name}")
-
-# === 2. Procesar todos los archivos .tif ===
-tif_files = list(data_dir.glob("*.tif"))
-print(f"🌍 Se encontraron {len(tif_files)} archivos TIFF en {data_dir}")
-
-for tif_path in tif_files:
-    print(f"\n🌊 Procesando: {tif_path.name}")
-
-    # === 3. Leer el archivo GEBCO ===
-    with rasterio.open(tif_path) as src:
-        elev = src.read(1)
-        transform = src.transform
-        bounds = src.bounds  # para saber lat/lon del área cubierta
-
-    # Calcular límites geográficos
-    lon_min, lat_min, lon_max, lat_max = bounds.left, bounds.bottom, bounds.right, bounds.top
-    print(f"📍 Extensión geográfica: Lon({lon_min} → {lon_max}), Lat({lat_min} → {lat_max})")
-
-    if resize_factor < 1.0:
-        elev = resize(elev,
-                      (int(elev.shape[0]*resize_factor),
-                       int(elev.shape[1]*resize_factor)),
-                      anti_aliasing=True)
+import numpy as np
+import pandas as pd
 
-    # === 4. Crear máscara del océano ===
-    ocean_mask = elev < 0
-    if not np.any(ocean_mask):
-        print("⚠️ Sin océano, saltando.")
-        continue
+from sampling import pixels_to_lonlat
+from cache import cached_raster_products
+from edges import candidate_edges, port_edge_depth, segments_over_ocean_parallel
+from edge_attributes import AttributeRaster, parse_assignments, sample_edge_attributes
+from spanner import greedy_spanner, measure_stretch
 
-    dist_to_land = distance_transform_edt(ocean_mask == 1)
 
-    # === 5. Generar nodos oceánicos ===
-    points = []
-    rows, cols = elev.shape
-    for i in range(0, rows, 5):
-        for j in range(0, cols, 5):
-            if ocean_mask[i, j]:
-                d = dist_to_land[i, j]
-                if d < coastal_threshold:
-                    if (i % step_coast == 0) and (j % step_coast == 0):
-                        points.append((i, j, elev[i, j]))
-                else:
-                    if (i % step_open == 0) and (j % step_open == 0):
-                        points.append((i, j, elev[i, j]))
+# === CONFIGURACIÓN GENERAL ===
+@dataclass
+class BuildConfig:
+    data_dir: Path = Path("../data")   # carpeta donde están los .tif
+    ports_file: Optional[Path] = None  # archivo de puertos (default: data_dir/UpdatedPub150.csv)
+    coastal_threshold: float = 50      # píxeles para considerar "costa"
+    step_coast: int = 3                # densidad cerca de tierra
+    step_open: int = 100               # densidad mar adentro
+    resize_factor: float = 1.0
+    max_memory_mb: float = 1024        # memoria máxima por ventana de ráster
+    cache_dir: Optional[Path] = None   # caché de rásteres derivados y nodos (default: data_dir/.cache)
+    max_connection_km: float = 50      # radio máximo de conexión (~50 km)
+    k_neighbors: int = 4               # cantidad de vecinos más cercanos
+    samples_per_pixel: float = 1.0     # muestras por píxel al verificar que una arista no cruce tierra
+    stretch: float = 1.1               # rutas del spanner <= stretch * óptimo del grafo candidato (inf = árbol mínimo)
+    attribute_rasters: Dict[str, Path] = field(default_factory=dict)  # atributo -> GeoTIFF/.npy (risk_index, ...)
+    attribute_spacing_km: float = 5.0  # separación de las muestras a lo largo de cada arista
+    attribute_reduce: Dict[str, str] = field(default_factory=dict)    # atributo -> "mean"/"max"
+
+    def __post_init__(self):
+        self.data_dir = Path(self.data_dir)
+        if self.ports_file is None:
+            self.ports_file = self.data_dir / "UpdatedPub150.csv"
+        if self.cache_dir is None:
+            self.cache_dir = self.data_dir / ".cache"
+
+
+@dataclass
+class RegionResult:
+    region: str
+    nodes_csv: Optional[Path] = None
+    edges_csv: Optional[Path] = None
+    num_nodes: int = 0
+    num_edges: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    stretch: Dict[str, float] = field(default_factory=dict)  # stretch medido sobre pares de muestra
+
+
+class _Stopwatch:
+    """Mide etapas e imprime el progreso de una región."""
+
+    def __init__(self, region: str, result: RegionResult):
+        self.region = region
+        self.result = result
+        self._t = time.perf_counter()
+
+    def lap(self, stage: str, message: str) -> None:
+        now = time.perf_counter()
+        self.result.timings[stage] = now - self._t
+        self._t = now
+        print(f"[{self.region}] {message} ({self.result.timings[stage]:.2f}s)", flush=True)
 
-    points = np.array(points)
-    print(f"→ {len(points)} nodos oceánicos")
 
-    if len(points) == 0:
-        continue
+# === 1. Leer puertos (PUB150) ===
+def load_ports(ports_file: Path) -> pd.DataFrame:
+    """Puertos con latitud/longitud numéricas válidas (columnas latitude, longitude)."""
+    ports_df = pd.read_csv(ports_file)
+    # Normalizar nombres
+    ports_df.columns = [c.strip().lower().replace(" ", "") for c in ports_df.columns]
+    ports_df = ports_df[["latitude", "longitude"]].apply(pd.to_numeric, errors="coerce")
+    ports_df = ports_df.dropna(subset=["latitude", "longitude"]).reset_index(drop=True)
+    print(f"⚓ Se cargaron {len(ports_df)} puertos desde {Path(ports_file).name}")
+    return ports_df
+
+
+# === 2. Procesar una región ===
+def build_region(tif_path: Path, config: BuildConfig, ports_df: pd.DataFrame,
+                 executor: Optional[Executor] = None) -> RegionResult:
+    """
+    Genera ``<region>_nodes.csv`` y ``<region>_edges.csv`` para un .tif.
+
+    ``executor`` (opcional) reparte las etapas costosas de la región.
+    """
+    tif_path = Path(tif_path)
+    result = RegionResult(region=tif_path.stem)
+    clock = _Stopwatch(tif_path.stem, result)
+    print(f"\n🌊 Procesando: {tif_path.name}", flush=True)
+
+    # === 3-5. Leer el GEBCO por ventanas: océano, distancia a tierra y nodos ===
+    # (reutiliza la caché si el .tif y los parámetros de muestreo no cambiaron)
+    products, nodes, hits = cached_raster_products(tif_path, config.cache_dir, config.coastal_threshold,
+                                                   config.step_coast, config.step_open,
+                                                   resize_factor=config.resize_factor,
+                                                   max_memory_mb=config.max_memory_mb,
+                                                   executor=executor)
+    lon_min, lat_min, lon_max, lat_max = products.bounds
+    reused = [stage for stage, hit in hits.items() if hit]
+    clock.lap("raster", f"📍 Lon({lon_min} → {lon_max}), Lat({lat_min} → {lat_max}); "
+                        f"{len(nodes)} nodos oceánicos"
+                        + (f" (caché: {', '.join(reused)})" if reused else ""))
+
+    if len(nodes) == 0:
+        print(f"[{result.region}] ⚠️ Sin océano, saltando.")
+        return result
 
     # === 6. Convertir índices a coordenadas geográficas ===
-    lats, lons, depths = [], [], []
-    for i, j, depth in points:
-        lon, lat = rasterio.transform.xy(transform, i, j)
-        lats.append(lat)
-        lons.append(lon)
-        depths.append(depth)
-
+    rows, cols = nodes.rows, nodes.cols
+    lons, lats = pixels_to_lonlat(products.transform, rows, cols)
     nodes_df = pd.DataFrame({
         "latitud": lats,
         "longitud": lons,
-        "profundidad": depths
+        "profundidad": nodes.depths
     })
 
     # === 7. Agregar puertos dentro del área del .tif ===
     ports_in_tile = ports_df[
-        (ports_df[lat_col] >= lat_min) & (ports_df[lat_col] <= lat_max) &
-        (ports_df[lon_col] >= lon_min) & (ports_df[lon_col] <= lon_max)
-    ].copy()
-
-    if ports_in_tile is not None and len(ports_in_tile) > 0:
-        print(f"⚓ Agregando {len(ports_in_tile)} puertos en esta región...")
-
-        # Asegurar que las columnas existan y sean numéricas
-        ports_in_tile = ports_in_tile.copy()
-        ports_in_tile[lat_col] = pd.to_numeric(ports_in_tile[lat_col], errors="coerce")
-        ports_in_tile[lon_col] = pd.to_numeric(ports_in_tile[lon_col], errors="coerce")
-        ports_in_tile = ports_in_tile.dropna(subset=[lat_col, lon_col])
-
-        if len(ports_in_tile) > 0:
-            port_nodes = pd.DataFrame({
-                "latitud": ports_in_tile[lat_col].values,
-                "longitud": ports_in_tile[lon_col].values,
-                "profundidad": np.zeros(len(ports_in_tile))  # nivel del mar
-            })
-            nodes_df = pd.concat([nodes_df, port_nodes], ignore_index=True)
-            print(f"✅ {len(port_nodes)} puertos agregados como nodos.")
-        else:
-            print("⚓ Todos los puertos en esta región tenían coordenadas inválidas. Saltando...")
-    else:
-        print("⚓ Sin puertos en esta región.")
-
-
-    # === 8. Crear conexiones (usando KDTree) ===
-    print("🔗 Generando conexiones entre nodos...")
-    coords = np.column_stack((nodes_df["latitud"], nodes_df["longitud"]))
-    tree = cKDTree(coords)
-
-    edges = []
-    G = nx.Graph()
-
-    for idx1, n1 in nodes_df.iterrows():
-        lat1, lon1 = n1["latitud"], n1["longitud"]
-        i1, j1 = None, None
-        if idx1 < len(points):  # si es nodo oceánico
-            i1, j1, _ = points[idx1]
-
-        dists, indices = tree.query((lat1, lon1), k=k_neighbors + 1)
-        for dist, idx2 in zip(dists[1:], indices[1:]):
-            if np.isnan(dist):
-                continue
-            n2 = nodes_df.loc[idx2]
-            lat2, lon2 = n2["latitud"], n2["longitud"]
-
-            dist_km = haversine_distance(lat1, lon1, lat2, lon2)
-            if dist_km > max_connection_km:
-                continue
-
-            # Verificar que esté sobre océano (solo si ambos son oceánicos)
-            if (i1 is not None) and (idx2 < len(points)):
-                i2, j2, _ = points[idx2]
-                if not path_is_over_ocean(i1, j1, i2, j2, ocean_mask):
-                    continue
-
-            edges.append({
-                "lat_origen": lat1,
-                "lon_origen": lon1,
-                "lat_destino": lat2,
-                "lon_destino": lon2,
-                "distancia_km": dist_km
-            })
-            G.add_edge(idx1, idx2, weight=dist_km)
-
-    print(f"✅ {len(edges)} conexiones válidas creadas")
-
-    # === 9. Calcular árbol mínimo de conexiones ===
-    shortest_edges = []
-    for u, v, data in nx.minimum_spanning_edges(G, data=True):
-        n1 = nodes_df.loc[u]
-        n2 = nodes_df.loc[v]
-        shortest_edges.append({
-            "lat_origen": n1["latitud"],
-            "lon_origen": n1["longitud"],
-            "lat_destino": n2["latitud"],
-            "lon_destino": n2["longitud"],
-            "distancia_km": data["weight"]
+        (ports_df["latitude"] >= lat_min) & (ports_df["latitude"] <= lat_max) &
+        (ports_df["longitude"] >= lon_min) & (ports_df["longitude"] <= lon_max)
+    ]
+    if len(ports_in_tile) > 0:
+        port_nodes = pd.DataFrame({
+            "latitud": ports_in_tile["latitude"].values,
+            "longitud": ports_in_tile["longitude"].values,
+            "profundidad": np.zeros(len(ports_in_tile))  # nivel del mar
         })
+        nodes_df = pd.concat([nodes_df, port_nodes], ignore_index=True)
+    clock.lap("ports", f"⚓ {len(ports_in_tile)} puertos agregados como nodos")
 
-    # === 10. Guardar CSVs ===
-    nodes_csv = data_dir / f"{tif_path.stem}_nodes.csv"
-    edges_csv = data_dir / f"{tif_path.stem}_edges.csv"
-
-    nodes_df.to_csv(nodes_csv, index=False)
-    pd.DataFrame(shortest_edges).to_csv(edges_csv, index=False)
-
-    print(f"🗺️ Nodos guardados en: {nodes_csv.name}")
-    print(f"🧭 Aristas guardadas en: {edges_csv.name}")
-
-print("\n🎉 Grafo completo generado para todos los archivos con puertos incluidos.")
+    # === 8. Crear conexiones (usando KDTree) ===
+    lat_arr = nodes_df["latitud"].to_numpy()
+    lon_arr = nodes_df["longitud"].to_numpy()
+    src, dst, dist_km = candidate_edges(lat_arr, lon_arr, config.k_neighbors, config.max_connection_km)
+
+    # Verificar que esté sobre océano (solo si ambos son oceánicos) y medir
+    # la profundidad mínima real a lo largo de la arista
+    n_ocean = len(nodes)
+    depth_min = port_edge_depth(src, dst, nodes_df["profundidad"].to_numpy(), n_ocean)
+    keep = np.ones(len(src), dtype=bool)
+    both_ocean = np.flatnonzero((src < n_ocean) & (dst < n_ocean))
+    ok, seg_depth = segments_over_ocean_parallel(
+        rows[src[both_ocean]], cols[src[both_ocean]],
+        rows[dst[both_ocean]], cols[dst[both_ocean]],
+        products.workdir / "ocean_mask.npy", products.workdir / "elev.npy",
+        executor=executor, samples_per_pixel=config.samples_per_pixel,
+    )
+    keep[both_ocean] = ok
+    depth_min[both_ocean] = seg_depth
+    src, dst, dist_km, depth_min = src[keep], dst[keep], dist_km[keep], depth_min[keep]
+    clock.lap("edges", f"🔗 {len(src)} conexiones válidas creadas")
+
+    # === 9. Esparcificar: spanner greedy con stretch acotado ===
+    kept = greedy_spanner(len(nodes_df), src, dst, dist_km, stretch=config.stretch)
+    stats = measure_stretch(len(nodes_df), src, dst, dist_km, kept)
+    u, v = src[kept], dst[kept]
+    edges_df = pd.DataFrame({
+        "lat_origen": lat_arr[u],
+        "lon_origen": lon_arr[u],
+        "lat_destino": lat_arr[v],
+        "lon_destino": lon_arr[v],
+        "distancia_km": dist_km[kept],
+        "depth_min": depth_min[kept],
+    })
+    result.stretch = stats
+    clock.lap("sparsify", f"🌲 {len(edges_df)} aristas en el spanner (stretch {config.stretch:g}; "
+                          f"medido en {stats['pairs']} pares: máx {stats['max']:.3f}, "
+                          f"medio {stats['mean']:.3f})")
+
+    # === 10. Atributos por arista (riesgo, olas, viento) desde rásteres ===
+    if config.attribute_rasters:
+        rasters = {name: AttributeRaster.open(path) for name, path in config.attribute_rasters.items()}
+        columns = sample_edge_attributes(edges_df, rasters, spacing_km=config.attribute_spacing_km,
+                                         reduce=config.attribute_reduce)
+        for name, values in columns.items():
+            edges_df[name] = values
+        clock.lap("attributes", f"🌬️ Atributos muestreados sobre las aristas: {', '.join(columns)}")
+
+    # === 11. Guardar CSVs ===
+    result.nodes_csv = config.data_dir / f"{tif_path.stem}_nodes.csv"
+    result.edges_csv = config.data_dir / f"{tif_path.stem}_edges.csv"
+    nodes_df.to_csv(result.nodes_csv, index=False)
+    edges_df.to_csv(result.edges_csv, index=False)
+    result.num_nodes, result.num_edges = len(nodes_df), len(edges_df)
+    clock.lap("write", f"🗺️ Guardados {result.nodes_csv.name} y {result.edges_csv.name}")
+    return result
+
+
+def _build_region_task(tif_path: Path, config: BuildConfig, ports_df: pd.DataFrame) -> RegionResult:
+    return build_region(tif_path, config, ports_df)
+
+
+def build_all(config: BuildConfig, workers: int = 1,
+              tif_files: Optional[List[Path]] = None) -> List[RegionResult]:
+    """
+    Procesa todos los .tif de ``config.data_dir`` (o ``tif_files``).
+
+    Los resultados se devuelven en el orden de los archivos (ordenados por nombre).
+    """
+    tif_files = sorted(tif_files if tif_files is not None else config.data_dir.glob("*.tif"))
+    print(f"🌍 Se encontraron {len(tif_files)} archivos TIFF en {config.data_dir}")
+    ports_df = load_ports(config.ports_file)
+    t0 = time.perf_counter()
+
+    if workers <= 1:
+        results = [build_region(p, config, ports_df) for p in tif_files]
+    elif len(tif_files) == 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [build_region(tif_files[0], config, ports_df, executor=pool)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tif_files))) as pool:
+            futures = [pool.submit(_build_region_task, p, config, ports_df) for p in tif_files]
+            results = [f.result() for f in futures]
+
+    for r in results:
+        stages = ", ".join(f"{k}={v:.2f}s" for k, v in r.timings.items())
+        print(f"⏱️ {r.region}: {r.num_nodes} nodos, {r.num_edges} aristas [{stages}]")
+    print(f"\n🎉 Grafo completo generado para {len(results)} regiones "
+          f"en {time.perf_counter() - t0:.2f}s.")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    defaults = BuildConfig()
+    parser = argparse.ArgumentParser(description="Build navigation graphs from GEBCO tiles.")
+    parser.add_argument("tif_files", nargs="*", type=Path, help="Specific .tif files (default: all in --data-dir)")
+    parser.add_argument("--data-dir", type=Path, default=defaults.data_dir)
+    parser.add_argument("--ports-file", type=Path, default=None)
+    parser.add_argument("--cache-dir", type=Path, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--coastal-threshold", type=float, default=defaults.coastal_threshold)
+    parser.add_argument("--step-coast", type=int, default=defaults.step_coast)
+    parser.add_argument("--step-open", type=int, default=defaults.step_open)
+    parser.add_argument("--resize-factor", type=float, default=defaults.resize_factor)
+    parser.add_argument("--max-memory-mb", type=float, default=defaults.max_memory_mb)
+    parser.add_argument("--max-connection-km", type=float, default=defaults.max_connection_km)
+    parser.add_argument("--k-neighbors", type=int, default=defaults.k_neighbors)
+    parser.add_argument("--samples-per-pixel", type=float, default=defaults.samples_per_pixel)
+    parser.add_argument("--stretch", type=float, default=defaults.stretch)
+    parser.add_argument("--attribute-raster", action="append", default=[], metavar="ATTR=PATH",
+                        help="Raster sampled onto edges as ATTR (e.g. wind_speed=wind.tif); repeatable")
+    parser.add_argument("--attribute-spacing-km", type=float, default=defaults.attribute_spacing_km)
+    parser.add_argument("--attribute-reduce", action="append", default=[], metavar="ATTR=mean|max")
+    args = parser.parse_args(argv)
+    try:
+        attribute_rasters = parse_assignments(args.attribute_raster, "path")
+        attribute_reduce = parse_assignments(args.attribute_reduce, "mean|max")
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    config = replace(
+        defaults,
+        data_dir=args.data_dir,
+        ports_file=args.ports_file or args.data_dir / "UpdatedPub150.csv",
+        cache_dir=args.cache_dir or args.data_dir / ".cache",
+        coastal_threshold=args.coastal_threshold,
+        step_coast=args.step_coast,
+        step_open=args.step_open,
+        resize_factor=args.resize_factor,
+        max_memory_mb=args.max_memory_mb,
+        max_connection_km=args.max_connection_km,
+        k_neighbors=args.k_neighbors,
+        samples_per_pixel=args.samples_per_pixel,
+        stretch=args.stretch,
+        attribute_rasters={k: Path(v) for k, v in attribute_rasters.items()},
+        attribute_spacing_km=args.attribute_spacing_km,
+        attribute_reduce=attribute_reduce,
+    )
+    build_all(config, workers=args.workers, tif_files=args.tif_files or None)
+
+
+if __name__ == "__main__":
+    main()
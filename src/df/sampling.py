@@ -0,0 +1,75 @@
+"""
+Muestreo adaptativo de nodos oceánicos sobre un ráster GEBCO.
+
+Versión vectorizada del barrido original::
+
+    for i in range(0, rows, 5):
+        for j in range(0, cols, 5):
+            if ocean_mask[i, j]:
+                if dist_to_land[i, j] < coastal_threshold:   # costa: grilla step_coast
+                    ...
+                else:                                       # mar abierto: grilla step_open
+                    ...
+
+Las condiciones se evalúan como máscaras sobre toda la grilla de barrido y los
+nodos salen en el mismo orden (fila mayor) que el bucle anidado.
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+def _grid_mask(idx: np.ndarray, step: int) -> np.ndarray:
+    return (idx % step) == 0
+
+
+def sample_ocean_nodes(
+    elev: np.ndarray,
+    ocean_mask: np.ndarray,
+    dist_to_land: np.ndarray,
+    coastal_threshold: float,
+    step_coast: int,
+    step_open: int,
+    scan_step: int = 5,
+    row_offset: int = 0,
+    col_offset: int = 0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Devuelve (filas, columnas, profundidades) de los nodos muestreados.
+
+    ``row_offset``/``col_offset`` indican la posición del bloque dentro del
+    ráster completo: las grillas de barrido y de densidad se alinean con los
+    índices globales, de modo que procesar por bloques da los mismos nodos.
+    Las filas y columnas devueltas son globales.
+    """
+    n_rows, n_cols = ocean_mask.shape
+    # primera fila/columna local cuyo índice global es múltiplo de scan_step
+    r0 = (-row_offset) % scan_step
+    c0 = (-col_offset) % scan_step
+    gi = np.arange(r0, n_rows, scan_step) + row_offset
+    gj = np.arange(c0, n_cols, scan_step) + col_offset
+
+    ocean = ocean_mask[r0::scan_step, c0::scan_step]
+    coastal = dist_to_land[r0::scan_step, c0::scan_step] < coastal_threshold
+    on_coast_grid = _grid_mask(gi, step_coast)[:, None] & _grid_mask(gj, step_coast)[None, :]
+    on_open_grid = _grid_mask(gi, step_open)[:, None] & _grid_mask(gj, step_open)[None, :]
+
+    keep = ocean & np.where(coastal, on_coast_grid, on_open_grid)
+    ki, kj = np.nonzero(keep)
+    rows = gi[ki]
+    cols = gj[kj]
+    depths = elev[rows - row_offset, cols - col_offset].astype(np.float64)
+    return rows, cols, depths
+
+
+def pixels_to_lonlat(transform, rows: np.ndarray, cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Centro de cada píxel (fila, col) en coordenadas del ráster, en un solo paso.
+
+    Equivale a llamar ``rasterio.transform.xy(transform, i, j)`` por punto.
+    """
+    x = np.asarray(cols, dtype=np.float64) + 0.5
+    y = np.asarray(rows, dtype=np.float64) + 0.5
+    lons = transform.a * x + transform.b * y + transform.c
+    lats = transform.d * x + transform.e * y + transform.f
+    return lons, lats
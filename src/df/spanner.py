@@ -0,0 +1,110 @@
+"""
+Esparcificación del grafo candidato con un spanner geométrico greedy.
+
+El árbol mínimo deja un único camino entre cada par de nodos y obliga a
+rodeos enormes. El spanner greedy recorre las aristas candidatas de menor a
+mayor peso y sólo agrega ``(u, v, w)`` si en el spanner actual no existe ya un
+camino de costo ``<= stretch * w``. El resultado garantiza que toda ruta del
+grafo candidato se puede hacer en el spanner con a lo sumo ``stretch`` veces
+su costo, con muchas menos aristas. Con ``stretch = inf`` se obtiene
+exactamente el árbol mínimo de Kruskal.
+"""
+import heapq
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+
+def unique_undirected(src: np.ndarray, dst: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    """Índices de la primera aparición de cada arista no dirigida {u, v} (sin lazos)."""
+    lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+    idx = np.flatnonzero(lo != hi)
+    _, first = np.unique(np.column_stack((lo[idx], hi[idx])), axis=0, return_index=True)
+    return np.sort(idx[first])
+
+
+def _within(adj: List[List[Tuple[int, float]]], source: int, target: int, limit: float) -> bool:
+    """¿Hay un camino source -> target de costo <= limit? (Dijkstra acotado)."""
+    dist: Dict[int, float] = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if u == target:
+            return True
+        if d > dist.get(u, math.inf):
+            continue
+        for v, w in adj[u]:
+            nd = d + w
+            if nd <= limit and nd < dist.get(v, math.inf):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return False
+
+
+def greedy_spanner(n: int, src: np.ndarray, dst: np.ndarray, weight: np.ndarray,
+                   stretch: float = 1.1) -> np.ndarray:
+    """
+    Índices (sobre src/dst/weight) de las aristas que forman el spanner.
+
+    Las aristas se tratan como no dirigidas; los duplicados {u, v} se ignoran.
+    El orden de procesamiento (peso, u, v) es determinista.
+    """
+    if stretch < 1.0:
+        raise ValueError("stretch must be >= 1")
+    cand = unique_undirected(src, dst, weight)
+    order = cand[np.lexsort((np.maximum(src[cand], dst[cand]),
+                             np.minimum(src[cand], dst[cand]),
+                             weight[cand]))]
+
+    adj: List[List[Tuple[int, float]]] = [[] for _ in range(n)]
+    # union-find: si u y v están en componentes distintas no hace falta buscar
+    parent = list(range(n))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    kept: List[int] = []
+    for e, u, v, w in zip(order.tolist(), src[order].tolist(), dst[order].tolist(),
+                          weight[order].tolist()):
+        ru, rv = find(u), find(v)
+        if ru == rv and (math.isinf(stretch) or _within(adj, u, v, stretch * w)):
+            continue
+        parent[ru] = rv
+        adj[u].append((v, w))
+        adj[v].append((u, w))
+        kept.append(e)
+    return np.array(sorted(kept), dtype=np.int64)
+
+
+def measure_stretch(n: int, src: np.ndarray, dst: np.ndarray, weight: np.ndarray,
+                    kept: np.ndarray, n_sources: int = 20, targets_per_source: int = 10,
+                    seed: int = 0) -> Dict[str, float]:
+    """
+    Stretch alcanzado (distancia en spanner / distancia en candidato) sobre
+    una muestra determinista de pares conectados.
+    """
+    def csgraph(idx):
+        return coo_matrix((weight[idx], (src[idx], dst[idx])), shape=(n, n)).tocsr()
+
+    rng = np.random.default_rng(seed)
+    sources = rng.choice(n, size=min(n_sources, n), replace=False)
+    full = dijkstra(csgraph(unique_undirected(src, dst, weight)), directed=False, indices=sources)
+    sparse = dijkstra(csgraph(kept), directed=False, indices=sources)
+
+    ratios = []
+    for row, s in enumerate(sources):
+        reachable = np.flatnonzero(np.isfinite(full[row]) & (full[row] > 0))
+        if len(reachable) == 0:
+            continue
+        targets = rng.choice(reachable, size=min(targets_per_source, len(reachable)), replace=False)
+        ratios.append(sparse[row, targets] / full[row, targets])
+    if not ratios:
+        return {"pairs": 0, "max": float("nan"), "mean": float("nan")}
+    ratios = np.concatenate(ratios)
+    return {"pairs": int(len(ratios)), "max": float(ratios.max()), "mean": float(ratios.mean())}
@@ -0,0 +1,239 @@
+"""
+Procesamiento por ventanas de rásteres GEBCO con memoria acotada.
+
+En lugar de ``src.read(1)`` sobre todo el TIFF y un ``distance_transform_edt``
+global, el ráster se recorre en ventanas de rasterio. Cada ventana se lee con
+un halo de ``coastal_threshold`` píxeles alrededor, de modo que la distancia a
+tierra calculada dentro de la ventana es exacta para todo píxel a menos de
+``coastal_threshold`` de la costa (los demás sólo necesitan saber que están
+más lejos). Los nodos se muestrean sólo en el núcleo de cada ventana con
+índices globales, así que el resultado coincide con procesar el TIFF entero.
+
+Elevación, máscara de océano y distancia a tierra se escriben en ``.npy``
+mapeados en memoria (``workdir``) para las etapas siguientes (verificación de
+aristas sobre océano, profundidad mínima).
+"""
+import math
+import tempfile
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.windows import Window
+from scipy.ndimage import distance_transform_edt
+
+from sampling import sample_ocean_nodes
+
+# Bytes por píxel de ventana (con halo): elevación float32, máscara, distancia
+# float64 y el feature transform int32 x2 que usa distance_transform_edt,
+# más temporales del muestreo.
+BYTES_PER_PIXEL = 28
+
+Block = Tuple[int, int, int, int]  # fila0, fila1, col0, col1 (núcleo, índices globales)
+
+
+@dataclass
+class RasterProducts:
+    """Productos derivados del ráster, respaldados por archivos .npy mapeados."""
+    elev: np.ndarray           # float32 (rows, cols)
+    ocean_mask: np.ndarray     # bool (rows, cols)
+    dist_to_land: np.ndarray   # float32 (rows, cols), saturada en ``dist_cap``
+    dist_cap: float
+    transform: "rasterio.Affine"
+    bounds: Tuple[float, float, float, float]  # left, bottom, right, top
+    workdir: Path
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.ocean_mask.shape
+
+
+@dataclass
+class SampledNodes:
+    rows: np.ndarray
+    cols: np.ndarray
+    depths: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def window_side(halo: int, max_memory_mb: float) -> int:
+    """Lado del núcleo de ventana para no superar ``max_memory_mb`` por ventana."""
+    side = int(math.sqrt(max_memory_mb * 2**20 / BYTES_PER_PIXEL)) - 2 * halo
+    if side < max(halo, 16):
+        raise ValueError(
+            f"max_memory_mb={max_memory_mb} is too small for a halo of {halo} px"
+        )
+    return side
+
+
+def plan_blocks(shape: Tuple[int, int], side: int) -> List[Block]:
+    rows, cols = shape
+    return [(r0, min(r0 + side, rows), c0, min(c0 + side, cols))
+            for r0 in range(0, rows, side) for c0 in range(0, cols, side)]
+
+
+def output_grid(src, resize_factor: float) -> Tuple[Tuple[int, int], "rasterio.Affine"]:
+    """Forma y transform del ráster de trabajo (reducido si resize_factor < 1)."""
+    if resize_factor >= 1.0:
+        return (src.height, src.width), src.transform
+    shape = (int(src.height * resize_factor), int(src.width * resize_factor))
+    transform = src.transform * rasterio.Affine.scale(src.width / shape[1], src.height / shape[0])
+    return shape, transform
+
+
+def read_block(src, block: Block, halo: int, shape: Tuple[int, int],
+               resize_factor: float = 1.0) -> Tuple[np.ndarray, Block]:
+    """
+    Lee el bloque con su halo (recortado a los bordes del ráster).
+
+    Retorna la elevación leída y la extensión global (fila0, fila1, col0, col1)
+    efectivamente leída.
+    """
+    r0, r1, c0, c1 = block
+    rows, cols = shape
+    hr0, hr1 = max(0, r0 - halo), min(rows, r1 + halo)
+    hc0, hc1 = max(0, c0 - halo), min(cols, c1 + halo)
+    if resize_factor >= 1.0:
+        window = Window(hc0, hr0, hc1 - hc0, hr1 - hr0)
+        elev = src.read(1, window=window)
+    else:
+        sy, sx = src.height / rows, src.width / cols
+        window = Window(hc0 * sx, hr0 * sy, (hc1 - hc0) * sx, (hr1 - hr0) * sy)
+        elev = src.read(1, window=window, out_shape=(hr1 - hr0, hc1 - hc0),
+                        resampling=Resampling.average)
+    return elev, (hr0, hr1, hc0, hc1)
+
+
+def distance_to_land(ocean: np.ndarray, cap: float) -> np.ndarray:
+    """distance_transform_edt saturada en ``cap`` (sin tierra en la ventana -> cap)."""
+    if ocean.all():
+        return np.full(ocean.shape, cap, dtype=np.float32)
+    dist = distance_transform_edt(ocean)
+    return np.minimum(dist, cap).astype(np.float32)
+
+
+def process_block(elev: np.ndarray, extent: Block, block: Block, dist_cap: float,
+                  coastal_threshold: float, step_coast: int, step_open: int):
+    """Máscara, distancia a tierra y nodos del núcleo ``block`` de una ventana."""
+    hr0, _, hc0, _ = extent
+    r0, r1, c0, c1 = block
+    ocean = elev < 0
+    dist = distance_to_land(ocean, dist_cap)
+    core = (slice(r0 - hr0, r1 - hr0), slice(c0 - hc0, c1 - hc0))
+    nodes = sample_ocean_nodes(elev[core], ocean[core], dist[core],
+                               coastal_threshold, step_coast, step_open,
+                               row_offset=r0, col_offset=c0)
+    return elev[core], ocean[core], dist[core], nodes
+
+
+def stitch_nodes(parts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                 shape: Tuple[int, int]) -> SampledNodes:
+    """Une los nodos de todas las ventanas sin duplicados, en orden fila-mayor."""
+    if not parts:
+        empty = np.zeros(0, dtype=np.int64)
+        return SampledNodes(empty, empty, np.zeros(0))
+    rows = np.concatenate([p[0] for p in parts])
+    cols = np.concatenate([p[1] for p in parts])
+    depths = np.concatenate([p[2] for p in parts])
+    _, first = np.unique(rows * shape[1] + cols, return_index=True)  # ordenado por índice lineal
+    return SampledNodes(rows[first], cols[first], depths[first])
+
+
+def iter_blocks(shape: Tuple[int, int], halo: int, max_memory_mb: float) -> Iterator[Block]:
+    yield from plan_blocks(shape, window_side(halo, max_memory_mb))
+
+
+def _process_block_task(tif_path: Path, block: Block, halo: int, shape: Tuple[int, int],
+                        resize_factor: float, dist_cap: float, coastal_threshold: float,
+                        step_coast: int, step_open: int, workdir: Path):
+    """Tarea de una ventana: lee, procesa y escribe su núcleo en los .npy de ``workdir``.
+
+    Es autocontenida (abre el TIFF y los .npy por su cuenta) para poder
+    ejecutarse en otro proceso; los núcleos no se solapan entre ventanas.
+    """
+    with rasterio.open(tif_path) as src:
+        elev, extent = read_block(src, block, halo, shape, resize_factor)
+    e, o, d, nodes = process_block(elev, extent, block, dist_cap,
+                                   coastal_threshold, step_coast, step_open)
+    r0, r1, c0, c1 = block
+    for name, values in (("elev", e), ("ocean_mask", o), ("dist_to_land", d)):
+        out = np.load(workdir / f"{name}.npy", mmap_mode="r+")
+        out[r0:r1, c0:c1] = values
+        out.flush()
+        del out
+    return nodes
+
+
+def process_raster_tiled(
+    tif_path: Path,
+    coastal_threshold: float,
+    step_coast: int,
+    step_open: int,
+    resize_factor: float = 1.0,
+    max_memory_mb: float = 512,
+    workdir: Optional[Path] = None,
+    executor: Optional[Executor] = None,
+) -> Tuple[RasterProducts, SampledNodes]:
+    """
+    Calcula máscara de océano, distancia a tierra y nodos muestreados por ventanas.
+
+    ``max_memory_mb`` acota la memoria de trabajo de cada ventana (sin contar
+    los .npy mapeados, que viven en disco / page cache). Con ``executor``
+    (p.ej. un ProcessPoolExecutor) las ventanas se procesan en paralelo; el
+    resultado no depende de la cantidad de workers.
+    """
+    tif_path = Path(tif_path)
+    workdir = Path(workdir) if workdir else Path(tempfile.mkdtemp(prefix="gebco_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    halo = int(math.ceil(coastal_threshold))
+    dist_cap = float(halo)
+
+    with rasterio.open(tif_path) as src:
+        shape, transform = output_grid(src, resize_factor)
+        b = src.bounds
+        bounds = (b.left, b.bottom, b.right, b.top)
+    for name, dtype in (("elev", np.float32), ("ocean_mask", bool), ("dist_to_land", np.float32)):
+        np.lib.format.open_memmap(workdir / f"{name}.npy", mode="w+", dtype=dtype, shape=shape).flush()
+
+    blocks = list(iter_blocks(shape, halo, max_memory_mb))
+    task = partial(_process_block_task, tif_path, halo=halo, shape=shape,
+                   resize_factor=resize_factor, dist_cap=dist_cap,
+                   coastal_threshold=coastal_threshold, step_coast=step_coast,
+                   step_open=step_open, workdir=workdir)
+    parts = list(executor.map(task, blocks) if executor else map(task, blocks))
+
+    products = RasterProducts(
+        np.load(workdir / "elev.npy", mmap_mode="r"),
+        np.load(workdir / "ocean_mask.npy", mmap_mode="r"),
+        np.load(workdir / "dist_to_land.npy", mmap_mode="r"),
+        dist_cap, transform, bounds, workdir,
+    )
+    return products, stitch_nodes(parts, shape)
+
+
+def sample_from_products(products: RasterProducts, coastal_threshold: float,
+                         step_coast: int, step_open: int, max_memory_mb: float = 512) -> SampledNodes:
+    """
+    Vuelve a muestrear nodos sobre rásteres ya derivados (sin leer el TIFF).
+
+    La distancia a tierra ya es global, así que los bloques no necesitan halo.
+    Requiere ``coastal_threshold <= products.dist_cap``.
+    """
+    if coastal_threshold > products.dist_cap:
+        raise ValueError(
+            f"coastal_threshold={coastal_threshold} exceeds the cached distance cap {products.dist_cap}"
+        )
+    parts = []
+    for r0, r1, c0, c1 in iter_blocks(products.shape, 0, max_memory_mb):
+        core = (slice(r0, r1), slice(c0, c1))
+        parts.append(sample_ocean_nodes(products.elev[core], products.ocean_mask[core],
+                                        products.dist_to_land[core], coastal_threshold,
+                                        step_coast, step_open, row_offset=r0, col_offset=c0))
+    return stitch_nodes(parts, products.shape)
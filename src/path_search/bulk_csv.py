@@ -0,0 +1,154 @@
+"""
+Lectura de CSV por columnas completas, para los archivos de nodos y aristas.
+
+``csv.reader`` + ``float()`` fila por fila domina el arranque con los CSV
+grandes (p.ej. ``pacifico_norte_americano_nodes.csv``, 90k líneas). Acá cada
+archivo se parsea con ``pandas.read_csv`` (parser en C) en bloques de
+``chunk_rows`` filas, con tipo explícito (float64) en las columnas pedidas;
+cada bloque se devuelve como arrays de NumPy, así que en memoria nunca hay
+más de un bloque de texto parseado a la vez.
+
+Límite de memoria: :func:`iter_columns` nunca tiene más de un bloque en
+memoria, pero :func:`read_columns` (lo que usan ``CSRGraph.from_csv``,
+``Graph.load_data`` y ``load_graph``) concatena todos los bloques, así que
+las columnas pedidas del archivo entero (8 bytes por valor) tienen que
+entrar en RAM. Bloquear el parseo evita el pico del texto parseado, no ese
+total: un archivo más grande que la memoria sigue sin cargarse.
+
+Particularidades de nuestros archivos que se toleran:
+
+- BOM al inicio (``utf-8-sig``) y líneas en blanco (también antes del header);
+- coma final en el header y/o en las filas (``latitud,longitud,profundidad,``);
+- el header repetido a mitad de archivo (CSV concatenados): esas filas se
+  descartan; cualquier otro valor no numérico queda como NaN.
+
+El header se lee y valida una sola vez (:func:`read_header`,
+:func:`column_positions`). Si un bloque trae texto no numérico, el archivo se
+relee en modo tolerante (strings + ``pd.to_numeric``) desde ese bloque:
+el camino rápido es el de los archivos limpios.
+"""
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+PathLike = Union[str, Path]
+
+CHUNK_ROWS = 500_000
+
+
+def _header_line(path: PathLike) -> Tuple[int, List[str]]:
+    """(número de línea, campos) de la primera línea no vacía; (-1, []) si no hay."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for lineno, line in enumerate(f):
+            if line.strip():
+                return lineno, [c.strip() for c in next(csv.reader([line]))]
+    return -1, []
+
+
+def read_header(path: PathLike) -> List[str]:
+    """Nombres de columna (sin espacios ni el campo vacío de una coma final)."""
+    _, fields = _header_line(path)
+    while fields and not fields[-1]:
+        fields.pop()
+    return fields
+
+
+def column_positions(header: Sequence[str], required: Sequence[str],
+                     optional: Sequence[str] = (), path: PathLike = "") -> Dict[str, int]:
+    """Posición de cada columna pedida; ``KeyError`` si falta alguna obligatoria."""
+    found = {name: i for i, name in enumerate(header) if name}
+    missing = [name for name in required if name not in found]
+    if missing:
+        raise KeyError(f"CSV {path} is missing expected columns: {missing}. Found: {list(header)}")
+    return {name: found[name] for name in list(required) + [n for n in optional if n in found]}
+
+
+def _chunks(path: PathLike, positions: Mapping[str, int], skip_header: bool,
+            chunk_rows: int, tolerant: bool) -> Iterator[Dict[str, np.ndarray]]:
+    lineno, fields = _header_line(path)
+    if lineno < 0:
+        return
+    width = max(len(fields), max(positions.values()) + 1)
+    needed = sorted(set(positions.values()))
+    reader = pd.read_csv(
+        path,
+        header=None,
+        names=list(range(width)),
+        index_col=False,  # coma final en las filas: no tomar la 1ra columna como índice
+        skiprows=lineno + 1 if skip_header else lineno,
+        dtype=str if tolerant else {pos: np.float64 for pos in needed},
+        encoding="utf-8-sig",
+        skip_blank_lines=True,
+        float_precision="round_trip",  # mismos valores que float()
+        chunksize=chunk_rows,
+    )
+    with reader:
+        for chunk in reader:
+            if tolerant:
+                yield _coerce(chunk, positions, fields)
+            else:
+                yield {name: chunk[pos].to_numpy(dtype=np.float64) for name, pos in positions.items()}
+
+
+def _coerce(chunk: pd.DataFrame, positions: Mapping[str, int],
+            fields: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Columnas de texto -> float64 (NaN si no es un número), sin las filas que repiten el header."""
+    text = {pos: chunk[pos].fillna("").str.strip() for pos in set(positions.values())}
+    repeated = np.ones(len(chunk), dtype=bool)
+    for pos, values in text.items():
+        repeated &= (values == (fields[pos] if pos < len(fields) else "")).to_numpy()
+    columns = {}
+    for name, pos in positions.items():
+        values = text[pos][~repeated]
+        numeric = pd.to_numeric(values, errors="coerce").notna().to_numpy()
+        out = np.full(len(values), np.nan)
+        # la conversión de NumPy desde texto coincide con float() (la de to_numeric no siempre)
+        out[numeric] = values.to_numpy(dtype=object)[numeric].astype(str).astype(np.float64)
+        columns[name] = out
+    return columns
+
+
+def iter_columns(path: PathLike, positions: Mapping[str, int], skip_header: bool = True,
+                 chunk_rows: int = CHUNK_ROWS) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Bloques de hasta ``chunk_rows`` filas: nombre -> float64 con la columna
+    en ``positions[nombre]`` (NaN si el campo está vacío, falta o no es numérico).
+    """
+    done = 0
+    try:
+        for columns in _chunks(path, positions, skip_header, chunk_rows, tolerant=False):
+            yield columns
+            done += 1
+    except ValueError:
+        # texto no numérico: se relee tolerando, sin repetir los bloques ya entregados
+        for i, columns in enumerate(_chunks(path, positions, skip_header, chunk_rows, tolerant=True)):
+            if i >= done:
+                yield columns
+
+
+def read_columns(path: PathLike, positions: Mapping[str, int], skip_header: bool = True,
+                 chunk_rows: int = CHUNK_ROWS,
+                 required: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Columnas completas del archivo (bloques concatenados). Se descartan las
+    filas con NaN en alguna de ``required`` (por defecto, ninguna).
+
+    Todas las columnas pedidas quedan en memoria a la vez (float64); para
+    archivos que no entran en RAM hay que recorrer :func:`iter_columns`.
+    """
+    parts: Dict[str, List[np.ndarray]] = {name: [] for name in positions}
+    for columns in iter_columns(path, positions, skip_header, chunk_rows):
+        if required:
+            keep = np.ones(len(next(iter(columns.values()))), dtype=bool)
+            for name in required:
+                keep &= ~np.isnan(columns[name])
+            columns = {name: values[keep] for name, values in columns.items()}
+        for name, values in columns.items():
+            parts[name].append(values)
+    return {name: np.concatenate(chunks) if chunks else np.zeros(0)
+            for name, chunks in parts.items()}
@@ -0,0 +1,473 @@
+"""
+Contraction hierarchies (CH) para consultas punto a punto muy rápidas.
+
+Preprocesamiento (una vez por grafo y por función de costo):
+
+1. se contraen los nodos de a uno, en orden de "importancia" creciente
+   (diferencia de aristas + vecinos ya contraídos, con actualización perezosa);
+2. al contraer ``v``, para cada par ``u -> v -> w`` sin un camino testigo
+   ``u -> w`` igual o más barato que evite ``v`` se agrega un atajo ``u -> w``
+   que recuerda a ``v`` como nodo intermedio;
+3. los últimos ``core_size`` nodos (el "núcleo", donde la contracción ya es
+   densa y cada paso cuesta cada vez más) no se contraen: se guarda la tabla
+   de distancias entre todos ellos (Dijkstra de ``scipy.sparse.csgraph``);
+4. el resultado son dos grafos CSR "hacia arriba" (aristas hacia nodos de
+   mayor rango) más la tabla del núcleo, en ``<snapshot>.ch-<nombre>.npz``.
+
+La consulta hace dos búsquedas que sólo suben en la jerarquía (hacia
+adelante desde el origen, sobre aristas invertidas desde el destino) y se
+detienen al llegar al núcleo; el costo es el mínimo entre los nodos donde se
+encuentran y los pares (entrada, salida) del núcleo vía la tabla. El camino se
+reconstruye desempaquetando los atajos y se devuelve con el mismo formato que
+``a_star`` (lista de ids de nodos).
+
+Uso desde consola::
+
+    python contraction.py ../data/region_nodes.csv [...] --cost distance --queries 200
+"""
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from csr_graph import CSRGraph
+
+PathLike = Union[str, Path]
+EdgeCostFn = Callable[..., float]  # cost_fn(edge) como las de costs.py
+
+# Límite de nodos asentados por búsqueda de testigos: acota el tiempo de
+# preprocesamiento a costa de algún atajo innecesario (nunca de uno faltante).
+# Para estimar prioridades alcanza con una búsqueda más corta.
+WITNESS_SETTLE_LIMIT = 200
+PRIORITY_SETTLE_LIMIT = 30
+# Nodos que quedan sin contraer; la tabla del núcleo ocupa 12 * core_size**2 bytes.
+CORE_SIZE = 2048
+
+
+def edge_weights(graph: CSRGraph, cost_fn: EdgeCostFn) -> np.ndarray:
+    """Costo de cada arista del CSR (en orden de ``targets``) según ``cost_fn(edge)``."""
+    return np.fromiter((cost_fn(graph.edge(i)) for i in range(graph.num_edges)),
+                       dtype=np.float64, count=graph.num_edges)
+
+
+def weights_digest(weights: np.ndarray) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(weights, dtype=np.float64).tobytes(),
+                           digest_size=16).hexdigest()
+
+
+def _witness_costs(out_adj: List[Dict[int, Tuple[float, int]]], source: int, skip: int,
+                   limit: float, targets: Dict[int, Tuple[float, int]],
+                   settle_limit: int = WITNESS_SETTLE_LIMIT) -> Dict[int, float]:
+    """
+    Dijkstra acotado desde ``source`` que evita ``skip`` (costo <= limit).
+    Termina en cuanto asentó todos los ``targets`` o ``settle_limit`` nodos.
+    """
+    dist: Dict[int, float] = {source: 0.0}
+    heap = [(0.0, source)]
+    pending = len(targets) - (source in targets)
+    settled = 0
+    while heap and settled < settle_limit and pending > 0:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        settled += 1
+        if u in targets and u != source:
+            pending -= 1
+        for v, (w, _) in out_adj[u].items():
+            nd = d + w
+            if v != skip and nd <= limit and nd < dist.get(v, math.inf):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+def _shortcuts(out_adj, in_adj, v: int,
+               settle_limit: int = WITNESS_SETTLE_LIMIT) -> List[Tuple[int, int, float]]:
+    """Atajos (u, w, costo) necesarios para contraer ``v``."""
+    if not in_adj[v] or not out_adj[v]:
+        return []
+    outgoing = out_adj[v]
+    max_out = max(w for w, _ in outgoing.values())
+    needed = []
+    for u, (w_uv, _) in in_adj[v].items():
+        witness = _witness_costs(out_adj, u, v, w_uv + max_out, outgoing, settle_limit)
+        for x, (w_vx, _) in outgoing.items():
+            if x == u:
+                continue
+            cost = w_uv + w_vx
+            if witness.get(x, math.inf) > cost:
+                needed.append((u, x, cost))
+    return needed
+
+
+class ContractionHierarchy:
+    """
+    Jerarquía contraída de un grafo para una función de costo fija.
+
+    ``up_*`` es el CSR de aristas ``u -> v`` con ``rank[v] > rank[u]``;
+    ``down_*`` guarda, en la fila de ``v``, las aristas ``u -> v`` con
+    ``rank[u] > rank[v]`` (es decir, el grafo invertido hacia arriba).
+    ``*_middle`` es el nodo contraído de cada atajo, o -1 para aristas originales.
+    Los nodos del núcleo tienen los rangos más altos y en sus filas están todas
+    sus aristas (hacia y desde otros nodos del núcleo); ``core_dist[i, j]`` es
+    el costo mínimo entre ``core_nodes[i]`` y ``core_nodes[j]`` y ``core_pred``
+    la matriz de predecesores correspondiente (índices locales, -9999 = ninguno).
+    """
+
+    def __init__(self, rank: np.ndarray,
+                 up_offsets: np.ndarray, up_targets: np.ndarray,
+                 up_weights: np.ndarray, up_middle: np.ndarray,
+                 down_offsets: np.ndarray, down_targets: np.ndarray,
+                 down_weights: np.ndarray, down_middle: np.ndarray,
+                 core_nodes: np.ndarray, core_dist: np.ndarray, core_pred: np.ndarray,
+                 checksum: str = "", weights_digest: str = ""):
+        self.rank = np.asarray(rank, dtype=np.int64)
+        self.up = tuple(np.asarray(a) for a in (up_offsets, up_targets, up_weights, up_middle))
+        self.down = tuple(np.asarray(a) for a in (down_offsets, down_targets, down_weights, down_middle))
+        self.core_nodes = np.asarray(core_nodes, dtype=np.int64)
+        self.core_dist = np.asarray(core_dist, dtype=np.float64)
+        self.core_pred = np.asarray(core_pred, dtype=np.int32)
+        self.checksum = checksum
+        self.weights_digest = weights_digest
+        self._lists = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.rank)
+
+    @property
+    def num_shortcuts(self) -> int:
+        return int((self.up[3] >= 0).sum() + (self.down[3] >= 0).sum())
+
+    # ------------------------------------------------------- preprocesamiento
+    @classmethod
+    def build(cls, graph: CSRGraph, weights: Optional[np.ndarray] = None,
+              cost_fn: Optional[EdgeCostFn] = None,
+              core_size: int = CORE_SIZE) -> "ContractionHierarchy":
+        """
+        Contrae ``graph`` con los pesos dados (uno por arista del CSR). Si no se
+        pasan, se calculan con ``cost_fn`` o, en su defecto, con ``distance``.
+        """
+        if weights is None:
+            weights = (edge_weights(graph, cost_fn) if cost_fn is not None
+                       else graph.edge_attrs["distance"])
+        weights = np.asarray(weights, dtype=np.float64)
+        if len(weights) != graph.num_edges:
+            raise ValueError("Expected one weight per CSR edge")
+        if np.any(weights < 0) or np.any(np.isnan(weights)):
+            raise ValueError("Edge weights must be non-negative")
+
+        n = graph.num_nodes
+        out_adj: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(n)]
+        in_adj: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(n)]
+        src = np.repeat(np.arange(n), np.diff(graph.offsets))
+        for u, v, w in zip(src.tolist(), graph.targets.tolist(), weights.tolist()):
+            # sin lazos ni aristas intransitables; entre paralelas gana la más barata
+            if u == v or math.isinf(w) or w >= out_adj[u].get(v, (math.inf,))[0]:
+                continue
+            out_adj[u][v] = (w, -1)
+            in_adj[v][u] = (w, -1)
+
+        # prioridad: diferencia de aristas + vecinos ya contraídos (reparte la
+        # contracción por todo el grafo en lugar de vaciar una zona primero)
+        deleted = [0] * n
+
+        def priority(v: int) -> int:
+            added = len(_shortcuts(out_adj, in_adj, v, PRIORITY_SETTLE_LIMIT))
+            removed = len(in_adj[v]) + len(out_adj[v])
+            return 2 * (added - removed) + deleted[v]
+
+        current = [priority(v) for v in range(n)]
+        heap = [(p, v) for v, p in enumerate(current)]
+        heapq.heapify(heap)
+        contracted = [False] * n
+        stale = [False] * n
+        rank = np.empty(n, dtype=np.int64)
+        up_rows: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(n)]
+        down_rows: List[Dict[int, Tuple[float, int]]] = [{} for _ in range(n)]
+        level = 0
+        while heap and n - level > core_size:
+            p, v = heapq.heappop(heap)
+            if contracted[v] or p != current[v]:
+                continue  # entrada obsoleta
+            if stale[v]:
+                # actualización perezosa: si la prioridad empeoró, reinsertar
+                stale[v] = False
+                current[v] = priority(v)
+                if heap and current[v] > heap[0][0]:
+                    heapq.heappush(heap, (current[v], v))
+                    continue
+            for u, x, cost in _shortcuts(out_adj, in_adj, v):
+                if cost < out_adj[u].get(x, (math.inf,))[0]:
+                    out_adj[u][x] = (cost, v)
+                    in_adj[x][u] = (cost, v)
+            contracted[v] = True
+            rank[v] = level
+            level += 1
+            # las aristas que le quedan a v van todas a nodos de mayor rango
+            up_rows[v] = out_adj[v]
+            down_rows[v] = in_adj[v]
+            for x in out_adj[v]:
+                del in_adj[x][v]
+                deleted[x] += 1
+                stale[x] = True
+            for u in in_adj[v]:
+                del out_adj[u][v]
+                deleted[u] += 1
+                stale[u] = True
+            out_adj[v] = {}
+            in_adj[v] = {}
+
+        # núcleo: rangos más altos, sus filas conservan todas sus aristas
+        core = [v for v in range(n) if not contracted[v]]
+        local = {v: i for i, v in enumerate(core)}
+        core_src, core_dst, core_w = [], [], []
+        for v in core:
+            rank[v] = level
+            level += 1
+            up_rows[v] = out_adj[v]
+            down_rows[v] = in_adj[v]
+            for x, (w, _) in out_adj[v].items():
+                core_src.append(local[v])
+                core_dst.append(local[x])
+                core_w.append(w)
+        c = len(core)
+        matrix = csr_matrix((core_w, (core_src, core_dst)), shape=(c, c))
+        core_dist, core_pred = dijkstra(matrix, directed=True, return_predecessors=True)
+
+        def to_csr(rows):
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(r) for r in rows])
+            targets = np.fromiter((t for r in rows for t in r), dtype=np.int32, count=offsets[-1])
+            w = np.fromiter((e[0] for r in rows for e in r.values()), dtype=np.float64, count=offsets[-1])
+            mid = np.fromiter((e[1] for r in rows for e in r.values()), dtype=np.int32, count=offsets[-1])
+            return offsets, targets, w, mid
+
+        return cls(rank, *to_csr(up_rows), *to_csr(down_rows),
+                   np.array(core, dtype=np.int64), core_dist, core_pred,
+                   checksum=graph.checksum, weights_digest=weights_digest(weights))
+
+    # ---------------------------------------------------------- persistencia
+    def save(self, path: PathLike) -> None:
+        names = ("offsets", "targets", "weights", "middle")
+        arrays = {f"up_{k}": a for k, a in zip(names, self.up)}
+        arrays.update({f"down_{k}": a for k, a in zip(names, self.down)})
+        np.savez(path, rank=self.rank, core_nodes=self.core_nodes, core_dist=self.core_dist,
+                 core_pred=self.core_pred, checksum=np.array(self.checksum),
+                 weights_digest=np.array(self.weights_digest), **arrays)
+
+    @classmethod
+    def load(cls, path: PathLike) -> "ContractionHierarchy":
+        names = ("offsets", "targets", "weights", "middle")
+        with np.load(path) as z:
+            return cls(z["rank"], *(z[f"up_{k}"] for k in names), *(z[f"down_{k}"] for k in names),
+                       z["core_nodes"], z["core_dist"], z["core_pred"],
+                       checksum=str(z["checksum"]), weights_digest=str(z["weights_digest"]))
+
+    # -------------------------------------------------------------- consulta
+    def _adjacency(self):
+        # listas de Python: en el lazo de la consulta son más rápidas que NumPy
+        if self._lists is None:
+            core_index = np.full(self.num_nodes, -1, dtype=np.int64)
+            core_index[self.core_nodes] = np.arange(len(self.core_nodes))
+            self._lists = (tuple(a.tolist() for a in self.up),
+                           tuple(a.tolist() for a in self.down),
+                           self.rank.tolist(), core_index.tolist())
+        return self._lists
+
+    def _upward(self, source: int, forward: bool) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """
+        Dijkstra desde ``source`` que sólo sube de rango y no entra al núcleo.
+
+        Usa "stall-on-demand": si un nodo ``u`` se alcanza más barato bajando
+        desde un vecino de mayor rango ya visitado (arista del otro grafo), su
+        etiqueta no es óptima y no se expande.
+        """
+        up, down, _, core_index = self._adjacency()
+        (offsets, targets, weights, _), (s_off, s_tgt, s_w, _) = (up, down) if forward else (down, up)
+        dist = {source: 0.0}
+        parent = {source: -1}
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u] or core_index[u] >= 0:
+                continue
+            stalled = False
+            for k in range(s_off[u], s_off[u + 1]):
+                if dist.get(s_tgt[k], math.inf) + s_w[k] < d:
+                    stalled = True
+                    break
+            if stalled:
+                continue
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                nd = d + weights[k]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return dist, parent
+
+    def _search(self, source: int, target: int):
+        """
+        Retorna (costo, (a, b), padres adelante, padres atrás): el camino óptimo
+        sube de source hasta ``a``, va de ``a`` a ``b`` (dentro del núcleo, o
+        ``a == b``) y baja hasta target.
+        """
+        core_index = self._adjacency()[3]
+        fwd, fwd_parent = self._upward(source, True)
+        bwd, bwd_parent = self._upward(target, False)
+        best, meet = math.inf, (-1, -1)
+        small, large = (fwd, bwd) if len(fwd) <= len(bwd) else (bwd, fwd)
+        for u, d in small.items():
+            other = large.get(u)
+            if other is not None and d + other < best:
+                best, meet = d + other, (u, u)
+
+        entries = [u for u in fwd if core_index[u] >= 0]
+        exits = [u for u in bwd if core_index[u] >= 0]
+        if entries and exits:
+            via = (self.core_dist[np.ix_([core_index[u] for u in entries],
+                                         [core_index[u] for u in exits])]
+                   + np.array([fwd[u] for u in entries])[:, None]
+                   + np.array([bwd[u] for u in exits])[None, :])
+            i, j = np.unravel_index(int(np.argmin(via)), via.shape)
+            if via[i, j] < best:
+                best, meet = float(via[i, j]), (entries[i], exits[j])
+        return best, meet, fwd_parent, bwd_parent
+
+    def distance(self, source: int, target: int) -> float:
+        """Costo mínimo source -> target (``math.inf`` si no hay camino)."""
+        return self._search(source, target)[0]
+
+    def _middle(self, a: int, b: int) -> int:
+        """Nodo intermedio de la arista a -> b de la jerarquía (-1 si es original)."""
+        (uo, ut, _, um), (do, dt, _, dm), rank, _ = self._adjacency()
+        if rank[a] < rank[b]:
+            offsets, targets, middle, row, other = uo, ut, um, a, b
+        else:
+            offsets, targets, middle, row, other = do, dt, dm, b, a
+        return middle[targets.index(other, offsets[row], offsets[row + 1])]
+
+    def _unpack(self, a: int, b: int, out: List[int]) -> None:
+        """Agrega a ``out`` los nodos de a -> b sin atajos, excluyendo ``a``."""
+        stack = [(a, b)]
+        while stack:
+            x, y = stack.pop()
+            m = self._middle(x, y)
+            if m < 0:
+                out.append(y)
+            else:
+                stack.append((m, y))
+                stack.append((x, m))
+
+    def _core_chain(self, a: int, b: int) -> List[int]:
+        """Nodos del núcleo de a hasta b según la matriz de predecesores."""
+        core_index = self._adjacency()[3]
+        i, j = core_index[a], core_index[b]
+        chain = [j]
+        while chain[-1] != i:
+            chain.append(int(self.core_pred[i, chain[-1]]))
+        return [int(self.core_nodes[k]) for k in reversed(chain)]
+
+    def query(self, source: int, target: int) -> Tuple[float, Optional[List[int]]]:
+        """
+        (costo, camino) de source a target; el camino es la lista de nodos del
+        grafo original, como la que retorna ``a_star``. Sin camino: (inf, None).
+        """
+        best, (a, b), fwd, bwd = self._search(source, target)
+        if a < 0:
+            return math.inf, None
+        chain = [a]
+        while fwd[chain[-1]] >= 0:
+            chain.append(fwd[chain[-1]])
+        chain.reverse()                               # source ... a
+        if a != b:
+            chain.extend(self._core_chain(a, b)[1:])  # ... b
+        while bwd[chain[-1]] >= 0:
+            chain.append(bwd[chain[-1]])              # ... target
+        path = [source]
+        for x, y in zip(chain, chain[1:]):
+            self._unpack(x, y, path)
+        return best, path
+
+
+def ch_path(snapshot_path: PathLike, name: str = "distance") -> Path:
+    snapshot_path = Path(snapshot_path)
+    return snapshot_path.with_name(f"{snapshot_path.stem}.ch-{name}.npz")
+
+
+def load_or_build_ch(graph: CSRGraph, path: PathLike,
+                     cost_fn: Optional[EdgeCostFn] = None,
+                     weights: Optional[np.ndarray] = None) -> ContractionHierarchy:
+    """
+    Reutiliza la jerarquía guardada si corresponde al mismo grafo (checksum
+    no vacío: un grafo armado directo del CSV no tiene) y a los mismos pesos;
+    si no, la construye y la guarda.
+    """
+    path = Path(path)
+    if weights is None:
+        weights = (edge_weights(graph, cost_fn) if cost_fn is not None
+                   else graph.edge_attrs["distance"])
+    digest = weights_digest(weights)
+    if path.exists() and graph.checksum:
+        ch = ContractionHierarchy.load(path)
+        if (ch.checksum == graph.checksum and ch.weights_digest == digest
+                and ch.num_nodes == graph.num_nodes):
+            return ch
+    ch = ContractionHierarchy.build(graph, weights)
+    ch.save(path)
+    return ch
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import costs
+    from snapshot import default_snapshot_path, load_or_build
+
+    COSTS = {
+        "distance": costs.cost_distance,
+        "fuel": lambda e: costs.cost_fuel(e, 1.0, 1.0),
+        "safe": costs.cost_safe,
+        "time": lambda e: costs.cost_time(e, 0.0),
+        "combined": costs.combined_cost,
+    }
+    parser = argparse.ArgumentParser(description="Build a contraction hierarchy and benchmark queries.")
+    parser.add_argument("nodes_csv", nargs="+", help="<region>_nodes.csv (edges: <region>_edges.csv)")
+    parser.add_argument("--cost", choices=sorted(COSTS), default="distance")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--symmetric", action="store_true")
+    args = parser.parse_args()
+
+    for nodes_csv in map(Path, args.nodes_csv):
+        edges_csv = nodes_csv.with_name(nodes_csv.name.replace("_nodes.csv", "_edges.csv"))
+        g = load_or_build(nodes_csv, edges_csv, symmetric=args.symmetric)
+        w = edge_weights(g, COSTS[args.cost])
+        t0 = time.perf_counter()
+        ch = load_or_build_ch(g, ch_path(default_snapshot_path(nodes_csv), args.cost), weights=w)
+        prep = time.perf_counter() - t0
+
+        rng = np.random.default_rng(0)
+        pairs = rng.integers(g.num_nodes, size=(args.queries, 2)).tolist()
+        t0 = time.perf_counter()
+        results = [ch.query(s, t) for s, t in pairs]
+        per_query = (time.perf_counter() - t0) / max(1, len(pairs))
+
+        # validación contra Dijkstra sobre el grafo original
+        m = csr_matrix((w, g.targets, g.offsets), shape=(g.num_nodes, g.num_nodes))
+        ref = dijkstra(m, directed=True, indices=sorted({s for s, _ in pairs}))
+        row = {s: i for i, s in enumerate(sorted({s for s, _ in pairs}))}
+        bad = sum(not math.isclose(c, ref[row[s], t], rel_tol=1e-9, abs_tol=1e-9)
+                  and not (math.isinf(c) and math.isinf(ref[row[s], t]))
+                  for (s, t), (c, _) in zip(pairs, results))
+        print(f"{nodes_csv.stem}: {ch.num_shortcuts} atajos ({prep:.2f}s), "
+              f"{1000 * per_query:.3f} ms/consulta, {bad} distintas de Dijkstra")
@@ -0,0 +1,222 @@
+"""
+Costos por arista precalculados para todo el grafo.
+
+Las funciones de ``costs.py`` se evalúan en cada relajación de A* y leen
+los atributos de a uno (``combined_cost`` lee once por arista).
+:class:`CostModel` calcula el costo de *todas* las
+aristas de un CSRGraph en una sola pasada de NumPy sobre las columnas de
+atributos, con las mismas fórmulas, y guarda el resultado por objetivo y
+pesos. A ``a_star`` se le pasa un :class:`EdgeCostTable`, que responde cada
+costo con un acceso por índice.
+
+Uso::
+
+    model = CostModel(graph)
+    cost_fn = model.cost_fn("combined", w_fuel=1.0, w_time=2.0, w_safe=0.5)
+    path = a_star(s, t, graph.get_neighbors, cost_fn, h, graph)
+
+Los mismos arrays (``model.costs(...)``) sirven como pesos para
+``contraction`` y ``landmarks``.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+# Parámetros de cada objetivo y sus valores por defecto (los de costs.py)
+OBJECTIVES: Dict[str, Dict[str, float]] = {
+    "distance": {},
+    "fuel": {"w_wind": 1.0, "w_waves": 1.0},
+    "safe": {"w_risk": 1.0, "w_wind": 1.0, "w_waves": 1.0},
+    "time": {"wind_factor": 0.0, "nominal_sp": 1.0},
+    "combined": {"w_fuel": 1.0, "w_time": 1.0, "w_safe": 1.0,
+                 "wind_factor": 0.0, "nominal_sp": 1.0},
+}
+
+# Columnas de edge_attrs que usa cada objetivo
+OBJECTIVE_COLUMNS: Dict[str, frozenset] = {
+    "distance": frozenset({"distance"}),
+    "fuel": frozenset({"distance", "wind_speed", "wave_size"}),
+    "safe": frozenset({"risk_index", "wind_speed", "wave_size"}),
+    "time": frozenset({"distance", "wind_speed"}),
+    "combined": frozenset({"distance", "wind_speed", "wave_size", "risk_index"}),
+}
+
+
+class EdgeCostTable:
+    """
+    ``cost_fn(edge)`` que devuelve el costo precalculado de ``edge.index``.
+
+    ``table`` es una lista de Python (indexarla es más barato que indexar un
+    array de NumPy); ``a_star`` la usa directamente cuando recorre los
+    vecinos de un CSRGraph en orden. Se arma recién cuando se la pide.
+    """
+    __slots__ = ("values", "_table")
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self._table: Optional[List[float]] = None
+
+    @property
+    def table(self) -> List[float]:
+        if self._table is None:
+            self._table = self.values.tolist()
+        return self._table
+
+    def __call__(self, edge) -> float:
+        return self.table[edge.index]
+
+
+class CostModel:
+    """Arrays de costo por arista de un CSRGraph, cacheados por objetivo y pesos."""
+
+    def __init__(self, graph: CSRGraph, max_cached: int = 8,
+                 columns: Optional[Dict[str, np.ndarray]] = None):
+        """
+        ``columns`` (opcional) reemplaza algunas columnas de ``graph.edge_attrs``
+        (p.ej. el viento y las olas de un paso de pronóstico, ver weather.py).
+        """
+        self.graph = graph
+        self.max_cached = max_cached
+        self.columns = columns or {}
+        self._cache: "OrderedDict[Tuple[Any, ...], EdgeCostTable]" = OrderedDict()
+        # el LRU se comparte entre los hilos de la API; el cálculo va fuera del lock
+        self._lock = threading.Lock()
+        self._generation = 0  # sube con cada refresh: no guardar tablas calculadas antes
+
+    def _raw(self, name: str) -> np.ndarray:
+        column = self.columns.get(name)
+        return self.graph.edge_attrs[name] if column is None else column
+
+    def _column(self, name: str) -> np.ndarray:
+        return np.asarray(self._raw(name)).astype(np.float64)
+
+    @staticmethod
+    def key(objective: str, **params: float) -> Tuple[Any, ...]:
+        """Clave de caché: objetivo + todos sus parámetros (con los defaults completos)."""
+        try:
+            defaults = OBJECTIVES[objective]
+        except KeyError:
+            raise ValueError(f"Unknown objective: {objective}") from None
+        unknown = set(params) - set(defaults)
+        if unknown:
+            raise TypeError(f"Unexpected parameters for {objective}: {sorted(unknown)}")
+        merged = {**defaults, **params}
+        return (objective,) + tuple((k, float(merged[k])) for k in sorted(merged))
+
+    # --------------------------------------------------- fórmulas vectoriales
+    def _fuel(self, w_wind: float, w_waves: float) -> np.ndarray:
+        return self._column("distance") * ((1 + w_wind) * self._column("wind_speed")
+                                           + w_waves * self._column("wave_size"))
+
+    def _safe(self, w_risk: float, w_wind: float, w_waves: float) -> np.ndarray:
+        return (w_risk * self._column("risk_index") + w_wind * self._column("wind_speed")
+                + w_waves * self._column("wave_size"))
+
+    def _time(self, wind_factor: float, nominal_sp: float) -> np.ndarray:
+        effective_speed = nominal_sp * (1.0 - wind_factor * self._column("wind_speed"))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = self._column("distance") / effective_speed
+        t[effective_speed <= 0.0] = np.inf
+        return t
+
+    def _compute(self, objective: str, p: Dict[str, float]) -> np.ndarray:
+        if objective == "distance":
+            return self._column("distance")
+        if objective == "fuel":
+            return self._fuel(p["w_wind"], p["w_waves"])
+        if objective == "safe":
+            return self._safe(p["w_risk"], p["w_wind"], p["w_waves"])
+        if objective == "time":
+            return self._time(p["wind_factor"], p["nominal_sp"])
+        # combined_cost usa pesos unitarios para los términos internos
+        return (p["w_fuel"] * self._fuel(1.0, 1.0)
+                + p["w_time"] * self._time(p["wind_factor"], p["nominal_sp"])
+                + p["w_safe"] * self._safe(1.0, 1.0, 1.0))
+
+    # ----------------------------------------------------------------- acceso
+    def cost_fn(self, objective: str = "combined", **params: float) -> EdgeCostTable:
+        key = self.key(objective, **params)
+        with self._lock:
+            table = self._cache.get(key)
+            if table is not None:
+                self._cache.move_to_end(key)
+                return table
+            generation = self._generation
+        values = self._compute(objective, dict(key[1:]))
+        values.flags.writeable = False
+        table = EdgeCostTable(values)
+        with self._lock:
+            if generation != self._generation:
+                return table
+            table = self._cache.setdefault(key, table)  # otro hilo pudo calcularla antes
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return table
+
+    def costs(self, objective: str = "combined", **params: float) -> np.ndarray:
+        """Array (solo lectura) con el costo de cada arista, en el orden de ``targets``."""
+        return self.cost_fn(objective, **params).values
+
+    def refresh(self, report) -> int:
+        """
+        Recalcula los arrays cacheados sólo en las aristas de un
+        ``edge_updates.UpdateReport``. Cada array se reemplaza por uno nuevo
+        (las búsquedas en curso siguen con el anterior). Devuelve cuántos
+        objetivos cambiaron.
+        """
+        ids = report.edge_ids
+        if len(ids) == 0:
+            return 0
+        subset = self._subset(ids)
+        refreshed = 0
+        with self._lock:
+            self._generation += 1
+            for key, table in list(self._cache.items()):
+                if not report.attributes & OBJECTIVE_COLUMNS[key[0]]:
+                    continue
+                values = table.values.copy()
+                values[ids] = subset._compute(key[0], dict(key[1:]))
+                values.flags.writeable = False
+                self._cache[key] = EdgeCostTable(values)
+                refreshed += 1
+        return refreshed
+
+    def _subset(self, ids: np.ndarray, previous: Optional[Dict[str, np.ndarray]] = None) -> "CostModel":
+        """
+        Modelo sobre las aristas ``ids`` (en ese orden). ``previous`` reemplaza
+        atributos del grafo (p.ej. los valores de antes de una actualización);
+        las columnas propias de este modelo (``columns``) tienen prioridad.
+        """
+        previous = previous or {}
+        return CostModel(self.graph, columns={
+            name: previous[name] if name in previous and name not in self.columns
+            else np.asarray(self._raw(name))[ids]
+            for name in self.graph.edge_attrs})
+
+    def only_increased(self, report, key: Tuple[Any, ...]) -> bool:
+        """
+        Si la actualización de ``report`` no abarató ninguna arista para la
+        función de costo ``key`` (ver :meth:`key`): compara el costo de las
+        aristas tocadas con los valores de antes (``report.previous``) y los
+        actuales. Con pesos negativos o nulos más viento puede abaratar.
+        """
+        ids = report.edge_ids
+        if len(ids) == 0 or not report.attributes & OBJECTIVE_COLUMNS[key[0]]:
+            return True
+        params = dict(key[1:])
+        before = self._subset(ids, report.previous)._compute(key[0], params)
+        after = self._subset(ids)._compute(key[0], params)
+        return bool(np.all(after >= before))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
@@ -26,10 +26,9 @@ def cost_fuel(edge,w_wind,w_waves):
         float: coste estimado de combustible
     """
 
-    edge_atr = edge.attributes_list()
-    dist = edge_atr[4]
-    wind_sp = edge_atr[3]
-    wave_size = edge_atr[2]
+    dist = edge['distance']
+    wind_sp = edge['wind_speed']
+    wave_size = edge['wave_size']
     return  dist*((1+w_wind)*wind_sp+ w_waves*wave_size)
 
 
@@ -54,10 +53,9 @@ def cost_safe(
     - coste de seguridad combinado (float)
     """
 
-    edge_atr = edge.attributes_list()
-    risk = edge_atr[1]
-    wind_sp = edge_atr[3]
-    wave_size = edge_atr[2]
+    risk = edge['risk_index']
+    wind_sp = edge['wind_speed']
+    wave_size = edge['wave_size']
     return w_risk * risk + w_wind * wind_sp + w_waves * wave_size
 
 def cost_time(
@@ -79,9 +77,8 @@ def cost_time(
     Retorna:
     - tiempo estimado (float) o math.inf si la velocidad efectiva es cero o negativa
     """
-    edge_atr = edge.attributes_list()
-    wind_sp = edge_atr[3]
-    dist = edge_atr[4]
+    wind_sp = edge['wind_speed']
+    dist = edge['distance']
 
     effective_speed = nominal_sp * (1.0 - wind_factor * wind_sp)
     if effective_speed <= 0.0:
@@ -111,7 +108,7 @@ def combined_cost(
     """
 
     fuel_cost = cost_fuel(edge, w_wind=1.0, w_waves=1.0)
-    time_cost = cost_time(edge, wind_sp=edge.attributes_list()[3], wind_factor=wind_factor, nominal_sp=nominal_sp)
+    time_cost = cost_time(edge, wind_sp=edge['wind_speed'], wind_factor=wind_factor, nominal_sp=nominal_sp)
     safe_cost = cost_safe(edge, w_risk=1.0, w_wind=1.0, w_waves=1.0)
 
     return w_fuel * fuel_cost + w_time * time_cost + w_safe * safe_cost
\ No newline at end of file
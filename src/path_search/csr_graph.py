@@ -0,0 +1,368 @@
+"""
+Grafo dirigido compacto en formato CSR (compressed sparse row).
+
+Los vértices son enteros ``0..n-1``; latitud, longitud y profundidad viven en
+arrays de NumPy y las aristas salientes del nodo ``u`` ocupan el rango
+``offsets[u]:offsets[u + 1]`` de ``targets`` y de cada columna de atributos.
+
+La interfaz replica la de :class:`graph.Graph` (``get_neighbors``,
+``get_edge_data``, ``get_vertex_depth``, ...) para que ``a_star`` pueda
+recorrerlo sin cambios, pero usando ids enteros en lugar de tuplas
+``(lat, lon)``. Para traducir coordenadas a ids se usa :meth:`CSRGraph.node_id`.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from bulk_csv import read_columns, read_header
+
+VertexKey = Tuple[float, float]
+
+# Columnas de atributos por arista y su valor por defecto cuando el CSV no las trae.
+# El orden coincide con Edge.attributes_list() (depth_min, risk_index, wave_size,
+# wind_speed, distance), que es el que indexan las funciones de costs.py.
+EDGE_ATTRIBUTES: Dict[str, float] = {
+    "depth_min": np.nan,
+    "risk_index": 0.0,
+    "wave_size": 0.0,
+    "wind_speed": 0.0,
+    "distance": np.nan,
+}
+
+
+class EdgeView:
+    """
+    Vista liviana de una arista del CSRGraph (no copia datos).
+
+    Soporta ``edge['distance']`` (como los dicts de Graph) y
+    ``edge.attributes_list()`` (como load_graph.Edge).
+    """
+    __slots__ = ("_graph", "index")
+
+    def __init__(self, graph: "CSRGraph", index: int):
+        self._graph = graph
+        self.index = index
+
+    @property
+    def to(self) -> int:
+        return int(self._graph.targets[self.index])
+
+    def __getitem__(self, name: str) -> float:
+        try:
+            column = self._graph.edge_attrs[name]
+        except KeyError:
+            raise KeyError(name) from None
+        return float(column[self.index])
+
+    def get(self, name: str, default=None):
+        column = self._graph.edge_attrs.get(name)
+        return default if column is None else float(column[self.index])
+
+    def attributes_list(self) -> List[float]:
+        """depth_min, risk_index, wave_size, wind_speed, distance."""
+        return [float(self._graph.edge_attrs[name][self.index]) for name in EDGE_ATTRIBUTES]
+
+    def __repr__(self) -> str:
+        return f"EdgeView(index={self.index}, to={self.to})"
+
+
+class CSRGraph:
+    """
+    Grafo dirigido con ids enteros y almacenamiento en arrays.
+
+    Atributos:
+    - lats, lons: float64 (n,) coordenadas de cada nodo
+    - depths: float32 (n,) profundidad tal como viene en el CSV de nodos
+    - offsets: int64 (n + 1,) inicio de las aristas de cada nodo en ``targets``
+    - targets: int32 (m,) nodo destino de cada arista
+    - edge_attrs: dict nombre -> float32 (m,) con las columnas de EDGE_ATTRIBUTES
+    """
+
+    def __init__(
+        self,
+        lats: np.ndarray,
+        lons: np.ndarray,
+        depths: np.ndarray,
+        offsets: np.ndarray,
+        targets: np.ndarray,
+        edge_attrs: Optional[Dict[str, np.ndarray]] = None,
+        key_decimals: int = 6,
+    ):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.depths = np.asarray(depths, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        n, m = len(self.lats), len(self.targets)
+        if len(self.lons) != n or len(self.depths) != n or len(self.offsets) != n + 1:
+            raise ValueError("Inconsistent node array lengths")
+        if self.offsets[-1] != m:
+            raise ValueError("offsets[-1] must equal the number of edges")
+
+        edge_attrs = dict(edge_attrs or {})
+        self.edge_attrs: Dict[str, np.ndarray] = {}
+        for name, default in EDGE_ATTRIBUTES.items():
+            column = edge_attrs.pop(name, None)
+            if column is None:
+                column = np.full(m, default, dtype=np.float32)
+            self.edge_attrs[name] = np.asarray(column, dtype=np.float32)
+        for name, column in edge_attrs.items():  # columnas extra se conservan
+            self.edge_attrs[name] = np.asarray(column, dtype=np.float32)
+
+        self._dec = key_decimals
+        self.checksum = ""  # checksum de las fuentes cuando viene de un snapshot
+        self.version = 0  # se incrementa con cada modificación en memoria de las aristas
+        self.extra: Dict[str, np.ndarray] = {}  # arrays auxiliares persistidos con el grafo
+        self._index: Optional[Dict[VertexKey, int]] = None
+        # Copias en listas de Python para el bucle caliente de a_star:
+        # slicing de listas es mucho más barato que crear arrays por consulta.
+        # Se crean recién en la primera consulta para que abrir un snapshot
+        # mapeado en memoria no pague la conversión.
+        self._off: Optional[List[int]] = None
+        self._tgt: Optional[List[int]] = None
+        self._roff: Optional[List[int]] = None  # adyacencia inversa (perezosa)
+        self._rsrc: Optional[List[int]] = None
+
+    def _adjacency_lists(self) -> Tuple[List[int], List[int]]:
+        if self._off is None:
+            self._tgt = self.targets.tolist()
+            self._off = self.offsets.tolist()
+        return self._off, self._tgt
+
+    def _reverse_lists(self) -> Tuple[List[int], List[int]]:
+        if self._roff is None:
+            n = self.num_nodes
+            sources = np.repeat(np.arange(n), np.diff(self.offsets))
+            order = np.argsort(self.targets, kind="stable")
+            self._rsrc = sources[order].tolist()
+            roff = np.zeros(n + 1, dtype=np.int64)
+            roff[1:] = np.cumsum(np.bincount(self.targets, minlength=n))
+            self._roff = roff.tolist()
+        return self._roff, self._rsrc
+
+    # ------------------------------------------------------------------ tamaño
+    @property
+    def num_nodes(self) -> int:
+        return len(self.lats)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    # ------------------------------------------------------ índice de claves
+    def _normalize_key(self, vertex: Tuple[float, float]) -> VertexKey:
+        lat, lon = vertex
+        return (round(float(lat), self._dec), round(float(lon), self._dec))
+
+    @property
+    def index(self) -> Dict[VertexKey, int]:
+        """Índice (lat, lon) redondeado -> id de nodo (se construye una sola vez)."""
+        if self._index is None:
+            lats = np.round(self.lats, self._dec).tolist()
+            lons = np.round(self.lons, self._dec).tolist()
+            index: Dict[VertexKey, int] = {}
+            for i, key in enumerate(zip(lats, lons)):
+                index.setdefault(key, i)
+            self._index = index
+        return self._index
+
+    def node_id(self, vertex: Tuple[float, float]) -> Optional[int]:
+        """Id del nodo con esas coordenadas (redondeadas), o None si no existe."""
+        return self.index.get(self._normalize_key(vertex))
+
+    def coord(self, node: int) -> VertexKey:
+        return (float(self.lats[node]), float(self.lons[node]))
+
+    def coords_of(self, nodes: Iterable[int]) -> List[VertexKey]:
+        idx = np.fromiter(nodes, dtype=np.int64)
+        return list(zip(self.lats[idx].tolist(), self.lons[idx].tolist()))
+
+    # ------------------------------------------------ interfaz de graph.Graph
+    def vertex_exists(self, vertex: int) -> bool:
+        return 0 <= vertex < self.num_nodes
+
+    def edge_exists(self, vertex1: int, vertex2: int) -> bool:
+        return self._edge_index(vertex1, vertex2) is not None
+
+    def get_neighbors(self, vertex: int) -> List[int]:
+        off, tgt = self._off, self._tgt
+        if off is None:
+            off, tgt = self._adjacency_lists()
+        return tgt[off[vertex]:off[vertex + 1]]
+
+    def first_edge(self, vertex: int) -> int:
+        """Índice de la primera arista saliente de ``vertex`` (la k-ésima vecina es first_edge + k)."""
+        off = self._off
+        if off is None:
+            off, _ = self._adjacency_lists()
+        return off[vertex]
+
+    def get_predecessors(self, vertex: int) -> List[int]:
+        """Nodos ``u`` con una arista ``u -> vertex`` (para búsquedas hacia atrás)."""
+        roff, rsrc = self._reverse_lists()
+        return rsrc[roff[vertex]:roff[vertex + 1]]
+
+    def get_vertex_depth(self, vertex: int) -> Optional[float]:
+        if not self.vertex_exists(vertex):
+            return None
+        return float(self.depths[vertex])
+
+    def get_edge_data(self, vertex1: int, vertex2: int) -> EdgeView:
+        i = self._edge_index(vertex1, vertex2)
+        if i is None:
+            raise ValueError("The edge does not exist")
+        return EdgeView(self, i)
+
+    def edge(self, index: int) -> EdgeView:
+        return EdgeView(self, index)
+
+    def edge_sources(self) -> np.ndarray:
+        """Nodo origen de cada arista (m,), en el orden de ``targets``."""
+        return np.repeat(np.arange(self.num_nodes), np.diff(self.offsets))
+
+    def edge_midpoints(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (lat, lon) del punto medio de cada arista. La longitud se promedia por
+        el tramo corto (una arista que cruza el antimeridiano tiene su punto
+        medio cerca de ±180, no cerca de 0) y se devuelve en [-180, 180).
+        """
+        sources = self.edge_sources()
+        targets = np.asarray(self.targets)
+        lat = 0.5 * (self.lats[sources] + self.lats[targets])
+        dlon = (self.lons[targets] - self.lons[sources] + 180.0) % 360.0 - 180.0
+        lon = (self.lons[sources] + 0.5 * dlon + 180.0) % 360.0 - 180.0
+        return lat, lon
+
+    def _edge_index(self, vertex1: int, vertex2: int) -> Optional[int]:
+        off, tgt = self._adjacency_lists()
+        try:
+            return tgt.index(vertex2, off[vertex1], off[vertex1 + 1])
+        except (ValueError, IndexError):
+            return None
+
+    def print_graph(self) -> None:
+        for v in range(self.num_nodes):
+            print("Vertex:", v, self.coord(v))
+            print("Depth:", float(self.depths[v]))
+            print("Neighbors:", self.get_neighbors(v))
+            print("")
+
+    # ------------------------------------------------------------ construcción
+    @classmethod
+    def from_edge_list(
+        cls,
+        lats: np.ndarray,
+        lons: np.ndarray,
+        depths: np.ndarray,
+        src: np.ndarray,
+        dst: np.ndarray,
+        edge_attrs: Optional[Dict[str, np.ndarray]] = None,
+        symmetric: bool = False,
+        key_decimals: int = 6,
+    ) -> "CSRGraph":
+        """
+        Construye el CSR a partir de aristas sueltas (src[k] -> dst[k]).
+
+        Si ``symmetric`` es True se agrega también la arista inversa de cada una
+        con los mismos atributos. Las aristas repetidas (mismo origen y destino)
+        se quedan con la última aparición, igual que ``Graph.add_edge``.
+        """
+        n = len(lats)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        attrs = {k: np.asarray(v) for k, v in (edge_attrs or {}).items()}
+        if symmetric:
+            src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+            attrs = {k: np.concatenate([v, v]) for k, v in attrs.items()}
+
+        # Orden estable por (src, dst); de los duplicados queda el último.
+        order = np.lexsort((np.arange(len(src)), dst, src))
+        src, dst = src[order], dst[order]
+        keep = np.ones(len(src), dtype=bool)
+        if len(src):
+            keep[:-1] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst = src[keep], dst[keep]
+        attrs = {k: v[order][keep] for k, v in attrs.items()}
+
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+        return cls(lats, lons, depths, offsets, dst, attrs, key_decimals=key_decimals)
+
+    @classmethod
+    def from_graph(cls, graph, symmetric: bool = False) -> "CSRGraph":
+        """Convierte un graph.Graph (dict de dicts) a CSRGraph."""
+        keys = list(graph._graph.keys())
+        ids = {k: i for i, k in enumerate(keys)}
+        lats = np.array([k[0] for k in keys], dtype=np.float64)
+        lons = np.array([k[1] for k in keys], dtype=np.float64)
+        depths = np.array([graph._graph[k]["depth"] for k in keys], dtype=np.float32)
+        src, dst, attrs = [], [], {name: [] for name in EDGE_ATTRIBUTES}
+        for k, data in graph._graph.items():
+            for nb, edata in data["neighbors"].items():
+                src.append(ids[k])
+                dst.append(ids[nb])
+                edata = edata or {}
+                for name, default in EDGE_ATTRIBUTES.items():
+                    value = edata.get(name)
+                    attrs[name].append(default if value is None else value)
+        attrs = {k: np.array(v, dtype=np.float32) for k, v in attrs.items()}
+        return cls.from_edge_list(lats, lons, depths, src, dst, attrs,
+                                  symmetric=symmetric, key_decimals=graph._dec)
+
+    @classmethod
+    def from_csv(
+        cls,
+        vertex_csv: str,
+        edges_csv: str,
+        skip_header: bool = True,
+        symmetric: bool = False,
+        key_decimals: int = 6,
+    ) -> "CSRGraph":
+        """
+        Carga los mismos CSV que ``Graph.load_data``.
+
+        Nodos: latitud, longitud, profundidad, ...
+        Aristas: lat_origen, lon_origen, lat_destino, lon_destino, distancia_km
+        (opcional) y, si el header las nombra, columnas de EDGE_ATTRIBUTES.
+        Los extremos de arista que no están en el CSV de nodos se agregan con
+        profundidad 0.0, como hace ``Graph.add_edge``. Los archivos se leen por
+        columnas con :mod:`bulk_csv`; las filas sin coordenadas válidas se descartan.
+        """
+        nodes = read_columns(vertex_csv, {"lat": 0, "lon": 1, "depth": 2}, skip_header=skip_header,
+                             required=("lat", "lon"))
+        header = read_header(edges_csv) if skip_header else []
+        # columnas de atributos nombradas en el header (a partir de la 6ta)
+        attr_cols = {name: pos for pos, name in enumerate(header[5:], start=5)
+                     if name in EDGE_ATTRIBUTES and name != "distance"}
+        edges = read_columns(edges_csv, {"lat1": 0, "lon1": 1, "lat2": 2, "lon2": 3, "distance": 4, **attr_cols},
+                             skip_header=skip_header, required=("lat1", "lon1", "lat2", "lon2"))
+
+        # Ids en orden de primera aparición: nodos del CSV y después los
+        # extremos de arista que faltan (origen y destino de cada fila).
+        m = len(edges["lat1"])
+        key_lats = np.round(np.concatenate([nodes["lat"], np.column_stack([edges["lat1"], edges["lat2"]]).ravel()]),
+                            key_decimals)
+        key_lons = np.round(np.concatenate([nodes["lon"], np.column_stack([edges["lon1"], edges["lon2"]]).ravel()]),
+                            key_decimals)
+        keys = np.empty(len(key_lats), dtype=np.complex128)
+        keys.real, keys.imag = key_lats, key_lons
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first, kind="stable")] = np.arange(len(first))
+        ids = rank[inverse.ravel()]
+        order = np.sort(first)
+        n_csv = len(nodes["lat"])
+        depths = np.zeros(len(order), dtype=np.float64)
+        from_csv = order < n_csv
+        depths[from_csv] = np.nan_to_num(nodes["depth"][order[from_csv]], nan=0.0)
+
+        attrs = {name: np.where(np.isnan(edges[name]), EDGE_ATTRIBUTES[name], edges[name]).astype(np.float32)
+                 for name in attr_cols}
+        attrs["distance"] = edges["distance"].astype(np.float32)
+        endpoints = ids[n_csv:].reshape(m, 2)
+        return cls.from_edge_list(
+            key_lats[order], key_lons[order], depths, endpoints[:, 0], endpoints[:, 1],
+            attrs, symmetric=symmetric, key_decimals=key_decimals,
+        )
@@ -0,0 +1,231 @@
+"""
+Subgrafos navegables por clase de calado.
+
+En lugar de preguntar ``min_depth_fn(m, graph) < ship_draft`` por cada vecino
+en cada consulta, se calcula una sola vez la "holgura" de cada arista (la
+menor profundidad de agua que atraviesa) y, contra una lista ordenada de
+calados, la cantidad de clases que la pueden usar (``edge_class``). Una arista
+es navegable para la clase ``i`` si ``edge_class > i``; para un calado
+arbitrario alcanza con ``clearance >= draft``.
+
+:meth:`DraftClasses.view` devuelve un :class:`DraftView`: un CSR con sólo las
+aristas navegables, con la misma interfaz que CSRGraph, así ``a_star`` no
+hace ningún chequeo de profundidad por vecino::
+
+    classes = DraftClasses(graph)
+    g = classes.view("panamax")
+    path = a_star(s, t, g.get_neighbors, cost_fn, h, g)
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from csr_graph import CSRGraph, EdgeView
+
+# Calados de referencia en metros (máximos de cada clase)
+VESSEL_PROFILES: Dict[str, float] = {
+    "pesquero": 6.0,
+    "cabotaje": 9.0,
+    "handysize": 10.5,
+    "panamax": 12.04,
+    "neopanamax": 15.2,
+    "capesize": 18.5,
+}
+
+
+def water_depth(depths: np.ndarray) -> np.ndarray:
+    """
+    Profundidad de agua (m, positiva) de cada nodo a partir de su elevación.
+
+    Los puertos (profundidad 0, como los agrega el builder) no restringen:
+    devuelven ``inf``, igual que nodos sin dato.
+    """
+    depths = np.asarray(depths, dtype=np.float64)
+    return np.where(depths < 0, -depths, np.inf)
+
+
+def edge_clearance(graph: CSRGraph) -> np.ndarray:
+    """
+    Profundidad mínima de agua a lo largo de cada arista: ``depth_min`` si el
+    CSV la trae, y en todo caso no más que la del nodo destino.
+    """
+    depth_min = graph.edge_attrs["depth_min"].astype(np.float64)
+    along = np.where(np.isfinite(depth_min), depth_min, np.inf)
+    return np.minimum(along, water_depth(graph.depths)[graph.targets])
+
+
+class DraftView:
+    """
+    Subgrafo de un CSRGraph con sólo las aristas navegables para un calado.
+
+    Los ids de nodo son los del grafo base; las aristas conservan su índice
+    original (``edge_ids``), así las vistas de arista y los costos de
+    ``cost_model`` siguen siendo los del grafo base. El resto de los atributos
+    (``lats``, ``node_id``, ``coords_of``, ...) se delegan al grafo base.
+    """
+
+    def __init__(self, base: CSRGraph, mask: np.ndarray, draft: float):
+        self.base = base
+        self.draft = draft
+        self.edge_ids = np.flatnonzero(mask)
+        sources = np.repeat(np.arange(base.num_nodes), np.diff(base.offsets))
+        offsets = np.zeros(base.num_nodes + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(sources[self.edge_ids], minlength=base.num_nodes))
+        self.offsets = offsets
+        self.targets = base.targets[self.edge_ids]
+        self._off: Optional[List[int]] = None
+        self._tgt: Optional[List[int]] = None
+        self._ids: Optional[List[int]] = None
+        self._reverse: Optional[Tuple[List[int], List[int]]] = None
+        self._tables: List[Tuple[object, List[float]]] = []
+
+    def __getattr__(self, name: str):
+        return getattr(self.base, name)
+
+    def _adjacency_lists(self) -> Tuple[List[int], List[int]]:
+        if self._off is None:
+            self._tgt = self.targets.tolist()
+            self._ids = self.edge_ids.tolist()
+            self._off = self.offsets.tolist()
+        return self._off, self._tgt
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_ids)
+
+    def get_neighbors(self, vertex: int) -> List[int]:
+        off, tgt = self._off, self._tgt
+        if off is None:
+            off, tgt = self._adjacency_lists()
+        return tgt[off[vertex]:off[vertex + 1]]
+
+    def first_edge(self, vertex: int) -> int:
+        off = self._off
+        if off is None:
+            off, _ = self._adjacency_lists()
+        return off[vertex]
+
+    def edge_costs(self, cost_fn) -> List[float]:
+        """``cost_fn.table`` (indexada por arista del grafo base) reindexada a esta vista."""
+        for fn, table in self._tables:
+            if fn is cost_fn:
+                return table
+        table = np.asarray(cost_fn.values)[self.edge_ids].tolist()
+        self._tables = [(cost_fn, table)] + self._tables[:3]
+        return table
+
+    def _edge_index(self, vertex1: int, vertex2: int) -> Optional[int]:
+        off, tgt = self._adjacency_lists()
+        try:
+            return self._ids[tgt.index(vertex2, off[vertex1], off[vertex1 + 1])]
+        except (ValueError, IndexError):
+            return None
+
+    def edge_exists(self, vertex1: int, vertex2: int) -> bool:
+        return self._edge_index(vertex1, vertex2) is not None
+
+    def get_edge_data(self, vertex1: int, vertex2: int) -> EdgeView:
+        i = self._edge_index(vertex1, vertex2)
+        if i is None:
+            raise ValueError("The edge does not exist")
+        return EdgeView(self.base, i)
+
+    def get_predecessors(self, vertex: int) -> List[int]:
+        if self._reverse is None:
+            sources = np.repeat(np.arange(self.base.num_nodes), np.diff(self.offsets))
+            order = np.argsort(self.targets, kind="stable")
+            roff = np.zeros(self.base.num_nodes + 1, dtype=np.int64)
+            roff[1:] = np.cumsum(np.bincount(self.targets, minlength=self.base.num_nodes))
+            self._reverse = (roff.tolist(), sources[order].tolist())
+        roff, rsrc = self._reverse
+        return rsrc[roff[vertex]:roff[vertex + 1]]
+
+
+class DraftClasses:
+    """
+    Holgura por arista y clases de calado de un CSRGraph.
+
+    ``drafts`` son los calados de las clases (se ordenan); ``edge_class[e]``
+    es cuántas de ellas pueden usar la arista ``e``. Las vistas se construyen
+    al pedirlas y quedan cacheadas por calado.
+    """
+
+    def __init__(self, graph: CSRGraph, drafts: Optional[Iterable[float]] = None):
+        self.graph = graph
+        self.drafts = np.sort(np.asarray(list(VESSEL_PROFILES.values()) if drafts is None
+                                         else list(drafts), dtype=np.float64))
+        self.clearance = edge_clearance(graph)
+        self.edge_class = np.searchsorted(self.drafts, self.clearance, side="right").astype(np.uint8)
+        self._views: Dict[float, DraftView] = {}
+
+    @staticmethod
+    def resolve(profile: Union[str, float]) -> float:
+        """Calado en metros para un nombre de ``VESSEL_PROFILES`` o un número."""
+        if isinstance(profile, str):
+            try:
+                return VESSEL_PROFILES[profile]
+            except KeyError:
+                raise ValueError(f"Unknown vessel profile: {profile}") from None
+        return float(profile)
+
+    def edge_mask(self, draft: Union[str, float]) -> np.ndarray:
+        draft = self.resolve(draft)
+        i = int(np.searchsorted(self.drafts, draft))
+        if i < len(self.drafts) and self.drafts[i] == draft:
+            return self.edge_class > i
+        return self.clearance >= draft
+
+    def node_mask(self, draft: Union[str, float]) -> np.ndarray:
+        return water_depth(self.graph.depths) >= self.resolve(draft)
+
+    def refresh(self, report) -> bool:
+        """
+        Recalcula la holgura de las aristas de un ``edge_updates.UpdateReport``.
+        Si alguna cambió se descartan las vistas (se rearman al pedirlas).
+        """
+        ids = report.edge_ids
+        if len(ids) == 0 or "depth_min" not in report.attributes:
+            return False
+        g = self.graph
+        depth_min = g.edge_attrs["depth_min"][ids].astype(np.float64)
+        along = np.where(np.isfinite(depth_min), depth_min, np.inf)
+        clearance = np.minimum(along, water_depth(g.depths[g.targets[ids]]))
+        edge_class = np.searchsorted(self.drafts, clearance, side="right").astype(np.uint8)
+        # las vistas de calados que no son de clase usan la holgura directamente
+        changed = not np.array_equal(clearance, self.clearance[ids])
+        self.clearance[ids] = clearance
+        self.edge_class[ids] = edge_class
+        if changed:
+            self._views = {}
+        return changed
+
+    def only_restricted(self, report) -> bool:
+        """
+        Si la actualización de ``report`` no agrandó la holgura de ninguna
+        arista (``depth_min`` de antes en ``report.previous``): ningún calado
+        ganó aristas, así que ninguna ruta con calado pudo abaratarse.
+        """
+        ids = report.edge_ids
+        if len(ids) == 0 or "depth_min" not in report.attributes:
+            return True
+        node_water = water_depth(self.graph.depths[self.graph.targets[ids]])
+
+        def clearance(depth_min: np.ndarray) -> np.ndarray:
+            depth_min = np.asarray(depth_min, dtype=np.float64)
+            return np.minimum(np.where(np.isfinite(depth_min), depth_min, np.inf), node_water)
+
+        before = clearance(report.previous["depth_min"])
+        after = clearance(self.graph.edge_attrs["depth_min"][ids])
+        return bool(np.all(after <= before))
+
+    def view(self, draft: Union[str, float, None]) -> Union[CSRGraph, DraftView]:
+        """Subgrafo navegable para ``draft`` (sin calado: el grafo completo)."""
+        if draft is None:
+            return self.graph
+        draft = self.resolve(draft)
+        view = self._views.get(draft)
+        if view is None:
+            view = self._views[draft] = DraftView(self.graph, self.edge_mask(draft), draft)
+        return view
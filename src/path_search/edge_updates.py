@@ -0,0 +1,166 @@
+"""
+Actualización incremental de atributos de aristas, sin recargar el grafo.
+
+Cuando llega un feed nuevo de clima/riesgo no hace falta reconstruir el grafo
+desde los CSV: :func:`apply_updates` escribe los valores en las columnas de
+``graph.edge_attrs`` (en el lugar; con un snapshot abierto en modo ``'c'`` la
+escritura queda en memoria, copy-on-write, sin tocar el archivo), incrementa
+``graph.version`` y devuelve un :class:`UpdateReport` con lo tocado:
+
+- ``edge_ids``: aristas modificadas (índices de ``targets``);
+- ``bbox``: rectángulo (lat_min, lon_min, lat_max, lon_max) que las contiene,
+  con ``lon_min > lon_max`` si cruza el antimeridiano (como ``EdgeUpdate.bbox``);
+- ``previous``: los valores anteriores de cada atributo tocado en ``edge_ids``.
+
+Si una función de costo no abarata ninguna arista tocada, las cotas
+inferiores precalculadas para ella (ALT, heurísticas calibradas) siguen
+siendo admisibles y una ruta cacheada que no usa aristas tocadas sigue siendo
+óptima. Eso depende de los pesos de cada objetivo (con ``wind_factor``
+negativo, más viento abarata), así que no se decide acá por la dirección del
+atributo: ``CostModel.only_increased`` compara los costos antes y después y
+``DraftClasses.only_restricted`` la holgura.
+
+Cada componente sabe invalidarse a partir del reporte
+(``CostModel.refresh``, ``DraftClasses.refresh``, ``RouteCache.apply_update``).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+BBox = Tuple[float, float, float, float]  # lat_min, lon_min, lat_max, lon_max
+
+
+@dataclass
+class EdgeUpdate:
+    """
+    Un cambio: ``attribute = value`` en las aristas elegidas por ``edges``
+    (índices), ``pairs`` ((u, v) de ids de nodo) y/o ``bbox`` (aristas cuyo
+    punto medio cae en el rectángulo; con ``lon_min > lon_max`` el rectángulo
+    cruza el antimeridiano).
+    """
+    attribute: str
+    value: float
+    edges: Sequence[int] = ()
+    pairs: Sequence[Tuple[int, int]] = ()
+    bbox: Optional[BBox] = None
+
+
+@dataclass
+class UpdateReport:
+    version: int
+    edge_ids: np.ndarray
+    attributes: FrozenSet[str]
+    bbox: Optional[BBox]
+    previous: Dict[str, np.ndarray] = field(default_factory=dict)  # atributo -> valores en edge_ids
+    _pairs: Optional[Set[Tuple[int, int]]] = field(default=None, repr=False)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.edge_ids) == 0
+
+    def edge_pairs(self, graph: CSRGraph) -> Set[Tuple[int, int]]:
+        """Conjunto de (u, v) de las aristas tocadas (para revisar caminos cacheados)."""
+        if self._pairs is None:
+            sources = np.searchsorted(graph.offsets, self.edge_ids, side="right") - 1
+            self._pairs = set(zip(sources.tolist(), np.asarray(graph.targets)[self.edge_ids].tolist()))
+        return self._pairs
+
+    def touches_path(self, graph: CSRGraph, path: Iterable[int]) -> bool:
+        pairs = self.edge_pairs(graph)
+        path = list(path)
+        return any((u, v) in pairs for u, v in zip(path, path[1:]))
+
+
+def select_edges(graph: CSRGraph, update: EdgeUpdate,
+                 midpoints: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> np.ndarray:
+    """Índices de arista que elige ``update`` (sin repetidos, ordenados)."""
+    chosen: List[np.ndarray] = [np.asarray(update.edges, dtype=np.int64)]
+    for u, v in update.pairs:
+        i = graph._edge_index(int(u), int(v))
+        if i is None:
+            raise ValueError(f"The edge ({u}, {v}) does not exist")
+        chosen.append(np.array([i], dtype=np.int64))
+    if update.bbox is not None:
+        lat_min, lon_min, lat_max, lon_max = update.bbox
+        lat, lon = midpoints if midpoints is not None else graph.edge_midpoints()
+        if not (-180.0 <= lon_min <= 180.0 and -180.0 <= lon_max <= 180.0):
+            # p.ej. (170, 190) -> (170, -170): cruza el antimeridiano
+            lon_min, lon_max = (lon_min + 180.0) % 360.0 - 180.0, (lon_max + 180.0) % 360.0 - 180.0
+        in_lon = ((lon >= lon_min) & (lon <= lon_max) if lon_min <= lon_max
+                  else (lon >= lon_min) | (lon <= lon_max))
+        if lon_max >= 180.0:
+            in_lon |= lon == -180.0  # los puntos medios vienen en [-180, 180)
+        inside = (lat >= lat_min) & (lat <= lat_max) & in_lon
+        chosen.append(np.flatnonzero(inside))
+    ids = np.unique(np.concatenate(chosen))
+    if len(ids) and (ids[0] < 0 or ids[-1] >= graph.num_edges):
+        raise ValueError("Edge index out of range")
+    return ids
+
+
+def lon_interval(lons: np.ndarray) -> Tuple[float, float]:
+    """
+    Intervalo de longitud más corto que contiene a ``lons``: se deja afuera el
+    hueco más grande entre longitudes consecutivas del círculo. Si ese hueco
+    no es el que pasa por ±180, el intervalo cruza el antimeridiano y se
+    devuelve con ``lon_min > lon_max``.
+    """
+    lons = np.unique((np.asarray(lons, dtype=np.float64) + 180.0) % 360.0 - 180.0)
+    gaps = np.diff(np.append(lons, lons[0] + 360.0))
+    widest = int(np.argmax(gaps))
+    if widest == len(lons) - 1:
+        return float(lons[0]), float(lons[-1])
+    return float(lons[widest + 1]), float(lons[widest])
+
+
+def _writable_column(graph: CSRGraph, name: str) -> np.ndarray:
+    column = graph.edge_attrs.get(name)
+    if column is None:
+        raise ValueError(f"Unknown edge attribute: {name}")
+    if not column.flags.writeable:
+        # snapshot abierto en modo 'r': se pasa a una copia privada (una sola vez)
+        column = graph.edge_attrs[name] = np.array(column)
+    return column
+
+
+def apply_updates(graph: CSRGraph, updates: Sequence[EdgeUpdate]) -> UpdateReport:
+    """
+    Aplica los cambios en orden sobre ``graph.edge_attrs`` y devuelve el reporte.
+
+    Todo el lote se valida antes de escribir (aristas, atributo y valor): si
+    un cambio es inválido se lanza ``ValueError`` y el grafo queda intacto.
+    Las búsquedas que corren en paralelo pueden ver el lote a medio aplicar;
+    el caché de rutas no mezcla resultados porque la clave lleva la versión.
+    """
+    midpoints = graph.edge_midpoints() if any(u.bbox is not None for u in updates) else None
+    planned: List[Tuple[EdgeUpdate, np.ndarray, np.float32]] = []
+    for update in updates:
+        if update.attribute not in graph.edge_attrs:
+            raise ValueError(f"Unknown edge attribute: {update.attribute}")
+        value = float(update.value)
+        if not np.isfinite(value):
+            raise ValueError(f"Value for {update.attribute} must be finite, got {update.value!r}")
+        ids = select_edges(graph, update, midpoints)
+        if len(ids):
+            planned.append((update, ids, np.float32(value)))
+
+    edge_ids = (np.unique(np.concatenate([ids for _, ids, _ in planned])) if planned
+                else np.zeros(0, dtype=np.int64))
+    attributes = frozenset(update.attribute for update, _, _ in planned)
+    previous = {name: np.array(graph.edge_attrs[name][edge_ids]) for name in attributes}
+    for update, ids, new in planned:
+        _writable_column(graph, update.attribute)[ids] = new
+
+    bbox = None
+    if len(edge_ids):
+        sources = np.searchsorted(graph.offsets, edge_ids, side="right") - 1
+        nodes = np.concatenate((sources, np.asarray(graph.targets)[edge_ids]))
+        lon_min, lon_max = lon_interval(graph.lons[nodes])
+        bbox = (float(graph.lats[nodes].min()), lon_min, float(graph.lats[nodes].max()), lon_max)
+        graph.version += 1
+    return UpdateReport(graph.version, edge_ids, attributes, bbox, previous)
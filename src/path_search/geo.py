@@ -0,0 +1,21 @@
+"""
+Geometría de la esfera que comparten la búsqueda y el builder.
+
+Un solo radio terrestre y una sola conversión a vectores unitarios 3D: las
+distancias de las aristas (``src/df/edges.py``), las cotas de gran círculo
+(``heuristicas_geo``) y el snapping (``snapping``) usan la misma esfera.
+Sólo depende de NumPy.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088  # radio medio (IUGG)
+
+
+def unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """(n, 3) vectores unitarios para latitudes/longitudes en grados."""
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
@@ -1,5 +1,9 @@
 from typing import Optional, Any, Dict, Tuple, List
-import csv
+import math
+
+import numpy as np
+
+from bulk_csv import read_columns
 
 VertexKey = Tuple[float, float]
 
@@ -18,7 +22,7 @@ class Graph:
     def add_vertex(self, vertex: Tuple[float, float], depth: float) -> None:
         v = self._normalize_key(vertex)
         if v not in self._graph:
-            self._graph[v] = {'depth': float(depth), 'neighbors': {}}
+            self._graph[v] = {'depth': float(depth), 'neighbors': {}, 'predecessors': {}}
 
     def add_edge(self, vertex1: Tuple[float, float], vertex2: Tuple[float, float], data: Optional[Any]=None) -> None:
         v1 = self._normalize_key(vertex1)
@@ -28,11 +32,16 @@ class Graph:
         if v2 not in self._graph:
             self.add_vertex(v2, 0.0)
         self._graph[v1]['neighbors'][v2] = data
+        self._graph[v2]['predecessors'][v1] = None  # adyacencia inversa, para búsquedas hacia atrás
 
     def get_neighbors(self, vertex: Tuple[float, float]) -> List[VertexKey]:
         v = self._normalize_key(vertex)
         return list(self._graph.get(v, {}).get('neighbors', {}).keys())
 
+    def get_predecessors(self, vertex: Tuple[float, float]) -> List[VertexKey]:
+        v = self._normalize_key(vertex)
+        return list(self._graph.get(v, {}).get('predecessors', {}).keys())
+
     def get_vertex_depth(self, vertex: Tuple[float, float]) -> Optional[float]:
         v = self._normalize_key(vertex)
         return self._graph.get(v, {}).get('depth')
@@ -61,35 +70,17 @@ class Graph:
         return v1 in self._graph and v2 in self._graph[v1]['neighbors']
 
     def load_data(self, vertex_csv: str, edges_csv: str, skip_header: bool = True) -> None:
+        # Los CSV se parsean por columnas completas (bulk_csv); acá sólo se arma el dict.
         # Nodos: columnas esperadas -> latitud, longitud, profundidad, ...
-        with open(vertex_csv, newline='', encoding='utf-8') as vf:
-            reader = csv.reader(vf)
-            if skip_header:
-                next(reader, None)
-            for row in reader:
-                if not row or len(row) < 3:
-                    continue
-                try:
-                    lat = float(row[0])
-                    lon = float(row[1])
-                    depth = float(row[2]) if row[2] != "" else 0.0
-                except ValueError:
-                    # si la fila es inválida o es header residual, la salto
-                    continue
-                self.add_vertex((lat, lon), depth)
+        nodes = read_columns(vertex_csv, {'lat': 0, 'lon': 1, 'depth': 2}, skip_header=skip_header,
+                             required=('lat', 'lon'))
+        depths = np.nan_to_num(nodes['depth'], nan=0.0)
+        for lat, lon, depth in zip(nodes['lat'].tolist(), nodes['lon'].tolist(), depths.tolist()):
+            self.add_vertex((lat, lon), depth)
 
         # Aristas: columnas esperadas -> lat_origen, lon_origen, lat_destino, lon_destino, distancia_km (opcional)
-        with open(edges_csv, newline='', encoding='utf-8') as ef:
-            reader = csv.reader(ef)
-            if skip_header:
-                next(reader, None)
-            for row in reader:
-                if not row or len(row) < 4:
-                    continue
-                try:
-                    lat1 = float(row[0]); lon1 = float(row[1])
-                    lat2 = float(row[2]); lon2 = float(row[3])
-                    dist = float(row[4]) if len(row) > 4 and row[4] != "" else None
-                except ValueError:
-                    continue
-                self.add_edge((lat1, lon1), (lat2, lon2), {'distance': dist})
+        edges = read_columns(edges_csv, {'lat1': 0, 'lon1': 1, 'lat2': 2, 'lon2': 3, 'dist': 4},
+                             skip_header=skip_header, required=('lat1', 'lon1', 'lat2', 'lon2'))
+        columns = [edges[name].tolist() for name in ('lat1', 'lon1', 'lat2', 'lon2', 'dist')]
+        for lat1, lon1, lat2, lon2, dist in zip(*columns):
+            self.add_edge((lat1, lon1), (lat2, lon2), {'distance': None if math.isnan(dist) else dist})
@@ -0,0 +1,139 @@
+"""
+Heurísticas geográficas admisibles para A* sobre CSRGraph.
+
+A diferencia de ``heurísticas.py`` (pasos Manhattan sobre una grilla), estas
+cotas usan la distancia de gran círculo entre las coordenadas (lat, lon) de
+los nodos. Los vectores unitarios 3D de todos los nodos se calculan una sola
+vez; cada evaluación es una distancia de cuerda + ``asin``.
+
+Todas las cotas son ``rate * distancia_gran_circulo`` con un ``rate`` (costo
+mínimo por km) distinto según el objetivo, por lo que son consistentes además
+de admisibles:
+
+- distancia: 1
+- tiempo: 1 / v_max
+- combustible: mínimo por km de ``cost_fuel`` sobre las aristas del grafo
+- seguridad: mínimo de ``cost_safe`` por arista / largo máximo de arista
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from geo import EARTH_RADIUS_KM, unit_vectors
+
+
+def _edge_sources(graph: CSRGraph) -> np.ndarray:
+    return np.repeat(np.arange(graph.num_nodes), np.diff(graph.offsets))
+
+
+class GeoHeuristic:
+    """
+    h(n, goal) = rate_per_km * distancia de gran círculo (km) entre n y goal.
+
+    ``scale`` corrige la distancia esférica para que nunca supere el largo
+    declarado de las aristas (p.ej. si las distancias del CSV vienen de un
+    geodésico elipsoidal o de otra esfera). Por defecto se calibra con el
+    grafo: ``min(distance / gran_circulo)`` sobre sus aristas, acotado a 1.
+    """
+
+    def __init__(self, graph: CSRGraph, rate_per_km: float = 1.0, scale: Optional[float] = None):
+        self.graph = graph
+        self.rate_per_km = max(0.0, float(rate_per_km))
+        self.xyz = unit_vectors(graph.lats, graph.lons)
+        if scale is None:
+            scale = self.calibrate_scale(graph, self.xyz)
+        self.scale = scale
+        self._k = 2.0 * EARTH_RADIUS_KM * scale * self.rate_per_km
+        # listas de Python para la versión escalar (más rápida que indexar NumPy)
+        self._x, self._y, self._z = (self.xyz[:, i].tolist() for i in range(3))
+
+    # ------------------------------------------------------------ calibración
+    @staticmethod
+    def calibrate_scale(graph: CSRGraph, xyz: Optional[np.ndarray] = None) -> float:
+        if xyz is None:
+            xyz = unit_vectors(graph.lats, graph.lons)
+        dist = graph.edge_attrs["distance"].astype(np.float64)
+        src = _edge_sources(graph)
+        chord = np.linalg.norm(xyz[src] - xyz[graph.targets], axis=1)
+        gc = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+        valid = np.isfinite(dist) & (gc > 1e-9)
+        if not valid.any():
+            return 1.0
+        return float(min(1.0, np.min(dist[valid] / gc[valid])))
+
+    @staticmethod
+    def max_edge_km(graph: CSRGraph) -> float:
+        dist = graph.edge_attrs["distance"]
+        dist = dist[np.isfinite(dist)]
+        return float(dist.max()) if len(dist) else math.inf
+
+    # -------------------------------------------------------------- fábricas
+    @classmethod
+    def for_distance(cls, graph: CSRGraph, **kw) -> "GeoHeuristic":
+        return cls(graph, 1.0, **kw)
+
+    @classmethod
+    def for_time(cls, graph: CSRGraph, v_max: float, **kw) -> "GeoHeuristic":
+        """Tiempo mínimo yendo en línea recta a ``v_max`` (en km por unidad de tiempo)."""
+        return cls(graph, 1.0 / max(1e-9, v_max), **kw)
+
+    @classmethod
+    def fuel_rate(cls, graph: CSRGraph, w_wind: float = 1.0, w_waves: float = 1.0) -> float:
+        """Mínimo por km de ``cost_fuel`` = (1 + w_wind) * viento + w_waves * olas."""
+        a = graph.edge_attrs
+        per_km = (1.0 + w_wind) * a["wind_speed"] + w_waves * a["wave_size"]
+        return float(max(0.0, per_km.min())) if len(per_km) else 0.0
+
+    @classmethod
+    def safe_rate(cls, graph: CSRGraph, w_risk: float = 1.0, w_wind: float = 1.0,
+                  w_waves: float = 1.0) -> float:
+        """
+        ``cost_safe`` no depende del largo: cada arista cuesta al menos el mínimo
+        y cubre a lo sumo ``max_edge_km``, así que min / max_edge_km es una cota por km.
+        """
+        a = graph.edge_attrs
+        per_edge = w_risk * a["risk_index"] + w_wind * a["wind_speed"] + w_waves * a["wave_size"]
+        if not len(per_edge):
+            return 0.0
+        return float(max(0.0, per_edge.min())) / cls.max_edge_km(graph)
+
+    @classmethod
+    def for_fuel(cls, graph: CSRGraph, w_wind: float = 1.0, w_waves: float = 1.0, **kw) -> "GeoHeuristic":
+        return cls(graph, cls.fuel_rate(graph, w_wind, w_waves), **kw)
+
+    @classmethod
+    def for_safe(cls, graph: CSRGraph, w_risk: float = 1.0, w_wind: float = 1.0,
+                 w_waves: float = 1.0, **kw) -> "GeoHeuristic":
+        return cls(graph, cls.safe_rate(graph, w_risk, w_wind, w_waves), **kw)
+
+    @classmethod
+    def for_combined(cls, graph: CSRGraph, v_max: float, w_fuel: float = 1.0,
+                     w_time: float = 1.0, w_safe: float = 1.0, **kw) -> "GeoHeuristic":
+        """Cota de ``combined_cost``: suma ponderada de las tres tasas."""
+        rate = (w_time / max(1e-9, v_max)
+                + w_fuel * cls.fuel_rate(graph)
+                + w_safe * cls.safe_rate(graph))
+        return cls(graph, rate, **kw)
+
+    # ------------------------------------------------------------- evaluación
+    def __call__(self, n: int, goal: int) -> float:
+        dx = self._x[n] - self._x[goal]
+        dy = self._y[n] - self._y[goal]
+        dz = self._z[n] - self._z[goal]
+        half_chord = 0.5 * math.sqrt(dx * dx + dy * dy + dz * dz)
+        return self._k * math.asin(min(1.0, half_chord))
+
+    def many(self, nodes: Sequence[int], goal: int) -> np.ndarray:
+        """Cotas para varios nodos a la vez (p.ej. todos los vecinos de un nodo)."""
+        d = self.xyz[np.asarray(nodes, dtype=np.int64)] - self.xyz[goal]
+        half_chord = 0.5 * np.sqrt(np.einsum("ij,ij->i", d, d))
+        return self._k * np.arcsin(np.minimum(1.0, half_chord))
+
+    def distance_km(self, nodes: Iterable[int], goal: int) -> np.ndarray:
+        """Distancia de gran círculo (sin ``rate`` ni ``scale``) en km."""
+        d = self.xyz[np.fromiter(nodes, dtype=np.int64)] - self.xyz[goal]
+        return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, 0.5 * np.linalg.norm(d, axis=1)))
@@ -0,0 +1,300 @@
+"""
+ALT (A*, Landmarks, desigualdad Triangular) para ajustar las cotas de A*.
+
+Preprocesamiento (una vez por grafo y por función de costo):
+
+1. se eligen ``k`` landmarks (farthest-point, opcionalmente restringido a puertos);
+2. desde cada landmark se corre Dijkstra hacia adelante (d(L, v)) y sobre el
+   grafo traspuesto (d(v, L)), con ``scipy.sparse.csgraph``;
+3. las tablas se guardan como float32 (n, k) en ``<snapshot>.alt-<nombre>.npz``,
+   junto con el checksum del grafo y un digest de los pesos: sólo se
+   reutilizan para el mismo grafo y la misma función de costo.
+
+En la búsqueda, para cualquier landmark L::
+
+    d(v, t) >= d(L, t) - d(L, v)        y        d(v, t) >= d(v, L) - d(t, L)
+
+y :class:`ALTHeuristic` toma el máximo sobre todos los landmarks (y, si se
+le pasa, sobre otra heurística admisible como la de gran círculo). A
+diferencia de la distancia en línea recta, estas cotas "ven" las costas que
+obligan a rodear. ``ALTHeuristic`` no guarda estado por consulta (se puede
+compartir entre hilos); ``for_goal(goal)`` devuelve una heurística ligada a
+un destino que evita releer sus filas en cada llamada.
+
+Benchmark desde consola (nodos expandidos por A* con y sin ALT)::
+
+    python landmarks.py ../data/region_nodes.csv [...] --landmarks 16 --queries 50
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from contraction import weights_digest
+from csr_graph import CSRGraph
+
+PathLike = Union[str, Path]
+
+# Sentinela finito para "inalcanzable": BIG - BIG = 0 (sin información) y
+# BIG - d = enorme (el destino es inalcanzable desde v, se poda).
+UNREACHABLE = np.float32(1e30)
+# float32 redondea cada distancia guardada hasta eps/2 * |d|; una cota es la
+# resta de dos de ellas (y se redondea otra vez), así que su error absoluto
+# llega a ~1.5 * eps * max|d| aunque la cota sea chica. Se descuenta
+# ROUNDING_MARGIN * eps * max|d| para no sobrestimar.
+ROUNDING_MARGIN = 2.0
+
+
+def weight_matrix(graph: CSRGraph, weights: Optional[np.ndarray] = None) -> csr_matrix:
+    """Matriz dispersa (n, n) del grafo; por defecto pesa con la columna ``distance``."""
+    w = graph.edge_attrs["distance"] if weights is None else weights
+    w = np.asarray(w, dtype=np.float64)
+    if np.any(~np.isfinite(w)) or np.any(w < 0):
+        raise ValueError("Edge weights must be finite and non-negative")
+    n = graph.num_nodes
+    return csr_matrix((w, np.asarray(graph.targets), np.asarray(graph.offsets)), shape=(n, n))
+
+
+def select_landmarks(matrix: csr_matrix, k: int, candidates: Optional[Sequence[int]] = None,
+                     seed: int = 0) -> np.ndarray:
+    """
+    Selección farthest-point: cada nuevo landmark es el candidato más lejano
+    (en el grafo, tratando aristas como no dirigidas) de los ya elegidos.
+    Los nodos de componentes no alcanzadas cuentan como infinitamente lejanos,
+    así cada componente grande recibe su landmark.
+    """
+    n = matrix.shape[0]
+    pool = np.arange(n) if candidates is None else np.unique(np.asarray(candidates, dtype=np.int64))
+    if len(pool) == 0:
+        raise ValueError("No landmark candidates")
+    k = min(k, len(pool))
+    rng = np.random.default_rng(seed)
+    # arrancar desde el candidato más lejano a uno aleatorio
+    first = pool[rng.integers(len(pool))]
+    nearest = dijkstra(matrix, directed=False, indices=[first])[0][pool]
+    chosen: List[int] = []
+    for _ in range(k):
+        nearest_f = nearest.copy()
+        nearest_f[np.isin(pool, chosen)] = -1.0
+        pick = int(pool[int(np.argmax(nearest_f))])
+        chosen.append(pick)
+        nearest = np.minimum(nearest, dijkstra(matrix, directed=False, indices=[pick])[0][pool])
+    return np.array(chosen, dtype=np.int64)
+
+
+class LandmarkTables:
+    """Distancias desde/hacia cada landmark como float32 (n, k)."""
+
+    def __init__(self, landmarks: np.ndarray, from_landmark: np.ndarray,
+                 to_landmark: np.ndarray, checksum: str = "", weights_digest: str = ""):
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        self.from_landmark = np.asarray(from_landmark, dtype=np.float32)  # d(L, v)
+        self.to_landmark = np.asarray(to_landmark, dtype=np.float32)      # d(v, L)
+        self.checksum = checksum
+        self.weights_digest = weights_digest
+        finite = [d[d < UNREACHABLE] for d in (self.from_landmark, self.to_landmark)]
+        largest = max((float(d.max()) for d in finite if d.size), default=0.0)
+        # margen absoluto que se resta a cada cota (ver ROUNDING_MARGIN)
+        self.margin = ROUNDING_MARGIN * float(np.finfo(np.float32).eps) * largest
+
+    @classmethod
+    def build(cls, graph: CSRGraph, k: int = 16, weights: Optional[np.ndarray] = None,
+              method: str = "farthest", seed: int = 0) -> "LandmarkTables":
+        """
+        ``method='farthest'`` elige entre todos los nodos; ``method='ports'``
+        sólo entre los puertos (nodos con profundidad 0, como los agrega el builder).
+        """
+        matrix = weight_matrix(graph, weights)
+        digest = weights_digest(graph.edge_attrs["distance"] if weights is None else weights)
+        candidates = None
+        if method == "ports":
+            candidates = np.flatnonzero(np.asarray(graph.depths) == 0)
+        elif method != "farthest":
+            raise ValueError(f"Unknown landmark selection method: {method}")
+        landmarks = select_landmarks(matrix, k, candidates, seed=seed)
+        forward = dijkstra(matrix, directed=True, indices=landmarks)
+        backward = dijkstra(matrix.T.tocsr(), directed=True, indices=landmarks)
+
+        def compact(d: np.ndarray) -> np.ndarray:
+            d = d.T.astype(np.float32)  # (n, k): las k cotas de un nodo quedan contiguas
+            d[~np.isfinite(d)] = UNREACHABLE
+            return np.ascontiguousarray(d)
+
+        return cls(landmarks, compact(forward), compact(backward), checksum=graph.checksum,
+                   weights_digest=digest)
+
+    def save(self, path: PathLike) -> None:
+        np.savez(path, landmarks=self.landmarks, from_landmark=self.from_landmark,
+                 to_landmark=self.to_landmark, checksum=np.array(self.checksum),
+                 weights_digest=np.array(self.weights_digest))
+
+    @classmethod
+    def load(cls, path: PathLike) -> "LandmarkTables":
+        with np.load(path) as z:
+            digest = str(z["weights_digest"]) if "weights_digest" in z.files else ""
+            return cls(z["landmarks"], z["from_landmark"], z["to_landmark"], str(z["checksum"]),
+                       weights_digest=digest)
+
+
+def landmarks_path(snapshot_path: PathLike, name: str = "distance") -> Path:
+    snapshot_path = Path(snapshot_path)
+    return snapshot_path.with_name(f"{snapshot_path.stem}.alt-{name}.npz")
+
+
+def load_or_build_landmarks(graph: CSRGraph, path: PathLike, k: int = 16,
+                            weights: Optional[np.ndarray] = None,
+                            method: str = "farthest") -> LandmarkTables:
+    """
+    Reutiliza las tablas guardadas si corresponden al mismo grafo (checksum
+    no vacío: un grafo armado directo del CSV no tiene) y a los mismos pesos.
+    """
+    path = Path(path)
+    if path.exists() and graph.checksum:
+        tables = LandmarkTables.load(path)
+        digest = weights_digest(graph.edge_attrs["distance"] if weights is None else weights)
+        if (tables.checksum == graph.checksum and tables.weights_digest == digest
+                and len(tables.landmarks) == min(k, graph.num_nodes)
+                and tables.from_landmark.shape[0] == graph.num_nodes):
+            return tables
+    tables = LandmarkTables.build(graph, k, weights, method)
+    tables.save(path)
+    return tables
+
+
+class ALTHeuristic:
+    """
+    h(v, goal) = max_L max(d(L, goal) - d(L, v), d(v, L) - d(goal, L)).
+
+    ``fallback`` (opcional) es otra heurística admisible h(v, goal); se usa el
+    máximo de ambas. Las tablas deben haberse calculado con los mismos pesos
+    que usa ``cost_fn`` en la búsqueda. No guarda estado por consulta.
+    """
+
+    def __init__(self, tables: LandmarkTables, fallback: Optional[Callable[[int, int], float]] = None):
+        self.tables = tables
+        self.fallback = fallback
+
+    def for_goal(self, goal: int) -> "GoalALT":
+        """Heurística ligada a ``goal`` (una por consulta; no se comparte el destino entre hilos)."""
+        return GoalALT(self, goal)
+
+    def __call__(self, v: int, goal: int) -> float:
+        t = self.tables
+        return self._finish(float((t.from_landmark[goal] - t.from_landmark[v]).max()),
+                            float((t.to_landmark[v] - t.to_landmark[goal]).max()), v, goal)
+
+    def many(self, nodes: Sequence[int], goal: int) -> np.ndarray:
+        t = self.tables
+        return self._many(nodes, goal, t.from_landmark[goal], t.to_landmark[goal])
+
+    def _finish(self, forward: float, backward: float, v: int, goal: int) -> float:
+        h = max(max(forward, backward) - self.tables.margin, 0.0)
+        if self.fallback is not None:
+            h = max(h, self.fallback(v, goal))
+        return h
+
+    def _many(self, nodes: Sequence[int], goal: int, goal_from: np.ndarray,
+              goal_to: np.ndarray) -> np.ndarray:
+        idx = np.asarray(nodes, dtype=np.int64)
+        t = self.tables
+        h = np.maximum((goal_from - t.from_landmark[idx]).max(axis=1),
+                       (t.to_landmark[idx] - goal_to).max(axis=1)).astype(np.float64)
+        h = np.maximum(h - t.margin, 0.0)
+        if self.fallback is not None:
+            fb_many = getattr(self.fallback, "many", None)
+            fb = fb_many(idx, goal) if fb_many else np.array([self.fallback(v, goal) for v in idx])
+            h = np.maximum(h, fb)
+        return h
+
+
+class GoalALT:
+    """``ALTHeuristic`` con las filas de un destino ya leídas; otro ``goal`` se calcula aparte."""
+    __slots__ = ("alt", "goal", "goal_from", "goal_to")
+
+    def __init__(self, alt: ALTHeuristic, goal: int):
+        self.alt = alt
+        self.goal = goal
+        self.goal_from = alt.tables.from_landmark[goal]
+        self.goal_to = alt.tables.to_landmark[goal]
+
+    def __call__(self, v: int, goal: int) -> float:
+        if goal != self.goal:
+            return self.alt(v, goal)
+        t = self.alt.tables
+        return self.alt._finish(float((self.goal_from - t.from_landmark[v]).max()),
+                                float((t.to_landmark[v] - self.goal_to).max()), v, goal)
+
+    def many(self, nodes: Sequence[int], goal: int) -> np.ndarray:
+        if goal != self.goal:
+            return self.alt.many(nodes, goal)
+        return self.alt._many(nodes, goal, self.goal_from, self.goal_to)
+
+
+def benchmark_alt(graph: CSRGraph, tables: LandmarkTables, queries: int = 50,
+                  seed: int = 0) -> Dict[str, float]:
+    """
+    Corre A* sobre pares aleatorios conectados con la heurística de gran
+    círculo y con ALT (+ gran círculo), y compara nodos expandidos.
+    """
+    from costs import cost_distance
+    from heuristicas_geo import GeoHeuristic
+    from path_search import a_star
+
+    geo = GeoHeuristic.for_distance(graph)
+    alt = ALTHeuristic(tables, fallback=geo)
+    rng = np.random.default_rng(seed)
+    expanded = {"geo": 0, "alt": 0}
+    done = 0
+    # muestrear dentro de la componente del landmark que más nodos alcanza
+    reachable = tables.from_landmark < UNREACHABLE
+    nodes = np.flatnonzero(reachable[:, int(np.argmax(reachable.sum(axis=0)))])
+    if len(nodes) < 2:
+        nodes = np.arange(graph.num_nodes)
+    for _ in range(queries * 4):
+        if done == queries:
+            break
+        s, t = (int(x) for x in rng.choice(nodes, size=2, replace=False))
+        results = {}
+        for name, h in (("geo", geo), ("alt", alt.for_goal(t))):
+            st: Dict[str, int] = {}
+            path = a_star(s, t, graph.get_neighbors, cost_distance, h, graph, stats=st)
+            results[name] = (path, st["expanded"])
+        if results["geo"][0] is None:
+            continue
+        done += 1
+        for name in expanded:
+            expanded[name] += results[name][1]
+    reduction = 1.0 - expanded["alt"] / expanded["geo"] if expanded["geo"] else 0.0
+    return {"queries": done, "expanded_geo": expanded["geo"],
+            "expanded_alt": expanded["alt"], "reduction": reduction}
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from snapshot import default_snapshot_path, load_or_build
+
+    parser = argparse.ArgumentParser(description="Build ALT landmark tables and benchmark them.")
+    parser.add_argument("nodes_csv", nargs="+", help="<region>_nodes.csv (edges: <region>_edges.csv)")
+    parser.add_argument("--landmarks", type=int, default=16)
+    parser.add_argument("--method", choices=["farthest", "ports"], default="farthest")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--symmetric", action="store_true")
+    args = parser.parse_args()
+
+    for nodes_csv in map(Path, args.nodes_csv):
+        edges_csv = nodes_csv.with_name(nodes_csv.name.replace("_nodes.csv", "_edges.csv"))
+        g = load_or_build(nodes_csv, edges_csv, symmetric=args.symmetric)
+        t0 = time.perf_counter()
+        tables = load_or_build_landmarks(g, landmarks_path(default_snapshot_path(nodes_csv)),
+                                         k=args.landmarks, method=args.method)
+        prep = time.perf_counter() - t0
+        r = benchmark_alt(g, tables, queries=args.queries)
+        print(f"{nodes_csv.stem}: {len(tables.landmarks)} landmarks ({prep:.2f}s), "
+              f"{r['queries']} consultas, expandidos {r['expanded_geo']} -> {r['expanded_alt']} "
+              f"({100 * r['reduction']:.1f}% menos)")
@@ -3,38 +3,169 @@ Utility to load a grid-based maritime graph from a CSV file.
 
 The CSV is expected to have the following header fields:
 
-    from_x, from_y, to_x, to_y, depth_min, risk_index, wave_size, wind_speed
+    from_x, from_y, to_x, to_y, depth_min, risk_index, wave_size, wind_speed[, distance]
 
 Each row describes a directed edge from `(from_x, from_y)` to `(to_x, to_y)`
-with the associated attributes.
+with the associated attributes. `risk_index`, `wave_size` and `wind_speed`
+default to 0 when absent; `distance` defaults to the Euclidean length of the
+edge in grid units.
 
 This module exposes a single function, `load_graph`, which returns a
 dictionary-based adjacency structure suitable for pathfinding algorithms.
+
+Edges are not stored as one Python object each: all of them live in an
+`EdgeStore`, one typed NumPy array per attribute (struct of arrays), grouped
+by source node. The adjacency maps each node to an `EdgeList` (a slice of
+the store) and iterating it yields `Edge` views with `__slots__`, which read
+straight from the columns. `edge['wind_speed']` and `edge.wind_speed` do not
+allocate; `attributes_list()` is kept for compatibility.
 """
 
 from __future__ import annotations
 
-import csv
-from dataclasses import dataclass
-from typing import Dict, List, Tuple, Iterable
-import math
+from typing import Dict, Iterator, List, Sequence, Tuple, Union, overload
+
+import numpy as np
+
+from bulk_csv import column_positions, read_columns, read_header
+
+Node = Tuple[int, int]
+
+# Attribute columns, in the order returned by Edge.attributes_list()
+# (the order costs.py and csr_graph.EDGE_ATTRIBUTES use).
+EDGE_COLUMNS = ("depth_min", "risk_index", "wave_size", "wind_speed", "distance")
+
+# Grid coordinates of both endpoints (integers)
+INT_COLUMNS = ('from_x', 'from_y', 'to_x', 'to_y')
+
+# Columns that may be missing from the CSV and their default value
+OPTIONAL_COLUMNS: Dict[str, float] = {"risk_index": 0.0, "wave_size": 0.0, "wind_speed": 0.0}
+
+
+class EdgeStore:
+    """
+    Columnar storage for every edge of the graph.
+
+    - to_x, to_y: int32 (m,) target node of each edge
+    - depth_min, risk_index, wave_size, wind_speed, distance: float32 (m,)
+
+    Edges of the same source node are contiguous.
+    """
+    __slots__ = ("to_x", "to_y") + EDGE_COLUMNS
+
+    def __init__(self, to_x: np.ndarray, to_y: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.to_x = np.ascontiguousarray(to_x, dtype=np.int32)
+        self.to_y = np.ascontiguousarray(to_y, dtype=np.int32)
+        for name in EDGE_COLUMNS:
+            column = np.ascontiguousarray(columns[name], dtype=np.float32)
+            if len(column) != len(self.to_x):
+                raise ValueError(f"Column {name} has {len(column)} values, expected {len(self.to_x)}")
+            setattr(self, name, column)
+
+    def __len__(self) -> int:
+        return len(self.to_x)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in EDGE_COLUMNS:
+            raise KeyError(name)
+        return getattr(self, name)
+
 
-@dataclass
 class Edge:
-    """Represents a directed edge in the graph with attributes."""
-    to: Tuple[float, float]
-    depth_min: float
-    distance: float
+    """Represents a directed edge in the graph: a view over one row of an `EdgeStore`."""
+    __slots__ = ("_store", "index")
+
+    def __init__(self, store: EdgeStore, index: int):
+        self._store = store
+        self.index = index
+
+    @property
+    def to(self) -> Node:
+        return (int(self._store.to_x[self.index]), int(self._store.to_y[self.index]))
+
+    @property
+    def depth_min(self) -> float:
+        return float(self._store.depth_min[self.index])
+
+    @property
+    def risk_index(self) -> float:
+        return float(self._store.risk_index[self.index])
+
+    @property
+    def wave_size(self) -> float:
+        return float(self._store.wave_size[self.index])
+
+    @property
+    def wind_speed(self) -> float:
+        return float(self._store.wind_speed[self.index])
+
+    @property
+    def distance(self) -> float:
+        return float(self._store.distance[self.index])
+
+    def __getitem__(self, name: str) -> float:
+        return float(self._store.column(name)[self.index])
+
+    def get(self, name: str, default=None):
+        return float(self._store.column(name)[self.index]) if name in EDGE_COLUMNS else default
+
     def attributes_list(self) -> List[float]:
         """Devuelve una lista con los atributos:
         depth_min, risk_index, wave_size, wind_speed, distance."""
-        return [
-            self.depth_min,
-            self.distance,
-        ]
+        return [float(self._store.column(name)[self.index]) for name in EDGE_COLUMNS]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Edge):
+            return NotImplemented
+        return self.to == other.to and self.attributes_list() == other.attributes_list()
+
+    def __repr__(self) -> str:
+        attrs = ", ".join(f"{name}={self[name]:g}" for name in EDGE_COLUMNS)
+        return f"Edge(to={self.to}, {attrs})"
+
 
+class EdgeList(Sequence[Edge]):
+    """Outgoing edges of one node: the range `start:stop` of an `EdgeStore`."""
+    __slots__ = ("store", "start", "stop")
 
-def load_graph(csv_path: str) -> Dict[Tuple[int, int], List[Edge]]:
+    def __init__(self, store: EdgeStore, start: int, stop: int):
+        self.store = store
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @overload
+    def __getitem__(self, i: int) -> Edge: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[Edge]: ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Edge, List[Edge]]:
+        if isinstance(i, slice):
+            return [Edge(self.store, self.start + k) for k in range(len(self))[i]]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("edge index out of range")
+        return Edge(self.store, self.start + i)
+
+    def __iter__(self) -> Iterator[Edge]:
+        store = self.store
+        for k in range(self.start, self.stop):
+            yield Edge(store, k)
+
+    def __repr__(self) -> str:
+        return f"EdgeList({list(self)!r})"
+
+
+def load_graph(csv_path: str) -> Dict[Node, EdgeList]:
     """
     Load a graph from a CSV file into an adjacency dictionary.
 
@@ -45,65 +176,70 @@ def load_graph(csv_path: str) -> Dict[Tuple[int, int], List[Edge]]:
 
     Returns
     -------
-    Dict[Tuple[int, int], List[Edge]]
-        A dictionary mapping each node (x, y) to a list of outgoing edges.
+    Dict[Tuple[int, int], EdgeList]
+        A dictionary mapping each node (x, y) to its outgoing edges, in file order.
     """
-    adjacency: Dict[Tuple[float, float], List[Edge]] = {}
-
-    # Open with utf-8-sig to tolerate an optional BOM and skip empty lines
-    with open(csv_path, newline='', encoding='utf-8-sig') as csvfile:
-        # Filter out empty/blank lines which can confuse DictReader's header detection
-        filtered_lines = (line for line in csvfile if line.strip())
-        reader = csv.DictReader(filtered_lines)
-
-        # Basic validation of expected columns to provide a clearer error if missing
-        expected = [
-            'from_x', 'from_y', 'to_x', 'to_y','distance', 'depth_min'
-        ]
-        if reader.fieldnames is None:
-            raise ValueError(f"No CSV header found in {csv_path}")
-        fieldnames = [fn.strip() for fn in reader.fieldnames]
-        missing = [f for f in expected if f not in fieldnames]
-        if missing:
-            raise KeyError(f"CSV is missing expected columns: {missing}. Found: {fieldnames}")
-
-        for row in reader:
-            # Convert fields to proper types, defensively handling extra whitespace
-            try:
-                from_x = int(row['from_x'].strip())
-                from_y = int(row['from_y'].strip())
-                to_x = int(row['to_x'].strip())
-                to_y = int(row['to_y'].strip())
-
-                depth_min = float(row['depth_min'].strip())
-                distance = float(row['distance'].strip())
-
-            except Exception as exc:
-                raise ValueError(f"Error parsing CSV row {row}: {exc}") from exc
-
-            from_node = (from_x, from_y)
-            edge = Edge(
-                to=(to_x, to_y),
-                depth_min=depth_min,
-                distance=distance,
-            )
-            adjacency.setdefault(from_node, []).append(edge)
-
-    return adjacency
-
-
-def print_graph_summary(graph: Dict[Tuple[float, float], List[Edge]]) -> None:
+    # The file is parsed column-wise (bulk_csv tolerates the BOM, blank lines,
+    # trailing commas and a repeated header); the header is validated once.
+    header = read_header(csv_path)
+    if not header:
+        raise ValueError(f"No CSV header found in {csv_path}")
+    positions = column_positions(header, required=INT_COLUMNS + ('depth_min',),
+                                 optional=tuple(OPTIONAL_COLUMNS) + ('distance',), path=csv_path)
+    data = read_columns(csv_path, positions)
+
+    required = np.column_stack([data[name] for name in INT_COLUMNS + ('depth_min',)])
+    bad = np.isnan(required).any(axis=1) | (required[:, :4] != np.floor(required[:, :4])).any(axis=1)
+    if bad.any():
+        row = int(np.flatnonzero(bad)[0]) + 1
+        raise ValueError(f"Error parsing CSV {csv_path}: {int(bad.sum())} rows with missing or invalid "
+                         f"coordinates/depth_min (first at data row {row})")
+
+    # Node ids in order of first appearance as a source
+    from_x, from_y, to_x, to_y = (data[name].astype(np.int32) for name in INT_COLUMNS)
+    keys = (from_x.astype(np.int64) << 32) | (from_y.astype(np.int64) & 0xFFFFFFFF)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first, kind='stable')] = np.arange(len(first))
+    src = rank[inverse.ravel()]
+    sources = np.sort(first)
+    nodes = list(zip(from_x[sources].tolist(), from_y[sources].tolist()))
+
+    # Group edges by source node (stable: keeps file order within each node)
+    order = np.argsort(src, kind='stable')
+    m = len(order)
+    from_x, from_y, to_x, to_y = from_x[order], from_y[order], to_x[order], to_y[order]
+    columns = {'depth_min': data['depth_min'][order]}
+    for name, default in OPTIONAL_COLUMNS.items():
+        values = data[name][order] if name in data else np.full(m, default)
+        columns[name] = np.where(np.isnan(values), default, values)
+    if 'distance' in data:
+        columns['distance'] = data['distance'][order]
+    else:
+        columns['distance'] = np.hypot(to_x - from_x, to_y - from_y)
+    store = EdgeStore(to_x, to_y, columns)
+
+    offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(src, minlength=len(nodes)))
+    bounds = offsets.tolist()
+    return {node: EdgeList(store, bounds[i], bounds[i + 1]) for i, node in enumerate(nodes)}
+
+
+def print_graph_summary(graph: Dict[Node, EdgeList]) -> None:
     """
     Print a brief summary of the graph structure.
 
     Parameters
     ----------
-    graph : Dict[Tuple[int, int], List[Edge]]
+    graph : Dict[Tuple[int, int], EdgeList]
         The adjacency dictionary representing the graph.
     """
     num_nodes = len(graph)
     num_edges = sum(len(edges) for edges in graph.values())
     print(f"Graph contains {num_nodes} nodes and {num_edges} directed edges.")
+    if graph:
+        store = next(iter(graph.values())).store
+        print(f"Edge columns use {store.nbytes / 2**20:.2f} MiB ({store.nbytes / max(num_edges, 1):.0f} B/edge).")
 
 
 if __name__ == "__main__":
@@ -115,5 +251,3 @@ if __name__ == "__main__":
 
     G = load_graph(args.csv_path)
     print_graph_summary(G)
-
-
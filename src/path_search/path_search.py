@@ -1,9 +1,12 @@
 import heapq
 import math
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
 from graph import Graph
-from heurísticas import h_safe, h_fuel, h_time, h_combined, h_distance
-from costs import cost_fuel,cost_safe,cost_time, combined_cost, cost_distance
+from csr_graph import CSRGraph
 
 Node = Any
 NeighborsFn = Callable[[Node], Iterable[Node]]
@@ -11,8 +14,31 @@ CostFn = Callable[[Node, Node], float]        # cost_fn(from_node, to_node)
 HeuristicFn = Callable[[Node, Node], float]   # h_fn(node, goal)
 MinDepthFn = Callable[[Node], float]          # profundidad_minima(node) -> profundidad
 Graph = Graph
+H_BATCH_MIN_NEIGHBORS = 16  # a partir de cuántos vecinos conviene h_fn.many(...)
+DEADLINE_CHECK_EVERY = 256  # cada cuántas expansiones se mira el reloj
+
+
+class SearchBudgetExceeded(RuntimeError):
+    """La búsqueda superó ``max_expansions`` o ``deadline``."""
+
+    def __init__(self, reason: str, expanded: int):
+        super().__init__(f"Search budget exceeded ({reason}) after {expanded} expansions")
+        self.reason = reason
+        self.expanded = expanded
+
+
+def _check_budget(expanded: int, max_expansions: Optional[int], deadline: Optional[float]) -> None:
+    if max_expansions is not None and expanded > max_expansions:
+        raise SearchBudgetExceeded("max_expansions", expanded)
+    if deadline is not None and expanded % DEADLINE_CHECK_EVERY == 0 and time.monotonic() > deadline:
+        raise SearchBudgetExceeded("deadline", expanded)
+
+
 def min_depth_fn(node: Node, graph) -> float:
-    return graph.get_vertex_depth(node) or 0.0
+    # Profundidad de agua (m, positiva): los nodos guardan elevación (negativa en
+    # el mar) y los puertos (0) o nodos sin dato no restringen el calado.
+    depth = graph.get_vertex_depth(node)
+    return -depth if depth is not None and depth < 0 else math.inf
 
 
 
@@ -25,6 +51,9 @@ def a_star(
     graph,
     min_depth_fn: Optional[MinDepthFn] = None,
     ship_draft: Optional[float] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    max_expansions: Optional[int] = None,
+    deadline: Optional[float] = None,
 ) -> Optional[List[Node]]:
     """
     Implementación A* genérica.
@@ -33,11 +62,24 @@ def a_star(
     - start: nodo inicial
     - goal: nodo objetivo
     - neighbors_fn: función que dado un nodo devuelve sus vecinos (iterable)
-    - cost_fn: función que devuelve el coste de mover de un nodo a otro
-    - h_fn: función heurística h(n, goal)
+    - cost_fn: función que devuelve el coste de mover de un nodo a otro. Si es
+               una tabla de cost_model (``cost_fn.table``) y se recorren los
+               vecinos de un CSRGraph con ``graph.get_neighbors``, los costos se
+               leen por índice de arista sin construir la vista de la arista.
+    - h_fn: función heurística h(n, goal). Si además tiene un método
+            ``many(nodos, goal)`` (p.ej. heuristicas_geo.GeoHeuristic), se usa para
+            evaluar en una sola llamada los vecinos de nodos con al menos
+            H_BATCH_MIN_NEIGHBORS vecinos (con pocos vecinos la llamada escalar es más barata).
     - min_depth_fn: (opcional) función que devuelve la profundidad mínima en un nodo
     - ship_draft: (opcional) calado del buque; si se proporciona, se usa para filtrar vecinos
-                   cuyo profundidad_minima(n) < ship_draft
+                   cuyo profundidad_minima(n) < ship_draft. Para consultas repetidas
+                   con el mismo calado conviene pasar como grafo una vista de
+                   draft_classes.DraftClasses.view(calado), sin filtro por vecino.
+    - stats: (opcional) dict donde se guardan contadores de la búsqueda
+             ('expanded': nodos expandidos, 'pushed': inserciones en el heap)
+    - max_expansions / deadline: (opcionales) presupuesto de la búsqueda: máximo
+                   de nodos expandidos y/o instante límite según ``time.monotonic()``.
+                   Si se supera se lanza SearchBudgetExceeded.
 
     Retorna:
     - lista con el camino desde start hasta goal (inclusive) si se encuentra,
@@ -66,6 +108,17 @@ def a_star(
     open_heap: List[Tuple[float, Node]] = []
     heapq.heappush(open_heap, (f[start], start))
     visited: set = set()
+    h_many = getattr(h_fn, "many", None)
+    pushed = 1
+    budgeted = max_expansions is not None or deadline is not None
+    # Costos precalculados (cost_model.EdgeCostTable) sobre un CSRGraph: la
+    # k-ésima vecina de u es la arista first_edge(u) + k, sin get_edge_data
+    cost_table = getattr(cost_fn, "table", None)
+    if cost_table is not None and not (hasattr(graph, "first_edge")
+                                       and neighbors_fn == graph.get_neighbors):
+        cost_table = None
+    elif cost_table is not None and hasattr(graph, "edge_costs"):
+        cost_table = graph.edge_costs(cost_fn)  # draft_classes.DraftView: índices propios
 
     while open_heap:
         current_f, current = heapq.heappop(open_heap)
@@ -76,48 +129,437 @@ def a_star(
 
         # Si alcanzamos el objetivo, reconstruir camino
         if current == goal:
+            if stats is not None:
+                stats.update(expanded=len(visited), pushed=pushed)
             return reconstruct_path(parent, goal)
 
         # Marcar current como visitado
         visited.add(current)
+        if budgeted:
+            _check_budget(len(visited), max_expansions, deadline)
 
         # Explorar vecinos
-        for m in neighbors_fn(current):
+        neighbors = neighbors_fn(current)
+        if cost_table is not None:
+            base = graph.first_edge(current)
+        h_values = None
+        if h_many is not None and len(neighbors) >= H_BATCH_MIN_NEIGHBORS:
+            h_values = h_many(neighbors, goal).tolist()
+        for k, m in enumerate(neighbors):
             # Filtrado por profundidad mínima (calado)
             if min_depth_fn is not None and ship_draft is not None:
                 if min_depth_fn(m, graph) < ship_draft:
                     continue
-            e = graph.get_edge_data(current, m)
-            if e is None:
-                continue
-            tentative_g = g.get(current, math.inf) + cost_fn(e)
+            if cost_table is not None:
+                step = cost_table[base + k]
+            else:
+                e = graph.get_edge_data(current, m)
+                if e is None:
+                    continue
+                step = cost_fn(e)
+            tentative_g = g.get(current, math.inf) + step
 
             if tentative_g < g.get(m, math.inf):
                 parent[m] = current
                 g[m] = tentative_g
-                f[m] = tentative_g + h_fn(m, goal)
+                f[m] = tentative_g + (h_values[k] if h_values is not None else h_fn(m, goal))
                 # Añadir/actualizar en open set (permitimos duplicados y los ignoramos al extraer)
                 heapq.heappush(open_heap, (f[m], m))
+                pushed += 1
 
     # Si se vacía open_set sin encontrar goal -> fracaso
+    if stats is not None:
+        stats.update(expanded=len(visited), pushed=pushed)
     return None
 
 
-g = Graph()
-g.load_data('src/data/asia_india_norte_nodes.csv','src/data/asia_india_norte_edges.csv')
-print(g.get_neighbors((5.435416666666669,73.18958333333332)))
-# csv_path = 'graph_edges.csv'
-# graph = load_graph(csv_path)
-
-start = (5.435416666666669,73.18958333333332)
-goal = (5.497916666666669,73.18958333333332)
-path = a_star(start=start,
-              goal=goal,
-              neighbors_fn=g.get_neighbors,
-              cost_fn=cost_distance,
-              graph=g,
-              h_fn=h_distance,
-              min_depth_fn=None,
-              ship_draft=None
-          )
+def bidirectional_a_star(
+    start: Node,
+    goal: Node,
+    neighbors_fn: NeighborsFn,
+    cost_fn: CostFn,
+    h_fn: HeuristicFn,
+    graph,
+    min_depth_fn: Optional[MinDepthFn] = None,
+    ship_draft: Optional[float] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    max_expansions: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> Optional[List[Node]]:
+    """
+    A* bidireccional, con la misma firma que ``a_star``.
+
+    Una búsqueda avanza desde start con ``neighbors_fn`` y otra retrocede desde
+    goal con ``graph.get_predecessors`` (la adyacencia inversa de las aristas
+    dirigidas). Ambas usan el potencial promedio
+
+        p(v) = (h_fn(v, goal) - h_fn(start, v)) / 2
+
+    (la hacia atrás, -p), que es consistente si h_fn lo es; así ambas
+    búsquedas son Dijkstra sobre los mismos costos reducidos y se puede
+    cortar en cuanto tope_adelante + tope_atrás >= mejor costo encontrado.
+    ``h_fn(start, v)`` debe acotar el costo de start a v (las heurísticas
+    geográficas son simétricas; ALT acota en el sentido de los argumentos).
+
+    Con h_fn = 0 es Dijkstra bidireccional. ``stats`` recibe además
+    'expanded_forward' y 'expanded_backward'; ``max_expansions`` cuenta las
+    expansiones de ambos lados.
+    """
+    def reachable(n: Node) -> bool:
+        if min_depth_fn is None or ship_draft is None:
+            return True
+        return min_depth_fn(n, graph) >= ship_draft
+
+    def finish(path: Optional[List[Node]]) -> Optional[List[Node]]:
+        if stats is not None:
+            stats.update(expanded=len(closed[0]) + len(closed[1]),
+                         expanded_forward=len(closed[0]), expanded_backward=len(closed[1]),
+                         pushed=pushed)
+        return path
+
+    closed: Tuple[set, set] = (set(), set())
+    pushed = 2
+    budgeted = max_expansions is not None or deadline is not None
+    if start == goal:
+        return finish([start])
+    if not reachable(goal):
+        return finish(None)
+
+    h_start_goal = h_fn(start, goal)
+
+    def potential(n: Node) -> float:
+        # p(start) = (h(start, goal) - 0) / 2, p(goal) = -h(start, goal) / 2
+        if n == start:
+            return 0.5 * h_start_goal
+        if n == goal:
+            return -0.5 * h_start_goal
+        return 0.5 * (h_fn(n, goal) - h_fn(start, n))
+
+    g: Tuple[Dict[Node, float], Dict[Node, float]] = ({start: 0.0}, {goal: 0.0})
+    parent: Tuple[Dict[Node, Optional[Node]], Dict[Node, Optional[Node]]] = ({start: None}, {goal: None})
+    pot: Dict[Node, float] = {}
+    heaps: Tuple[List[Tuple[float, Node]], List[Tuple[float, Node]]] = (
+        [(potential(start), start)], [(-potential(goal), goal)])
+    expand = (neighbors_fn, graph.get_predecessors)
+    best, meet = math.inf, None
+
+    while heaps[0] and heaps[1]:
+        # Criterio de corte con potenciales consistentes
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        # Expandir el lado con la frontera más chica
+        side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+        _, current = heapq.heappop(heaps[side])
+        if current in closed[side]:
+            continue
+        closed[side].add(current)
+        if budgeted:
+            _check_budget(len(closed[0]) + len(closed[1]), max_expansions, deadline)
+        my_g, other_g = g[side], g[1 - side]
+        sign = 1.0 if side == 0 else -1.0
+        g_current = my_g[current]
+
+        for m in expand[side](current):
+            if not reachable(m):
+                continue
+            e = graph.get_edge_data(current, m) if side == 0 else graph.get_edge_data(m, current)
+            if e is None:
+                continue
+            tentative_g = g_current + cost_fn(e)
+            if tentative_g < my_g.get(m, math.inf):
+                my_g[m] = tentative_g
+                parent[side][m] = current
+                if m not in pot:
+                    pot[m] = potential(m)
+                heapq.heappush(heaps[side], (tentative_g + sign * pot[m], m))
+                pushed += 1
+                other = other_g.get(m)
+                if other is not None and tentative_g + other < best:
+                    best, meet = tentative_g + other, m
+
+    if meet is None:
+        return finish(None)
+    path: List[Node] = []
+    cur: Optional[Node] = meet
+    while cur is not None:
+        path.append(cur)
+        cur = parent[0].get(cur)
+    path.reverse()
+    cur = parent[1].get(meet)
+    while cur is not None:
+        path.append(cur)
+        cur = parent[1].get(cur)
+    return finish(path)
+
+
+def time_dependent_a_star(
+    start: int,
+    goal: int,
+    graph,
+    weather,
+    h_fn: HeuristicFn,
+    departure: float = 0.0,
+    objective: str = "time",
+    cost_params: Optional[Dict[str, float]] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    max_expansions: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> Optional[List[int]]:
+    """
+    A* donde el costo de cada arista depende de la hora de llegada a su nodo
+    de origen.
+
+    - graph: CSRGraph (o una vista de draft_classes) con ids enteros
+    - weather: weather.WeatherLayer del grafo base; ``weather.tables(bucket, ...)``
+               da el costo y la duración (horas, según ``cost_time``) de cada
+               arista para el bucket de la hora de salida
+    - departure: hora de salida desde start (horas desde ``weather.cube.t0``)
+    - objective / cost_params: objetivo de cost_model y sus pesos
+    - h_fn: heurística admisible para todos los buckets (p.ej.
+            GeoHeuristic.for_time con la velocidad máxima posible)
+
+    Con ``objective='time'`` el costo es la hora de llegada y la búsqueda es
+    exacta (los buckets constantes por tramos respetan FIFO salvo en los
+    saltos entre buckets). Con otros objetivos el orden es por costo y la
+    hora de llegada sólo decide qué pronóstico se usa.
+
+    ``stats`` recibe además 'arrival' (hora de llegada a goal) y 'cost'.
+    """
+    params = cost_params or {}
+    view_ids = getattr(graph, "edge_ids", None)
+    view_ids = view_ids.tolist() if view_ids is not None else None
+    tables: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}  # por bucket, sólo durante la búsqueda
+
+    g: Dict[int, float] = {start: 0.0}
+    arrival: Dict[int, float] = {start: departure}
+    parent: Dict[int, Optional[int]] = {start: None}
+    open_heap: List[Tuple[float, int]] = [(h_fn(start, goal), start)]
+    visited: set = set()
+    pushed = 1
+    budgeted = max_expansions is not None or deadline is not None
+
+    def finish(path: Optional[List[int]]) -> Optional[List[int]]:
+        if stats is not None:
+            stats.update(expanded=len(visited), pushed=pushed, buckets=len(tables),
+                         arrival=float(arrival[goal]) if path else math.inf,
+                         cost=float(g[goal]) if path else math.inf)
+        return path
+
+    while open_heap:
+        _, current = heapq.heappop(open_heap)
+        if current in visited:
+            continue
+        if current == goal:
+            path: List[int] = []
+            cur: Optional[int] = goal
+            while cur is not None:
+                path.append(cur)
+                cur = parent[cur]
+            path.reverse()
+            return finish(path)
+        visited.add(current)
+        if budgeted:
+            _check_budget(len(visited), max_expansions, deadline)
+
+        t = arrival[current]
+        bucket = weather.bucket(t)
+        entry = tables.get(bucket)
+        if entry is None:
+            entry = tables[bucket] = weather.tables(bucket, objective, **params)
+        cost_table, hours_table = entry
+        g_current = g[current]
+        base = graph.first_edge(current)
+        for k, m in enumerate(graph.get_neighbors(current)):
+            e = base + k if view_ids is None else view_ids[base + k]
+            tentative_g = g_current + cost_table[e]
+            if tentative_g < g.get(m, math.inf):
+                g[m] = tentative_g
+                arrival[m] = t + hours_table[e]
+                parent[m] = current
+                heapq.heappush(open_heap, (tentative_g + h_fn(m, goal), m))
+                pushed += 1
+    return finish(None)
+
+
+# Modos de búsqueda intercambiables (misma firma)
+SEARCH_MODES: Dict[str, Callable[..., Optional[List[Node]]]] = {
+    "forward": a_star,
+    "bidirectional": bidirectional_a_star,
+}
+
+
+def one_to_many(
+    source: int,
+    targets: Sequence[int],
+    graph: CSRGraph,
+    weights: Sequence[float],
+    with_paths: bool = False,
+) -> Tuple[List[float], Optional[List[Optional[List[int]]]]]:
+    """
+    Dijkstra desde ``source`` que corta apenas quedan asentados todos los
+    ``targets`` (en vez de una búsqueda A* por destino).
+
+    ``weights`` es el costo de cada arista en el orden de ``graph.targets``
+    (p.ej. ``CostModel.costs(...)``); las aristas con costo ``inf`` se ignoran,
+    así una restricción de calado se expresa poniendo ``inf`` en las aristas
+    no navegables. Devuelve el costo a cada target (``inf`` si no se alcanza)
+    y, si ``with_paths``, el camino a cada uno (o None).
+    """
+    off, tgt = graph._adjacency_lists()
+    w = weights if isinstance(weights, list) else np.asarray(weights).tolist()
+    inf = math.inf
+    dist = [inf] * graph.num_nodes
+    parent: Dict[int, int] = {}
+    settled = bytearray(graph.num_nodes)
+    pending = set(targets)
+    dist[source] = 0.0
+    heap: List[Tuple[float, int]] = [(0.0, source)]
+    while heap and pending:
+        d, u = heapq.heappop(heap)
+        if settled[u]:
+            continue
+        settled[u] = 1
+        pending.discard(u)
+        for e in range(off[u], off[u + 1]):
+            nd = d + w[e]
+            v = tgt[e]
+            if nd < dist[v]:
+                dist[v] = nd
+                parent[v] = u
+                heapq.heappush(heap, (nd, v))
+
+    costs = [dist[t] if settled[t] else inf for t in targets]
+    if not with_paths:
+        return costs, None
+    paths: List[Optional[List[int]]] = []
+    for t, c in zip(targets, costs):
+        if c == inf:
+            paths.append(None)
+            continue
+        path = [t]
+        while path[-1] != source:
+            path.append(parent[path[-1]])
+        path.reverse()
+        paths.append(path)
+    return costs, paths
+
+
+def isochrone(
+    graph: CSRGraph,
+    source: int,
+    budget: float,
+    weights: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Nodos alcanzables desde ``source`` con costo <= ``budget``.
+
+    Es un Dijkstra acotado (``scipy.sparse.csgraph.dijkstra`` con ``limit``):
+    las distancias viven en un único array de NumPy y la búsqueda no sale de
+    la región alcanzable. ``weights`` como en ``one_to_many`` (``inf`` = arista
+    no navegable).
+
+    Devuelve ``(nodos, costos, borde)``: los nodos alcanzables ordenados por
+    costo, su costo, y el borde (nodos alcanzables con alguna arista hacia
+    un nodo no alcanzable), que alcanza para dibujar el contorno.
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+
+    n = graph.num_nodes
+    w = np.asarray(weights, dtype=np.float64)
+    sources = np.repeat(np.arange(n), np.diff(graph.offsets))
+    keep = np.isfinite(w)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(sources[keep], minlength=n))
+    targets = np.asarray(graph.targets)[keep]
+    matrix = csr_matrix((w[keep], targets, offsets), shape=(n, n))
+    dist = dijkstra(matrix, directed=True, indices=source, limit=budget)
+
+    reachable = np.isfinite(dist)
+    nodes = np.flatnonzero(reachable)
+    nodes = nodes[np.argsort(dist[nodes], kind="stable")]
+    leaving = reachable[sources[keep]] & ~reachable[targets]
+    boundary = np.unique(sources[keep][leaving])
+    return nodes, dist[nodes], boundary
+
+
+# Grafo de cada proceso del pool de many_to_many (abierto desde el snapshot)
+_WORKER_GRAPH: Optional[CSRGraph] = None
+
+
+def init_matrix_worker(snapshot_path: str) -> None:
+    """``initializer`` de ProcessPoolExecutor: mapea el snapshot una vez por proceso."""
+    global _WORKER_GRAPH
+    from snapshot import load_snapshot
+    _WORKER_GRAPH = load_snapshot(snapshot_path)
+
+
+def _matrix_rows(weights: np.ndarray, sources: Sequence[int], targets: Sequence[int],
+                 with_paths: bool, graph: Optional[CSRGraph] = None):
+    graph = graph if graph is not None else _WORKER_GRAPH
+    w = np.asarray(weights).tolist()
+    return [one_to_many(s, targets, graph, w, with_paths) for s in sources]
+
+
+def many_to_many(
+    graph: CSRGraph,
+    sources: Sequence[int],
+    targets: Sequence[int],
+    weights: np.ndarray,
+    with_paths: bool = False,
+    executor: Optional[Executor] = None,
+    workers: int = 1,
+) -> Tuple[np.ndarray, Optional[List[List[Optional[List[int]]]]]]:
+    """
+    Matriz de costos (len(sources), len(targets)) con un barrido de
+    ``one_to_many`` por origen.
+
+    Con ``executor`` (un ProcessPoolExecutor creado con
+    ``initializer=init_matrix_worker, initargs=(ruta_del_snapshot,)``) los
+    orígenes se reparten en ``workers`` bloques, uno por tarea, así los pesos
+    viajan una sola vez por bloque. Sin executor se calcula en este proceso.
+    """
+    sources = [int(s) for s in sources]
+    targets = [int(t) for t in targets]
+    weights = np.asarray(weights, dtype=np.float64)
+    if executor is None or workers <= 1 or len(sources) <= 1:
+        rows = _matrix_rows(weights, sources, targets, with_paths, graph)
+    else:
+        size = -(-len(sources) // workers)
+        chunks = [sources[i:i + size] for i in range(0, len(sources), size)]
+        futures = [executor.submit(_matrix_rows, weights, chunk, targets, with_paths) for chunk in chunks]
+        rows = [row for fut in futures for row in fut.result()]
+    matrix = np.array([costs for costs, _ in rows], dtype=np.float64).reshape(len(sources), len(targets))
+    return matrix, ([paths for _, paths in rows] if with_paths else None)
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+
+    from costs import cost_distance
+    from heuristicas_geo import GeoHeuristic
+    from snapshot import load_or_build
+
+    parser = argparse.ArgumentParser(description="Shortest-distance route between two nodes of a region.")
+    parser.add_argument("nodes_csv", help="<region>_nodes.csv (edges: <region>_edges.csv)")
+    parser.add_argument("--symmetric", action="store_true")
+    parser.add_argument("--start", nargs=2, type=float, required=True, metavar=("LAT", "LON"))
+    parser.add_argument("--goal", nargs=2, type=float, required=True, metavar=("LAT", "LON"))
+    args = parser.parse_args()
 
+    nodes_csv = Path(args.nodes_csv)
+    edges_csv = nodes_csv.with_name(nodes_csv.name.replace("_nodes.csv", "_edges.csv"))
+    g = load_or_build(nodes_csv, edges_csv, symmetric=args.symmetric)
+    start = g.node_id(tuple(args.start))
+    goal = g.node_id(tuple(args.goal))
+    path = a_star(start=start,
+                  goal=goal,
+                  neighbors_fn=g.get_neighbors,
+                  cost_fn=cost_distance,
+                  graph=g,
+                  h_fn=GeoHeuristic.for_distance(g),
+                  min_depth_fn=None,
+                  ship_draft=None
+              )
+    print(g.coords_of(path) if path else path)
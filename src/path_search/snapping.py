@@ -0,0 +1,204 @@
+"""
+"Snapping" de coordenadas arbitrarias al nodo navegable más cercano.
+
+``CSRGraph.node_id`` sólo encuentra un nodo si las coordenadas redondean
+exactamente a las guardadas, cosa que casi nunca pasa con un punto que manda
+un usuario. :class:`NodeSnapper` indexa los nodos con un ``cKDTree`` sobre sus
+vectores unitarios 3D: el vecino más cercano por distancia de cuerda es el más
+cercano por gran círculo, sin problemas en el antimeridiano ni en los polos.
+
+Sólo se indexan nodos navegables (con al menos una arista). Con
+``DraftClasses`` se puede filtrar por calado: se arma (y cachea) un árbol
+por calado con los nodos que tocan alguna arista navegable para ese buque.
+
+Los nodos indexados se guardan junto al snapshot en ``<snapshot>.snap.npz``
+(sin pickle) y se reutilizan mientras el checksum del grafo coincida; el
+árbol se reconstruye al cargar, que cuesta poco frente a elegir los nodos::
+
+    snapper = load_or_build_snapper(graph, snapper_path(snapshot), classes)
+    snap = snapper.snap(-34.9, -56.2, draft="panamax")
+    snap.node, snap.distance_km
+"""
+from __future__ import annotations
+
+import math
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from csr_graph import CSRGraph
+from draft_classes import VESSEL_PROFILES, DraftClasses
+from geo import EARTH_RADIUS_KM, unit_vectors
+
+PathLike = Union[str, Path]
+Draft = Union[str, float, None]
+
+
+@dataclass(frozen=True)
+class Snap:
+    """Resultado de ``snap``: nodo elegido (o -1 si no hay) y distancia en km."""
+    node: int
+    distance_km: float
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Distancia de cuerda entre vectores unitarios -> gran círculo en km."""
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, 0.5 * np.asarray(chord)))
+
+
+def navigable_nodes(graph) -> np.ndarray:
+    """Nodos con al menos una arista (saliente o entrante) en ``graph`` (CSRGraph o DraftView)."""
+    n = graph.base.num_nodes if hasattr(graph, "base") else graph.num_nodes
+    degree = np.diff(np.asarray(graph.offsets)) + np.bincount(np.asarray(graph.targets), minlength=n)
+    return np.flatnonzero(degree > 0)
+
+
+class NodeSnapper:
+    """
+    Índice espacial de los nodos navegables de un CSRGraph.
+
+    ``classes`` (opcional) habilita el filtro por calado; los árboles por
+    calado se construyen la primera vez que se piden.
+    """
+
+    def __init__(self, graph: CSRGraph, classes: Optional[DraftClasses] = None,
+                 nodes: Optional[np.ndarray] = None):
+        """``nodes``: nodos a indexar (por defecto, los navegables del grafo)."""
+        self.graph = graph
+        self.classes = classes
+        if nodes is None:
+            nodes = navigable_nodes(graph)
+        self.nodes = np.asarray(nodes, dtype=np.int64)
+        self.tree = cKDTree(unit_vectors(graph.lats[self.nodes], graph.lons[self.nodes]))
+        self.checksum = graph.checksum
+        self._trees: Dict[float, Tuple[cKDTree, np.ndarray]] = {}
+
+    def _index(self, draft: Draft) -> Tuple[cKDTree, np.ndarray]:
+        if draft is None:
+            return self.tree, self.nodes
+        if self.classes is None:
+            raise ValueError("Snapping by draft requires DraftClasses")
+        draft = self.classes.resolve(draft)
+        entry = self._trees.get(draft)
+        if entry is None:
+            nodes = navigable_nodes(self.classes.view(draft))
+            g = self.graph
+            entry = self._trees[draft] = (cKDTree(unit_vectors(g.lats[nodes], g.lons[nodes])), nodes)
+        return entry
+
+    def invalidate_drafts(self) -> None:
+        """Descarta los árboles por calado (p.ej. tras cambiar ``depth_min``)."""
+        self._trees = {}
+
+    def snap_many(self, lats: Sequence[float], lons: Sequence[float], draft: Draft = None,
+                  max_km: float = math.inf) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nodo más cercano a cada punto, en una sola consulta al árbol.
+
+        Devuelve ``(nodos, distancias_km)``; los puntos sin nodo a menos de
+        ``max_km`` (o sin nodos navegables para ese calado) quedan con -1 e inf.
+        """
+        tree, nodes = self._index(draft)
+        xyz = unit_vectors(np.atleast_1d(lats), np.atleast_1d(lons))
+        if len(nodes) == 0:
+            return np.full(len(xyz), -1, dtype=np.int64), np.full(len(xyz), np.inf)
+        bound = np.inf
+        if max_km < math.pi * EARTH_RADIUS_KM:  # km -> cuerda: 2 sin(d / 2R), con margen de redondeo
+            bound = 2.0 * math.sin(max_km / (2.0 * EARTH_RADIUS_KM)) * (1 + 1e-12)
+        chord, pos = tree.query(xyz, k=1, distance_upper_bound=bound)
+        found = pos < len(nodes)
+        result = np.full(len(xyz), -1, dtype=np.int64)
+        result[found] = nodes[pos[found]]
+        km = np.full(len(xyz), np.inf)
+        km[found] = chord_to_km(chord[found])
+        return result, km
+
+    def snap(self, lat: float, lon: float, draft: Draft = None, max_km: float = math.inf) -> Snap:
+        nodes, km = self.snap_many([lat], [lon], draft, max_km)
+        return Snap(int(nodes[0]), float(km[0]))
+
+    # ------------------------------------------------------------ persistencia
+    def save(self, path: PathLike) -> None:
+        """Guarda los nodos del árbol base (los árboles se reconstruyen al cargar)."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, nodes=self.nodes, checksum=np.array(self.checksum))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: PathLike, graph: CSRGraph,
+             classes: Optional[DraftClasses] = None) -> Optional["NodeSnapper"]:
+        """El índice guardado, o None si es de otro grafo (checksum distinto)."""
+        with np.load(path, allow_pickle=False) as z:
+            checksum = str(z["checksum"])
+            nodes = z["nodes"]
+        if not graph.checksum or checksum != graph.checksum:
+            return None
+        if nodes.ndim != 1 or (len(nodes) and not 0 <= nodes.min() <= nodes.max() < graph.num_nodes):
+            return None
+        return cls(graph, classes, nodes=nodes)
+
+
+def snapper_path(snapshot_path: PathLike) -> Path:
+    snapshot_path = Path(snapshot_path)
+    return snapshot_path.with_name(f"{snapshot_path.stem}.snap.npz")
+
+
+def load_or_build_snapper(graph: CSRGraph, path: PathLike,
+                          classes: Optional[DraftClasses] = None) -> NodeSnapper:
+    """Reutiliza el índice guardado si corresponde al mismo grafo (checksum)."""
+    path = Path(path)
+    if path.exists():
+        try:
+            snapper = NodeSnapper.load(path, graph, classes)
+        except (OSError, ValueError, EOFError, KeyError, zipfile.BadZipFile):
+            snapper = None
+        if snapper is not None:
+            return snapper
+    snapper = NodeSnapper(graph, classes)
+    if graph.checksum:
+        snapper.save(path)
+    return snapper
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from snapshot import default_snapshot_path, load_or_build
+
+    parser = argparse.ArgumentParser(description="Build the node snapping index and time it.")
+    parser.add_argument("nodes_csv", help="<region>_nodes.csv (edges: <region>_edges.csv)")
+    parser.add_argument("--symmetric", action="store_true")
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--draft", default=None, help="Vessel profile name or draft in metres")
+    args = parser.parse_args()
+
+    nodes_csv = Path(args.nodes_csv)
+    edges_csv = nodes_csv.with_name(nodes_csv.name.replace("_nodes.csv", "_edges.csv"))
+    g = load_or_build(nodes_csv, edges_csv, symmetric=args.symmetric)
+    t0 = time.perf_counter()
+    snapper = load_or_build_snapper(g, snapper_path(default_snapshot_path(nodes_csv)), DraftClasses(g))
+    prep = time.perf_counter() - t0
+    draft = args.draft
+    if draft is not None and draft not in VESSEL_PROFILES:
+        draft = float(draft)
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(g.lats.min(), g.lats.max(), args.points)
+    lons = rng.uniform(g.lons.min(), g.lons.max(), args.points)
+    snapper.snap_many(lats[:1], lons[:1], draft)  # construir el árbol del calado
+    t0 = time.perf_counter()
+    nodes, km = snapper.snap_many(lats, lons, draft)
+    batch = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for lat, lon in zip(lats[:1000].tolist(), lons[:1000].tolist()):
+        snapper.snap(lat, lon, draft)
+    single = (time.perf_counter() - t0) / min(1000, args.points)
+    print(f"{nodes_csv.stem}: índice de {len(snapper.nodes)} nodos ({prep:.3f}s), "
+          f"{args.points} puntos en {1e3 * batch:.1f}ms ({1e6 * batch / args.points:.1f}us/punto), "
+          f"snap individual {1e6 * single:.0f}us, distancia mediana {np.median(km):.2f} km")
@@ -0,0 +1,204 @@
+"""
+Snapshot binario de un CSRGraph para arrancar sin parsear CSVs.
+
+Formato (little-endian)::
+
+    MAGIC (8 bytes) | FORMAT_VERSION (uint32) | largo del header (uint32)
+    header JSON (utf-8) con el checksum de las fuentes y la tabla de arrays
+    arrays crudos, cada uno alineado a ALIGN bytes
+
+Los arrays se abren con ``np.memmap`` (no se leen a memoria), por lo que
+cargar un grafo de 90k nodos tarda milisegundos. El header guarda un
+checksum de los CSV de origen y de los parámetros de carga; si no coincide
+con las fuentes actuales, :func:`load_or_build` reconstruye el snapshot.
+
+Uso desde consola::
+
+    python snapshot.py nodos.csv aristas.csv -o region.graph [--symmetric]
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+MAGIC = b"HKGRAPH\0"
+FORMAT_VERSION = 1
+ALIGN = 64
+_PREFIX = struct.Struct("<8sII")
+
+PathLike = Union[str, Path]
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def source_checksum(nodes_csv: PathLike, edges_csv: PathLike, **params: Any) -> str:
+    """blake2b de los CSV de origen + parámetros de carga + versión del formato."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(json.dumps({"format": FORMAT_VERSION, **params}, sort_keys=True).encode())
+    for path in (nodes_csv, edges_csv):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _graph_arrays(graph: CSRGraph) -> Dict[str, np.ndarray]:
+    arrays = {
+        "lats": graph.lats,
+        "lons": graph.lons,
+        "depths": graph.depths,
+        "offsets": graph.offsets,
+        "targets": graph.targets,
+    }
+    for name, column in graph.edge_attrs.items():
+        arrays[f"edge.{name}"] = column
+    return arrays
+
+
+def write_snapshot(graph: CSRGraph, path: PathLike, checksum: str = "",
+                   extra: Optional[Dict[str, np.ndarray]] = None) -> None:
+    """
+    Escribe el grafo (y arrays ``extra`` opcionales) en ``path``.
+
+    La escritura es atómica: se escribe a un temporal y se renombra.
+    """
+    path = Path(path)
+    arrays = _graph_arrays(graph)
+    arrays.update({f"extra.{k}": v for k, v in (extra or {}).items()})
+
+    # La tabla de offsets depende del largo del header, que a su vez depende
+    # de los offsets: se calcula con offsets relativos y se desplaza luego.
+    table: Dict[str, Dict[str, Any]] = {}
+    rel = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        arrays[name] = arr
+        table[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": rel}
+        rel = _align(rel + arr.nbytes)
+    header = {
+        "checksum": checksum,
+        "num_nodes": graph.num_nodes,
+        "num_edges": graph.num_edges,
+        "key_decimals": graph._dec,
+        "arrays": table,
+    }
+    raw = json.dumps(header).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(raw) + 256)  # margen para los offsets absolutos
+    for entry in table.values():
+        entry["offset"] += data_start
+    raw = json.dumps(header).encode("utf-8")
+    if _PREFIX.size + len(raw) > data_start:
+        raise ValueError("Snapshot header too large")
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(raw)))
+        f.write(raw)
+        for name, arr in arrays.items():
+            f.seek(table[name]["offset"])
+            f.write(arr.tobytes())
+        f.truncate(max(data_start, f.tell()))
+    os.replace(tmp, path)
+
+
+def read_header(path: PathLike) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        magic, version, size = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a graph snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {version} (expected {FORMAT_VERSION})")
+        return json.loads(f.read(size).decode("utf-8"))
+
+
+def open_arrays(path: PathLike, header: Optional[Dict[str, Any]] = None,
+                mode: str = "r") -> Dict[str, np.ndarray]:
+    """Abre cada array del snapshot como np.memmap (sin copiarlo a memoria)."""
+    header = header or read_header(path)
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        shape = tuple(entry["shape"])
+        if int(np.prod(shape)) == 0:  # np.memmap no admite arrays vacíos
+            arrays[name] = np.zeros(shape, dtype=entry["dtype"])
+            continue
+        arrays[name] = np.memmap(path, dtype=entry["dtype"], mode=mode,
+                                 offset=entry["offset"], shape=shape)
+    return arrays
+
+
+def load_snapshot(path: PathLike, mode: str = "r") -> CSRGraph:
+    """
+    Abre un snapshot como CSRGraph respaldado por np.memmap.
+
+    ``mode='c'`` (copy-on-write) permite modificar los arrays en memoria sin
+    tocar el archivo.
+    """
+    header = read_header(path)
+    arrays = open_arrays(path, header, mode=mode)
+    edge_attrs = {k[len("edge."):]: v for k, v in arrays.items() if k.startswith("edge.")}
+    graph = CSRGraph(arrays["lats"], arrays["lons"], arrays["depths"],
+                     arrays["offsets"], arrays["targets"], edge_attrs,
+                     key_decimals=header["key_decimals"])
+    graph.checksum = header["checksum"]
+    graph.extra = {k[len("extra."):]: v for k, v in arrays.items() if k.startswith("extra.")}
+    return graph
+
+
+def default_snapshot_path(nodes_csv: PathLike) -> Path:
+    nodes_csv = Path(nodes_csv)
+    stem = nodes_csv.stem[:-len("_nodes")] if nodes_csv.stem.endswith("_nodes") else nodes_csv.stem
+    return nodes_csv.with_name(f"{stem}.graph")
+
+
+def load_or_build(
+    nodes_csv: PathLike,
+    edges_csv: PathLike,
+    snapshot_path: Optional[PathLike] = None,
+    symmetric: bool = False,
+    key_decimals: int = 6,
+    mode: str = "r",
+) -> CSRGraph:
+    """
+    Devuelve el grafo desde el snapshot si está al día; si no existe o su
+    checksum no coincide con los CSV actuales, lo reconstruye desde los CSV.
+    """
+    snapshot_path = Path(snapshot_path) if snapshot_path else default_snapshot_path(nodes_csv)
+    checksum = source_checksum(nodes_csv, edges_csv, symmetric=symmetric, key_decimals=key_decimals)
+    if snapshot_path.exists():
+        try:
+            if read_header(snapshot_path).get("checksum") == checksum:
+                return load_snapshot(snapshot_path, mode=mode)
+        except (ValueError, OSError, struct.error):
+            pass  # snapshot corrupto o de otra versión: se reconstruye
+    graph = CSRGraph.from_csv(str(nodes_csv), str(edges_csv),
+                              symmetric=symmetric, key_decimals=key_decimals)
+    write_snapshot(graph, snapshot_path, checksum=checksum)
+    return load_snapshot(snapshot_path, mode=mode)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Convert node/edge CSVs to a graph snapshot.")
+    parser.add_argument("nodes_csv")
+    parser.add_argument("edges_csv")
+    parser.add_argument("-o", "--output", help="Snapshot path (default: <region>.graph)")
+    parser.add_argument("--symmetric", action="store_true", help="Add the reverse of every edge")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    g = load_or_build(args.nodes_csv, args.edges_csv, args.output, symmetric=args.symmetric)
+    print(f"Snapshot listo: {g.num_nodes} nodos, {g.num_edges} aristas "
+          f"({time.perf_counter() - t0:.2f}s)")
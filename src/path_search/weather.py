@@ -0,0 +1,207 @@
+"""
+Campos meteorológicos dependientes del tiempo para los costos de las aristas.
+
+``costs.py`` usa ``wind_speed``, ``wave_size`` y ``risk_index`` como escalares
+fijos por arista. Un pronóstico, en cambio, es un cubo tiempo x lat x lon por
+variable. :class:`ForecastCube` guarda cada variable como un archivo binario
+crudo (float32, ``T x ny x nx``) más un ``meta.json`` con la grilla, y lo abre
+con ``np.memmap``: sólo se leen de disco las celdas que se consultan.
+
+:class:`WeatherLayer` muestrea el cubo sobre las aristas de un CSRGraph:
+
+- la celda de cada arista (la de su punto medio) se calcula una sola vez;
+- los valores se leen por *bucket* de tiempo de salida, recién cuando la
+  búsqueda llega a ese bucket, y se guardan en un LRU chico;
+- para cada bucket hay un ``CostModel`` con esas columnas, así los costos
+  salen de las mismas fórmulas vectoriales que el caso estático.
+
+Nunca se copia el grafo por paso de tiempo: por bucket sólo hay un array
+por variable (y los de costo que se pidan). ``time_dependent_a_star`` (en
+path_search.py) consulta el bucket según la hora de llegada a cada nodo.
+
+Formato en disco::
+
+    <dir>/meta.json        {"shape": [T, ny, nx], "lat0", "dlat", "lon0", "dlon",
+                            "t0", "dt_hours", "fields": [...]}
+    <dir>/<campo>.f32      float32 little-endian, C-order
+"""
+from __future__ import annotations
+
+import json
+import math
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from cost_model import CostModel
+from csr_graph import CSRGraph
+
+PathLike = Union[str, Path]
+
+# Campos del pronóstico que reemplazan columnas de edge_attrs
+WEATHER_FIELDS = ("wind_speed", "wave_size", "risk_index")
+
+
+class ForecastCube:
+    """
+    Cubos T x ny x nx memmapeados, uno por variable, sobre una grilla regular.
+
+    ``t0`` es una etiqueta (p.ej. ISO 8601 de la corrida); los tiempos que se
+    consultan son horas desde ``t0``.
+    """
+
+    def __init__(self, fields: Mapping[str, np.ndarray], lat0: float, dlat: float,
+                 lon0: float, dlon: float, dt_hours: float, t0: str = ""):
+        shapes = {f.shape for f in fields.values()}
+        if len(shapes) != 1 or len(next(iter(shapes))) != 3:
+            raise ValueError("All forecast fields must share the same (T, ny, nx) shape")
+        if dt_hours <= 0:
+            raise ValueError("dt_hours must be positive")
+        self.fields = dict(fields)
+        self.shape: Tuple[int, int, int] = next(iter(shapes))
+        self.lat0, self.dlat = float(lat0), float(dlat)
+        self.lon0, self.dlon = float(lon0), float(dlon)
+        self.dt_hours = float(dt_hours)
+        self.t0 = t0
+
+    @property
+    def steps(self) -> int:
+        return self.shape[0]
+
+    def cell_index(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Celda más cercana (fila, columna) de cada punto; fuera de la grilla se
+        recorta al borde. La longitud se toma módulo 360 alrededor del centro
+        de la grilla, así sirve igual una grilla en [-180, 180) o en [0, 360).
+        """
+        _, ny, nx = self.shape
+        iy = np.rint((np.asarray(lats, dtype=np.float64) - self.lat0) / self.dlat)
+        center = self.lon0 + 0.5 * self.dlon * (nx - 1)
+        rel = (np.asarray(lons, dtype=np.float64) - center + 180.0) % 360.0 - 180.0
+        ix = np.rint((rel + center - self.lon0) / self.dlon)
+        return (np.clip(iy, 0, ny - 1).astype(np.int32), np.clip(ix, 0, nx - 1).astype(np.int32))
+
+    def step_of(self, hours: float) -> int:
+        """Paso del pronóstico vigente ``hours`` horas después de ``t0`` (recortado)."""
+        return min(max(int(math.floor(hours / self.dt_hours)), 0), self.steps - 1)
+
+    # ------------------------------------------------------------ persistencia
+    @classmethod
+    def write(cls, path: PathLike, fields: Mapping[str, np.ndarray], lat0: float, dlat: float,
+              lon0: float, dlon: float, dt_hours: float, t0: str = "") -> "ForecastCube":
+        """Escribe los cubos en ``path`` (directorio) y los devuelve abiertos en modo lectura."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        shape = None
+        for name, data in fields.items():
+            data = np.ascontiguousarray(data, dtype="<f4")
+            shape = data.shape
+            data.tofile(path / f"{name}.f32")
+        meta = {"shape": list(shape or ()), "lat0": lat0, "dlat": dlat, "lon0": lon0, "dlon": dlon,
+                "dt_hours": dt_hours, "t0": t0, "fields": list(fields)}
+        (path / "meta.json").write_text(json.dumps(meta, indent=2))
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path: PathLike) -> "ForecastCube":
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        shape = tuple(meta["shape"])
+        fields = {name: np.memmap(path / f"{name}.f32", dtype="<f4", mode="r", shape=shape)
+                  for name in meta["fields"]}
+        return cls(fields, meta["lat0"], meta["dlat"], meta["lon0"], meta["dlon"],
+                   meta["dt_hours"], meta.get("t0", ""))
+
+
+class WeatherLayer:
+    """
+    Pronóstico muestreado sobre las aristas de un grafo, por bucket de tiempo.
+
+    ``bucket_hours`` (por defecto el paso del cubo) agrupa las horas de salida:
+    todas las aristas atravesadas dentro del mismo bucket usan el mismo paso
+    del pronóstico. Se guardan a lo sumo ``max_buckets`` buckets muestreados.
+    """
+
+    def __init__(self, graph: CSRGraph, cube: ForecastCube, bucket_hours: Optional[float] = None,
+                 max_buckets: int = 16):
+        self.graph = graph
+        self.cube = cube
+        self.bucket_hours = float(bucket_hours or cube.dt_hours)
+        self.max_buckets = max_buckets
+        self._cells: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._models: "OrderedDict[int, CostModel]" = OrderedDict()
+        self._lock = threading.Lock()  # la API consulta buckets desde varios hilos
+
+    @property
+    def num_buckets(self) -> int:
+        return max(1, math.ceil(self.cube.steps * self.cube.dt_hours / self.bucket_hours))
+
+    def bucket(self, hours: float) -> int:
+        """Bucket de una hora (desde ``cube.t0``); fuera del horizonte se usa el último."""
+        return min(max(int(hours // self.bucket_hours), 0), self.num_buckets - 1)
+
+    def _edge_cells(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._cells is None:
+            self._cells = self.cube.cell_index(*self.graph.edge_midpoints())
+        return self._cells
+
+    def edge_fields(self, bucket: int) -> Dict[str, np.ndarray]:
+        """Valores (m,) de cada variable del cubo sobre las aristas, para un bucket."""
+        return self.model(bucket).columns
+
+    def model(self, bucket: int) -> CostModel:
+        """``CostModel`` del bucket (columnas meteorológicas reemplazadas)."""
+        with self._lock:
+            model = self._models.get(bucket)
+            if model is not None:
+                self._models.move_to_end(bucket)
+                return model
+        iy, ix = self._edge_cells()
+        step = self.cube.step_of(bucket * self.bucket_hours)
+        columns = {name: np.asarray(field[step])[iy, ix]
+                   for name, field in self.cube.fields.items() if name in WEATHER_FIELDS}
+        model = CostModel(self.graph, max_cached=4, columns=columns)
+        with self._lock:
+            model = self._models.setdefault(bucket, model)  # otro hilo pudo muestrearlo antes
+            self._models.move_to_end(bucket)
+            while len(self._models) > self.max_buckets:
+                self._models.popitem(last=False)
+        return model
+
+    def tables(self, bucket: int, objective: str, **params: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ``(costo, horas)`` por arista en ese bucket: el costo del objetivo y
+        la duración según ``cost_time`` (con los ``wind_factor``/``nominal_sp``
+        de ``params`` si vienen). Son arrays de NumPy de solo lectura, no
+        listas: una búsqueda suele tocar pocas aristas de cada bucket.
+        """
+        model = self.model(bucket)
+        timing = {k: params[k] for k in ("wind_factor", "nominal_sp") if k in params}
+        return model.costs(objective, **params), model.costs("time", **timing)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+
+def synthetic_cube(graph: CSRGraph, path: PathLike, steps: int = 24, dt_hours: float = 6.0,
+                   resolution: float = 0.25, seed: int = 0) -> ForecastCube:
+    """
+    Cubo sintético (frente que se desplaza hacia el este) que cubre el grafo.
+    Sirve para probar la capa sin datos reales de pronóstico.
+    """
+    rng = np.random.default_rng(seed)
+    lat0, lat1 = float(graph.lats.min()) - resolution, float(graph.lats.max()) + resolution
+    lon0, lon1 = float(graph.lons.min()) - resolution, float(graph.lons.max()) + resolution
+    lats = np.arange(lat0, lat1 + resolution, resolution)
+    lons = np.arange(lon0, lon1 + resolution, resolution)
+    t = np.arange(steps)[:, None, None]
+    phase = np.radians(lons)[None, None, :] * 8 - 0.4 * t
+    front = 0.5 + 0.5 * np.sin(phase) * np.cos(np.radians(lats))[None, :, None]
+    noise = rng.random((steps, len(lats), len(lons))) * 0.1
+    fields = {"wind_speed": (0.3 * front + noise).astype(np.float32),
+              "wave_size": (2.0 * front + noise).astype(np.float32)}
+    return ForecastCube.write(path, fields, lat0, resolution, lon0, resolution, dt_hours, t0="synthetic")
@@ -0,0 +1,133 @@
+"""Fixtures comunes: un grafo marítimo chico generado en un directorio temporal
+y sus distancias mínimas de referencia (Dijkstra de scipy)."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# los módulos de path_search se importan "planos", como desde la API; los del
+# builder (src/df) también, detrás de los de path_search
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC / "path_search"))
+sys.path.append(str(SRC / "df"))
+sys.path.append(str(SRC))  # paquete api
+
+from geo import EARTH_RADIUS_KM  # noqa: E402
+
+
+def _great_circle_km(lat1, lon1, lat2, lon2):
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    a = (np.sin((p2 - p1) / 2) ** 2
+         + np.cos(p1) * np.cos(p2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def write_grid_csv(directory: Path, rows: int = 12, cols: int = 14, seed: int = 0):
+    """
+    Grilla de 0.25° con vecinos en 8 direcciones y algunas celdas de "tierra"
+    (sin nodo). Cada arista dirigida tiene su propio recargo (>= 0) sobre el
+    gran círculo, así los costos de ida y vuelta difieren.
+    """
+    rng = np.random.default_rng(seed)
+    lats = (-10.0 + 0.25 * np.arange(rows)).tolist()
+    lons = (170.0 + 0.25 * np.arange(cols)).tolist()
+    land = rng.random((rows, cols)) < 0.12
+    nodes_csv = directory / "test_nodes.csv"
+    edges_csv = directory / "test_edges.csv"
+    with open(nodes_csv, "w") as f:
+        f.write("latitud,longitud,profundidad,\n")
+        for i in range(rows):
+            for j in range(cols):
+                if land[i, j]:
+                    continue
+                f.write(f"{lats[i]!r},{lons[j]!r},{-float(rng.integers(5, 4000))!r},\n")
+    with open(edges_csv, "w") as f:
+        f.write("lat_origen,lon_origen,lat_destino,lon_destino,distancia_km\n")
+        for i in range(rows):
+            for j in range(cols):
+                if land[i, j]:
+                    continue
+                for di in (-1, 0, 1):
+                    for dj in (-1, 0, 1):
+                        a, b = i + di, j + dj
+                        if (di, dj) == (0, 0) or not (0 <= a < rows and 0 <= b < cols) or land[a, b]:
+                            continue
+                        d = float(_great_circle_km(lats[i], lons[j], lats[a], lons[b]) * (1 + rng.random()))
+                        f.write(f"{lats[i]!r},{lons[j]!r},{lats[a]!r},{lons[b]!r},{d!r}\n")
+    return nodes_csv, edges_csv
+
+
+@pytest.fixture
+def grid_csv(tmp_path):
+    return write_grid_csv(tmp_path)
+
+
+@pytest.fixture
+def api_client(grid_csv, monkeypatch):
+    """La API sobre la grilla de prueba (sin pool de procesos para /matrix)."""
+    from fastapi.testclient import TestClient
+
+    from api import graph_api
+
+    nodes_csv, edges_csv = grid_csv
+    monkeypatch.setenv("DATA_DIR", str(nodes_csv.parent))
+    monkeypatch.setenv("NODES_CSV", nodes_csv.name)
+    monkeypatch.setenv("EDGES_CSV", edges_csv.name)
+    monkeypatch.setenv("GRAPH_SYMMETRIC", "0")  # la grilla ya trae las dos direcciones
+    monkeypatch.setattr(graph_api, "MATRIX_WORKERS", 0)
+    monkeypatch.setattr(graph_api, "ADMIN_TOKEN", "test-token")
+    with TestClient(graph_api.app, headers={"X-Admin-Token": "test-token"}) as client:
+        yield client
+
+
+@pytest.fixture
+def grid_graph(grid_csv):
+    from snapshot import load_or_build
+
+    return load_or_build(*grid_csv)
+
+
+def _distances(graph):
+    return np.asarray(graph.edge_attrs["distance"], dtype=np.float64)
+
+
+@pytest.fixture
+def reference(grid_graph):
+    """Todas las distancias mínimas con Dijkstra de scipy (la grilla no tiene aristas repetidas)."""
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+
+    n = grid_graph.num_nodes
+    sources = np.repeat(np.arange(n), np.diff(np.asarray(grid_graph.offsets)))
+    matrix = csr_matrix((_distances(grid_graph), (sources, np.asarray(grid_graph.targets))), shape=(n, n))
+    return dijkstra(matrix, directed=True)
+
+
+@pytest.fixture
+def pairs(reference):
+    """40 pares (origen, destino) distintos y conectados, siempre los mismos."""
+    rng = np.random.default_rng(1)
+    n = reference.shape[0]
+    found = []
+    while len(found) < 40:
+        s, t = (int(x) for x in rng.choice(n, size=2, replace=False))
+        if np.isfinite(reference[s, t]):
+            found.append((s, t))
+    return found
+
+
+@pytest.fixture
+def path_cost(grid_graph):
+    """``path_cost(path)``: suma de la arista más barata entre nodos consecutivos."""
+    offsets, targets = np.asarray(grid_graph.offsets), np.asarray(grid_graph.targets)
+    weights = _distances(grid_graph)
+
+    def cost(path):
+        total = 0.0
+        for u, v in zip(path, path[1:]):
+            edges = np.arange(offsets[u], offsets[u + 1])
+            total += float(weights[edges[targets[edges] == v]].min())
+        return total
+
+    return cost
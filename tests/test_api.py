@@ -0,0 +1,113 @@
+"""Endpoints de la API sobre la grilla de prueba, contra Dijkstra de scipy."""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from draft_classes import DraftClasses
+
+
+def _dijkstra(graph, mask):
+    """Distancias mínimas usando sólo las aristas de ``mask``."""
+    n = graph.num_nodes
+    sources = np.repeat(np.arange(n), np.diff(np.asarray(graph.offsets)))[mask]
+    weights = np.asarray(graph.edge_attrs["distance"], dtype=np.float64)[mask]
+    return dijkstra(csr_matrix((weights, (sources, np.asarray(graph.targets)[mask])), shape=(n, n)))
+
+
+def _point(graph, node):
+    lat, lon = graph.coord(node)
+    return {"lat": lat, "lon": lon}
+
+
+def test_route_is_optimal_and_reuses_the_loaded_graph(api_client, grid_graph, reference, pairs):
+    graph = api_client.app.state.graph
+    for s, t in pairs[:10]:
+        resp = api_client.post("/route", json={"origin": _point(grid_graph, s),
+                                               "destination": _point(grid_graph, t)})
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        assert body["node_ids"][0] == s and body["node_ids"][-1] == t
+        assert body["snapped"]["origin"]["distance_km"] == pytest.approx(0.0, abs=1e-6)
+        assert body["total_distance_km"] == pytest.approx(reference[s, t], rel=1e-6)
+        assert body["total_cost"] == pytest.approx(reference[s, t], rel=1e-6)
+    assert api_client.app.state.graph is graph  # cargado una vez, en el arranque
+
+
+@pytest.mark.parametrize("mode", ["forward", "bidirectional"])
+def test_route_modes_agree(api_client, grid_graph, reference, pairs, mode):
+    s, t = pairs[0]
+    body = api_client.post("/route", json={"origin": _point(grid_graph, s), "destination": _point(grid_graph, t),
+                                           "mode": mode}).json()
+    assert body["total_distance_km"] == pytest.approx(reference[s, t], rel=1e-6)
+
+
+def test_route_rejects_bad_requests(api_client, grid_graph):
+    origin, destination = _point(grid_graph, 0), _point(grid_graph, grid_graph.num_nodes - 1)
+    for extra in ({"objective": "speed"}, {"mode": "sideways"}, {"vessel_profile": "kayak"}):
+        resp = api_client.post("/route", json={"origin": origin, "destination": destination, **extra})
+        assert resp.status_code == 422, extra
+    far = api_client.post("/route", json={"origin": {"lat": 40.0, "lon": -30.0}, "destination": destination})
+    assert far.status_code == 422
+    budget = api_client.post("/route", json={"origin": origin, "destination": destination, "max_expansions": 3})
+    assert budget.status_code == 503 and budget.headers["Retry-After"]
+
+
+def test_health(api_client):
+    assert api_client.get("/health").json() == {"ok": True}
+
+
+def test_matrix_matches_dijkstra(api_client, grid_graph, reference):
+    nodes = [0, 17, 55, grid_graph.num_nodes - 1]
+    points = [_point(grid_graph, n) for n in nodes]
+    body = api_client.post("/matrix", json={"origins": points, "include_paths": True}).json()
+    costs = np.array([[np.inf if c is None else c for c in row] for row in body["costs"]])
+    np.testing.assert_allclose(costs, reference[np.ix_(nodes, nodes)], rtol=1e-6)
+    for i, s in enumerate(nodes):
+        for j, t in enumerate(nodes):
+            path = body["paths"][i][j]
+            assert path[0] == s and path[-1] == t
+    # con calado: los puntos se "snapean" a nodos navegables y las aristas
+    # no navegables cuentan como inexistentes
+    deep = api_client.post("/matrix", json={"origins": points, "vessel_profile": 3000.0}).json()
+    snapped = [snap["node_id"] for snap in deep["origins"]]
+    mask = DraftClasses(grid_graph).edge_mask(3000.0)
+    expected = _dijkstra(grid_graph, mask)[np.ix_(snapped, snapped)]
+    costs = np.array([[np.inf if c is None else c for c in row] for row in deep["costs"]])
+    np.testing.assert_allclose(costs, expected, rtol=1e-6)
+    assert np.all(costs >= reference[np.ix_(snapped, snapped)] * (1 - 1e-9))
+    too_many = api_client.post("/matrix", json={"origins": [points[0]] * 101})
+    assert too_many.status_code == 422
+
+
+def test_many_to_many_in_chunks(grid_graph, reference, monkeypatch):
+    import path_search
+
+    monkeypatch.setattr(path_search, "_WORKER_GRAPH", grid_graph)  # lo que hace init_matrix_worker
+    weights = np.asarray(grid_graph.edge_attrs["distance"], dtype=np.float64)
+    sources, targets = list(range(0, 60, 7)), list(range(3, 90, 11))
+    with ThreadPoolExecutor(3) as pool:
+        matrix, _ = path_search.many_to_many(grid_graph, sources, targets, weights, executor=pool, workers=3)
+    np.testing.assert_allclose(matrix, reference[np.ix_(sources, targets)], rtol=1e-6)
+
+
+def test_isochrone_matches_dijkstra(api_client, grid_graph, reference):
+    source = 40
+    budget = float(np.median(reference[source][np.isfinite(reference[source])]))
+    body = api_client.post("/isochrone", json={"origin": _point(grid_graph, source), "budget": budget,
+                                               "objective": "distance", "include_nodes": True}).json()
+    inside = np.flatnonzero(reference[source] <= budget)
+    assert body["reachable_count"] == len(inside)
+    assert sorted(body["node_ids"]) == inside.tolist()
+    np.testing.assert_allclose(body["node_costs"], reference[source, body["node_ids"]], rtol=1e-6)
+    assert body["node_costs"] == sorted(body["node_costs"]) and body["max_cost"] <= budget
+    # borde: alcanzables con alguna arista hacia un nodo fuera del presupuesto
+    reached = np.zeros(grid_graph.num_nodes, dtype=bool)
+    reached[inside] = True
+    boundary = {grid_graph.coord(u) for u in inside.tolist()
+                if any(not reached[v] for v in grid_graph.get_neighbors(u))}
+    assert {(c["lat"], c["lon"]) for c in body["boundary"]} == boundary
+    assert body["hull"][0] == body["hull"][-1]
+    assert api_client.post("/isochrone", json={"origin": _point(grid_graph, source), "budget": -1}).status_code == 422
@@ -0,0 +1,44 @@
+"""El A* bidireccional encuentra los mismos caminos óptimos que Dijkstra."""
+import numpy as np
+import pytest
+
+from costs import cost_distance
+from csr_graph import CSRGraph
+from heuristicas_geo import GeoHeuristic
+from landmarks import ALTHeuristic, LandmarkTables
+from path_search import a_star, bidirectional_a_star
+
+
+@pytest.mark.parametrize("heuristic", ["zero", "geo", "alt"])
+def test_bidirectional_a_star_matches_dijkstra(grid_graph, reference, pairs, path_cost, heuristic):
+    geo = GeoHeuristic.for_distance(grid_graph)
+    h = {"zero": lambda v, goal: 0.0,
+         "geo": geo,
+         "alt": ALTHeuristic(LandmarkTables.build(grid_graph, k=4), fallback=geo)}[heuristic]
+    for s, t in pairs:
+        path = bidirectional_a_star(s, t, grid_graph.get_neighbors, cost_distance, h, grid_graph)
+        assert path[0] == s and path[-1] == t
+        assert path_cost(path) == pytest.approx(reference[s, t], rel=1e-6)
+
+
+def test_bidirectional_expands_less_than_one_sided(grid_graph, pairs):
+    geo = GeoHeuristic.for_distance(grid_graph)
+    one_sided = both = 0
+    for s, t in pairs:
+        stats = {}
+        a_star(s, t, grid_graph.get_neighbors, cost_distance, lambda v, goal: 0.0, grid_graph, stats=stats)
+        one_sided += stats["expanded"]
+        stats = {}
+        bidirectional_a_star(s, t, grid_graph.get_neighbors, cost_distance, geo, grid_graph, stats=stats)
+        assert stats["expanded"] == stats["expanded_forward"] + stats["expanded_backward"]
+        both += stats["expanded"]
+    assert both < one_sided
+
+
+def test_unreachable_goal_returns_none():
+    # 0 -> 1 -> 2 dirigido: de 2 no se vuelve a 0
+    g = CSRGraph.from_edge_list(np.zeros(3), np.array([0.0, 0.1, 0.2]), -np.ones(3), [0, 1], [1, 2],
+                                {"distance": np.array([11.0, 11.0])})
+    geo = GeoHeuristic.for_distance(g)
+    assert bidirectional_a_star(0, 2, g.get_neighbors, cost_distance, geo, g) == [0, 1, 2]
+    assert bidirectional_a_star(2, 0, g.get_neighbors, cost_distance, geo, g) is None
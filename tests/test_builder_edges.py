@@ -0,0 +1,36 @@
+"""Aristas del builder (src/df/edges.py): profundidad de las aristas con puertos."""
+import numpy as np
+import pandas as pd
+
+from csr_graph import CSRGraph
+from draft_classes import DraftClasses
+from edges import port_edge_depth
+
+
+def test_port_edge_depth():
+    # nodos 0-1 oceánicos (elevación negativa), 2-3 puertos (elevación 0)
+    elevation = np.array([-20.0, -8.0, 0.0, 0.0])
+    src = np.array([0, 2, 1, 2])
+    dst = np.array([2, 1, 3, 3])
+    depth = port_edge_depth(src, dst, elevation, n_ocean=2)
+    np.testing.assert_array_equal(depth[:3], [20.0, 8.0, 8.0])
+    assert np.isnan(depth[3])
+
+
+def test_port_to_port_edge_is_navigable(tmp_path):
+    # como en el builder, los puertos van después de los nodos oceánicos
+    lats = np.array([-34.95, -34.90, -34.91])
+    lons = np.array([-56.30, -56.20, -56.21])
+    elevation = np.array([-30.0, 0.0, 0.0])  # un nodo oceánico y dos puertos
+    src, dst = np.array([1, 2, 0]), np.array([2, 0, 1])
+    nodes_csv, edges_csv = tmp_path / "p_nodes.csv", tmp_path / "p_edges.csv"
+    pd.DataFrame({"latitud": lats, "longitud": lons, "profundidad": elevation}).to_csv(nodes_csv, index=False)
+    pd.DataFrame({"lat_origen": lats[src], "lon_origen": lons[src], "lat_destino": lats[dst],
+                  "lon_destino": lons[dst], "distancia_km": [1.4, 6.0, 7.2],
+                  "depth_min": port_edge_depth(src, dst, elevation, n_ocean=1)}).to_csv(edges_csv, index=False)
+
+    graph = CSRGraph.from_csv(str(nodes_csv), str(edges_csv))
+    mask = DraftClasses(graph).edge_mask("panamax")
+    port_to_port = graph.get_edge_data(graph.node_id((lats[1], lons[1])), graph.node_id((lats[2], lons[2])))
+    assert mask[port_to_port.index]
+    assert mask.all()
@@ -0,0 +1,96 @@
+"""bulk_csv lee los mismos valores que el parseo anterior con csv.reader + float()."""
+import csv
+import math
+
+import numpy as np
+import pytest
+
+from bulk_csv import column_positions, iter_columns, read_columns, read_header
+
+POSITIONS = {"lat1": 0, "lon1": 1, "lat2": 2, "lon2": 3, "distance": 4}
+REQUIRED = ("lat1", "lon1", "lat2", "lon2")
+HEADER = "lat_origen,lon_origen,lat_destino,lon_destino,distancia_km"
+
+
+def _csv_reader_columns(path, positions, required):
+    """El parseo de antes: csv.reader fila por fila y float() campo por campo."""
+    columns = {name: [] for name in positions}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = [row for row in csv.reader(f) if any(field.strip() for field in row)]
+    header = [field.strip() for field in rows[0]]
+    for row in rows[1:]:
+        if [field.strip() for field in row] == header:  # CSV concatenados (antes: ValueError)
+            continue
+        values = {}
+        for name, pos in positions.items():
+            try:
+                values[name] = float(row[pos]) if pos < len(row) and row[pos].strip() else math.nan
+            except ValueError:
+                values[name] = math.nan
+        if any(math.isnan(values[name]) for name in required):
+            continue
+        for name, value in values.items():
+            columns[name].append(value)
+    return {name: np.array(values, dtype=np.float64) for name, values in columns.items()}
+
+
+def _rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        lat1, lon1, lat2, lon2 = rng.uniform(-90, 90), rng.uniform(-180, 180), rng.uniform(-90, 90), 0.1
+        yield f"{lat1!r},{lon1!r},{lat2!r},{lon2!r},{rng.uniform(0, 5000)!r}"
+
+
+def _write(path, lines, bom=False):
+    path.write_text(("﻿" if bom else "") + "\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def _assert_same(path, chunk_rows):
+    expected = _csv_reader_columns(path, POSITIONS, REQUIRED)
+    got = read_columns(path, POSITIONS, chunk_rows=chunk_rows, required=REQUIRED)
+    for name in POSITIONS:
+        np.testing.assert_array_equal(got[name], expected[name])  # bit a bit, NaN incluidos
+    return expected
+
+
+@pytest.mark.parametrize("chunk_rows", [3, 1000])
+def test_bom_blank_lines_and_trailing_commas(tmp_path, chunk_rows):
+    rows = list(_rows(20))
+    lines = ["", HEADER + ","] + [r + "," for r in rows[:10]] + [""] + rows[10:]
+    path = _write(tmp_path / "edges.csv", lines, bom=True)
+    assert read_header(path) == HEADER.split(",")
+    expected = _assert_same(path, chunk_rows)
+    assert len(expected["lat1"]) == 20
+
+
+@pytest.mark.parametrize("chunk_rows", [3, 7, 1000])
+def test_repeated_header_and_text_switch_to_tolerant_reading(tmp_path, chunk_rows):
+    rows = list(_rows(30, seed=1))
+    lines = ([HEADER] + rows[:12]
+             + [HEADER]                                    # CSV concatenados
+             + rows[12:20]
+             + ["n/a,-58.1,-34.2,-57.9,12.5",              # coordenada inválida: fila descartada
+                "-34.5,-58.1,-34.2,-57.9,",                # sin distancia: NaN
+                "-34.5,-58.1,-34.2,-57.9,lejos",           # distancia no numérica: NaN
+                "-34.6,-58.2,-34.3"]                       # fila corta: descartada
+             + rows[20:])
+    path = _write(tmp_path / "edges.csv", lines)
+    expected = _assert_same(path, chunk_rows)
+    assert len(expected["lat1"]) == 32
+    assert np.isnan(expected["distance"]).sum() == 2
+    # por bloques: ninguna fila se entrega dos veces al pasar al modo tolerante
+    everything = _csv_reader_columns(path, POSITIONS, required=())
+    chunks = list(iter_columns(path, POSITIONS, chunk_rows=chunk_rows))
+    for name in POSITIONS:
+        np.testing.assert_array_equal(np.concatenate([c[name] for c in chunks]), everything[name])
+
+
+def test_missing_columns_are_reported(tmp_path):
+    path = _write(tmp_path / "nodes.csv", ["latitud,longitud,", "-34.5,-58.1,"])
+    header = read_header(path)
+    assert column_positions(header, ["latitud"], optional=["profundidad"]) == {"latitud": 0}
+    with pytest.raises(KeyError, match="profundidad"):
+        column_positions(header, ["latitud", "profundidad"], path=path)
+    empty = _write(tmp_path / "empty.csv", ["", ""])
+    assert read_columns(empty, {"lat": 0})["lat"].shape == (0,)
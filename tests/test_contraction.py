@@ -0,0 +1,24 @@
+"""Las consultas de la jerarquía de contracción dan las distancias de Dijkstra."""
+import numpy as np
+import pytest
+
+from contraction import ContractionHierarchy, load_or_build_ch
+
+
+def test_contraction_hierarchy_matches_dijkstra(grid_graph, reference, pairs, path_cost):
+    ch = ContractionHierarchy.build(grid_graph, core_size=8)
+    for s, t in pairs:
+        cost, path = ch.query(s, t)
+        assert cost == pytest.approx(reference[s, t], rel=1e-9)
+        assert path[0] == s and path[-1] == t
+        assert path_cost(path) == pytest.approx(reference[s, t], rel=1e-6)
+
+
+def test_hierarchy_is_keyed_on_graph_and_weights(grid_graph, tmp_path):
+    weights = np.asarray(grid_graph.edge_attrs["distance"], dtype=np.float64)
+    ch = load_or_build_ch(grid_graph, tmp_path / "t.ch.npz")
+    assert load_or_build_ch(grid_graph, tmp_path / "t.ch.npz").weights_digest == ch.weights_digest
+    doubled = load_or_build_ch(grid_graph, tmp_path / "t.ch.npz", weights=2 * weights)
+    assert doubled.weights_digest != ch.weights_digest
+    s, t = 0, grid_graph.num_nodes - 1
+    assert doubled.query(s, t)[0] == pytest.approx(2 * ch.query(s, t)[0])
@@ -0,0 +1,83 @@
+"""Los arrays de CostModel valen lo mismo que las funciones de costs.py arista por arista."""
+import numpy as np
+import pytest
+
+from cost_model import OBJECTIVES, CostModel
+from costs import combined_cost, cost_distance, cost_fuel, cost_safe, cost_time
+from csr_graph import CSRGraph
+from path_search import a_star
+
+
+@pytest.fixture
+def weather_graph(grid_graph):
+    """La grilla con riesgo, olas y viento al azar en cada arista."""
+    rng = np.random.default_rng(3)
+    attrs = dict(grid_graph.edge_attrs)
+    for name, high in (("risk_index", 1.0), ("wave_size", 4.0), ("wind_speed", 2.0)):
+        attrs[name] = rng.uniform(0.0, high, grid_graph.num_edges).astype(np.float32)
+    return CSRGraph(grid_graph.lats, grid_graph.lons, grid_graph.depths, grid_graph.offsets,
+                    grid_graph.targets, attrs)
+
+
+FUNCTIONS = {
+    "distance": cost_distance,
+    "fuel": cost_fuel,
+    "safe": cost_safe,
+    "time": lambda e, **p: cost_time(e, e["wind_speed"], **p),
+    "combined": combined_cost,
+}
+
+CASES = [
+    ("distance", {}),
+    ("fuel", {}),
+    ("fuel", {"w_wind": 0.3, "w_waves": 2.0}),
+    ("safe", {"w_risk": 5.0}),
+    ("time", {"nominal_sp": 18.0}),
+    ("time", {"wind_factor": 0.6}),  # velocidad efectiva <= 0 en parte de las aristas
+    ("combined", {}),
+    ("combined", {"w_fuel": 0.5, "w_time": 2.0, "w_safe": 0.1, "wind_factor": 0.2, "nominal_sp": 12.0}),
+]
+
+
+@pytest.mark.parametrize("objective, params", CASES)
+def test_arrays_match_costs_functions(weather_graph, objective, params):
+    values = CostModel(weather_graph).costs(objective, **params)
+    full = {**OBJECTIVES[objective], **params}  # cost_fuel no tiene defaults
+    expected = np.array([FUNCTIONS[objective](weather_graph.edge(i), **full)
+                         for i in range(weather_graph.num_edges)])
+    np.testing.assert_array_equal(np.isinf(values), np.isinf(expected))
+    finite = np.isfinite(expected)
+    np.testing.assert_allclose(values[finite], expected[finite], rtol=1e-9)
+    if objective == "time" and params.get("wind_factor"):
+        assert np.isinf(values).any()
+
+
+def test_a_star_costs_match(weather_graph, pairs):
+    model = CostModel(weather_graph)
+    table = model.cost_fn("combined", w_time=2.0)
+    values = model.costs("combined", w_time=2.0)
+    for s, t in pairs[:10]:
+        with_table = a_star(s, t, weather_graph.get_neighbors, table, lambda v, goal: 0.0, weather_graph)
+        with_fn = a_star(s, t, weather_graph.get_neighbors, lambda e: combined_cost(e, w_time=2.0),
+                         lambda v, goal: 0.0, weather_graph)
+        cost = [sum(values[weather_graph.get_edge_data(u, v).index] for u, v in zip(p, p[1:]))
+                for p in (with_table, with_fn)]
+        assert cost[0] == pytest.approx(cost[1], rel=1e-9)
+
+
+def test_cache_key_covers_defaults_and_is_shared(weather_graph):
+    model = CostModel(weather_graph)
+    assert model.key("fuel") == model.key("fuel", **OBJECTIVES["fuel"])
+    assert model.cost_fn("fuel") is model.cost_fn("fuel", w_wind=1.0)
+    assert not model.costs("fuel").flags.writeable
+    with pytest.raises(ValueError):
+        model.key("speed")
+    with pytest.raises(TypeError):
+        model.key("fuel", w_risk=1.0)
+
+
+def test_columns_override_graph_attributes(weather_graph):
+    calm = np.zeros(weather_graph.num_edges, dtype=np.float32)
+    model = CostModel(weather_graph, columns={"wind_speed": calm, "wave_size": calm})
+    np.testing.assert_array_equal(model.costs("fuel"), np.zeros(weather_graph.num_edges))
+    np.testing.assert_allclose(model.costs("safe"), np.asarray(weather_graph.edge_attrs["risk_index"]), rtol=1e-9)
@@ -0,0 +1,44 @@
+"""El CSRGraph cargado del CSV es el mismo grafo que el dict de ``Graph`` y A* sobre él es óptimo."""
+import numpy as np
+import pytest
+
+from costs import cost_distance
+from csr_graph import CSRGraph
+from graph import Graph
+from heuristicas_geo import GeoHeuristic
+from path_search import a_star
+
+
+def test_csr_matches_dict_graph(grid_csv):
+    nodes_csv, edges_csv = grid_csv
+    g = Graph()
+    g.load_data(str(nodes_csv), str(edges_csv))
+    csr = CSRGraph.from_csv(str(nodes_csv), str(edges_csv))
+    assert csr.num_nodes == len(g._graph)
+    assert csr.num_edges == sum(len(data["neighbors"]) for data in g._graph.values())
+    for key, data in g._graph.items():
+        u = csr.node_id(key)
+        assert csr.coord(u) == key
+        assert csr.get_vertex_depth(u) == pytest.approx(data["depth"])
+        assert sorted(csr.coords_of(csr.get_neighbors(u))) == sorted(data["neighbors"])
+        assert sorted(csr.coords_of(csr.get_predecessors(u))) == sorted(data["predecessors"])
+        for nb, edata in data["neighbors"].items():
+            assert csr.get_edge_data(u, csr.node_id(nb))["distance"] == pytest.approx(edata["distance"], rel=1e-6)
+
+
+def test_from_edge_list_keeps_last_duplicate_and_mirrors():
+    lats, lons, depths = np.zeros(3), np.arange(3.0), -np.ones(3)
+    g = CSRGraph.from_edge_list(lats, lons, depths, [0, 1, 0], [1, 2, 1],
+                                {"distance": np.array([5.0, 2.0, 3.0])}, symmetric=True)
+    assert np.asarray(g.offsets).tolist() == [0, 1, 3, 4]
+    assert g.get_edge_data(0, 1)["distance"] == 3.0
+    assert g.get_edge_data(2, 1)["distance"] == 2.0
+    assert not g.edge_exists(0, 2)
+
+
+def test_a_star_matches_dijkstra(grid_graph, reference, pairs, path_cost):
+    geo = GeoHeuristic.for_distance(grid_graph)
+    for s, t in pairs:
+        path = a_star(s, t, grid_graph.get_neighbors, cost_distance, geo, grid_graph)
+        assert path[0] == s and path[-1] == t
+        assert path_cost(path) == pytest.approx(reference[s, t], rel=1e-6)
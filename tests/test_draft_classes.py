@@ -0,0 +1,44 @@
+"""Las vistas por calado recorren las mismas rutas que el chequeo de profundidad por vecino."""
+import numpy as np
+import pytest
+
+from cost_model import CostModel
+from costs import cost_distance
+from draft_classes import VESSEL_PROFILES, DraftClasses
+from heuristicas_geo import GeoHeuristic
+from path_search import a_star, min_depth_fn
+
+
+@pytest.mark.parametrize("draft", [400.0, 1500.0])
+def test_view_matches_per_neighbour_depth_check(grid_graph, pairs, draft):
+    # la grilla no trae depth_min: la holgura es la profundidad del nodo destino
+    view = DraftClasses(grid_graph).view(draft)
+    assert 0 < view.num_edges < grid_graph.num_edges
+    table = CostModel(grid_graph).cost_fn("distance")
+    geo = GeoHeuristic.for_distance(grid_graph)
+    costs = np.asarray(grid_graph.edge_attrs["distance"], dtype=np.float64)
+    found = 0
+    for s, t in pairs:
+        checked = a_star(s, t, grid_graph.get_neighbors, cost_distance, geo, grid_graph,
+                         min_depth_fn=min_depth_fn, ship_draft=draft)
+        masked = a_star(s, t, view.get_neighbors, table, geo, view)
+        assert (checked is None) == (masked is None)
+        if masked is None:
+            continue
+        found += 1
+        ids = [view.get_edge_data(u, v).index for u, v in zip(masked, masked[1:])]
+        assert all(grid_graph.get_edge_data(u, v).index == i for (u, v), i in zip(zip(masked, masked[1:]), ids))
+        expected = sum(grid_graph.get_edge_data(u, v)["distance"] for u, v in zip(checked, checked[1:]))
+        assert costs[ids].sum() == pytest.approx(expected, rel=1e-6)
+    assert found > 0
+
+
+def test_class_masks_match_clearance(grid_graph):
+    classes = DraftClasses(grid_graph)
+    for name, draft in VESSEL_PROFILES.items():
+        np.testing.assert_array_equal(classes.edge_mask(name), classes.clearance >= draft)
+    # calado que no es de ninguna clase: se compara con la holgura directamente
+    np.testing.assert_array_equal(classes.edge_mask(800.0), classes.clearance >= 800.0)
+    assert classes.view("panamax") is classes.view(VESSEL_PROFILES["panamax"])
+    with pytest.raises(ValueError):
+        classes.edge_mask("kayak")
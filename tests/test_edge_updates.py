@@ -0,0 +1,107 @@
+"""Actualizaciones de aristas en memoria e invalidación selectiva (edge_updates, route_cache)."""
+import numpy as np
+import pytest
+
+from api.route_cache import RouteCache
+from cost_model import CostModel
+from draft_classes import DraftClasses
+from edge_updates import EdgeUpdate, apply_updates, lon_interval
+
+
+def _column(graph, name):
+    return np.array(graph.edge_attrs[name])
+
+
+def test_invalid_batch_leaves_graph_untouched(grid_graph):
+    before = {name: _column(grid_graph, name) for name in grid_graph.edge_attrs}
+    batch = [EdgeUpdate("wind_speed", 5.0, edges=[0, 1]),
+             EdgeUpdate("wave_size", 2.0, edges=[grid_graph.num_edges])]  # fuera de rango
+    with pytest.raises(ValueError):
+        apply_updates(grid_graph, batch)
+    for bad in (EdgeUpdate("nope", 1.0, edges=[0]), EdgeUpdate("wind_speed", float("nan"), edges=[0])):
+        with pytest.raises(ValueError):
+            apply_updates(grid_graph, [EdgeUpdate("risk_index", 3.0, edges=[2]), bad])
+    assert grid_graph.version == 0
+    for name, values in before.items():
+        np.testing.assert_array_equal(_column(grid_graph, name), values)
+
+
+def test_report_keeps_previous_values(grid_graph):
+    old = _column(grid_graph, "wind_speed")[[3, 4]]
+    report = apply_updates(grid_graph, [EdgeUpdate("wind_speed", 7.0, edges=[4, 3])])
+    assert report.version == grid_graph.version == 1
+    np.testing.assert_array_equal(report.edge_ids, [3, 4])
+    np.testing.assert_array_equal(report.previous["wind_speed"], old)
+    np.testing.assert_array_equal(_column(grid_graph, "wind_speed")[[3, 4]], [7.0, 7.0])
+
+
+def test_lon_interval_wraps_the_antimeridian():
+    assert lon_interval([-10.0, 20.0, 5.0]) == (-10.0, 20.0)
+    assert lon_interval([179.5, -179.8, 178.0]) == (178.0, -179.8)
+    assert lon_interval([190.0, 175.0]) == (175.0, -170.0)
+
+
+def test_report_bbox_across_the_antimeridian(grid_graph):
+    # la grilla de prueba cubre 170°E..173.25°E; se la corre para que cruce ±180
+    lons = np.asarray(grid_graph.lons, dtype=np.float64) + 8.0
+    grid_graph.lons = (lons + 180.0) % 360.0 - 180.0
+    report = apply_updates(grid_graph, [EdgeUpdate("risk_index", 1.0, bbox=(-90.0, 179.0, 90.0, -179.0))])
+    assert len(report.edge_ids)
+    lat_min, lon_min, lat_max, lon_max = report.bbox
+    assert lon_min > lon_max  # cruza: no es un rectángulo de casi 360°
+    assert lon_min >= 178.5 and lon_max <= -178.5
+
+
+@pytest.mark.parametrize("wind_factor, increased", [(0.1, True), (-0.1, False), (0.0, True)])
+def test_only_increased_follows_the_objective_weights(grid_graph, wind_factor, increased):
+    model = CostModel(grid_graph)
+    report = apply_updates(grid_graph, [EdgeUpdate("wind_speed", 3.0, edges=range(20))])
+    key = model.key("time", wind_factor=wind_factor)
+    assert model.only_increased(report, key) is increased
+    assert model.only_increased(report, model.key("distance"))  # no depende del viento
+
+
+def test_only_restricted_follows_clearance(grid_graph):
+    classes = DraftClasses(grid_graph)
+    shallower = apply_updates(grid_graph, [EdgeUpdate("depth_min", 1.0, edges=[0])])
+    assert classes.only_restricted(shallower)
+    deeper = apply_updates(grid_graph, [EdgeUpdate("depth_min", 500.0, edges=[0])])
+    assert not classes.only_restricted(deeper)
+
+
+def _cache_with_routes(graph, model):
+    cache = RouteCache()
+    offsets, targets = np.asarray(graph.offsets), np.asarray(graph.targets)
+    routes = {}
+    for name, start in (("a", 0), ("b", graph.num_nodes // 2)):
+        path = [start, int(targets[offsets[start]])]
+        key = RouteCache.key(path[0], path[-1], None, model.key("time", wind_factor=0.1), graph)
+        cache.put(key, path, 1.0, 1.0, 1)
+        routes[name] = (key, path, int(offsets[start]))
+    return cache, routes
+
+
+def test_route_cache_keeps_and_rekeys_untouched_routes(grid_graph):
+    model = CostModel(grid_graph)
+    cache, routes = _cache_with_routes(grid_graph, model)
+    edge_a = routes["a"][2]
+    report = apply_updates(grid_graph, [EdgeUpdate("wind_speed", 5.0, edges=[edge_a])])
+    dropped = cache.apply_update(report, grid_graph,
+                                 lambda cost_key, draft: model.only_increased(report, cost_key))
+    assert dropped == 1  # la ruta "a" usa la arista tocada
+    key_b, path_b, _ = routes["b"]
+    assert cache.get(key_b) is None  # la clave vieja ya no sirve
+    rekeyed = RouteCache.key(path_b[0], path_b[-1], None, key_b[3], grid_graph)
+    assert cache.get(rekeyed).path.tolist() == path_b
+
+
+def test_route_cache_drops_everything_when_costs_drop(grid_graph):
+    model = CostModel(grid_graph)
+    cache, routes = _cache_with_routes(grid_graph, model)
+    far_edge = grid_graph.num_edges - 1  # no la usa ninguna ruta
+    report = apply_updates(grid_graph, [EdgeUpdate("distance", 0.0, edges=[far_edge])])
+    dropped = cache.apply_update(report, grid_graph,
+                                 lambda cost_key, draft: model.only_increased(report, cost_key))
+    assert dropped == 2
+    assert cache.get(RouteCache.key(routes["b"][1][0], routes["b"][1][-1], None,
+                                    routes["b"][0][3], grid_graph)) is None
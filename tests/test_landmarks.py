@@ -0,0 +1,41 @@
+"""ALT: la cota de los landmarks es admisible y A* con ella encuentra el óptimo."""
+import math
+
+import numpy as np
+import pytest
+
+from costs import cost_distance
+from heuristicas_geo import GeoHeuristic
+from landmarks import ALTHeuristic, LandmarkTables, load_or_build_landmarks
+from path_search import a_star
+
+
+def test_alt_a_star_matches_dijkstra(grid_graph, reference, pairs, path_cost):
+    alt = ALTHeuristic(LandmarkTables.build(grid_graph, k=4), fallback=GeoHeuristic.for_distance(grid_graph))
+    for s, t in pairs:
+        path = a_star(s, t, grid_graph.get_neighbors, cost_distance, alt.for_goal(t), grid_graph)
+        assert path_cost(path) == pytest.approx(reference[s, t], rel=1e-6)
+
+
+def test_alt_heuristic_is_admissible(grid_graph, reference):
+    alt = ALTHeuristic(LandmarkTables.build(grid_graph, k=4))
+    nodes = np.arange(grid_graph.num_nodes)
+    for t in (0, grid_graph.num_nodes // 2, grid_graph.num_nodes - 1):
+        to_goal = reference[:, t]
+        h = alt.for_goal(t).many(nodes, t)
+        reachable = np.isfinite(to_goal)
+        assert np.all(h[reachable] <= to_goal[reachable])
+        assert alt(int(nodes[1]), t) == pytest.approx(h[1]) or not math.isfinite(to_goal[1])
+
+
+def test_landmarks_are_keyed_on_graph_and_weights(grid_graph, tmp_path):
+    weights = np.asarray(grid_graph.edge_attrs["distance"], dtype=np.float64)
+    tables = load_or_build_landmarks(grid_graph, tmp_path / "t.alt.npz", k=4)
+    assert load_or_build_landmarks(grid_graph, tmp_path / "t.alt.npz", k=4).weights_digest == tables.weights_digest
+    other = load_or_build_landmarks(grid_graph, tmp_path / "t.alt.npz", k=4, weights=2 * weights)
+    assert other.weights_digest != tables.weights_digest
+    assert other.margin == pytest.approx(2 * tables.margin)
+
+    # un grafo sin checksum (armado directo del CSV) nunca reutiliza lo guardado
+    grid_graph.checksum = ""
+    assert load_or_build_landmarks(grid_graph, tmp_path / "t.alt.npz", k=4).checksum == ""
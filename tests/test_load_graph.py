@@ -0,0 +1,89 @@
+"""load_graph guarda las aristas por columnas y devuelve lo mismo que leer el CSV fila por fila."""
+import csv
+
+import numpy as np
+import pytest
+
+from costs import cost_fuel
+from load_graph import EDGE_COLUMNS, Edge, load_graph
+
+HEADER = ["from_x", "from_y", "to_x", "to_y", "depth_min", "risk_index", "wave_size", "wind_speed", "distance"]
+
+
+def _write(path, header, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+def _rows(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        fx, fy = (int(v) for v in rng.integers(0, 12, 2))
+        tx, ty = fx + int(rng.integers(-1, 2)), fy + int(rng.integers(-1, 2))
+        yield [fx, fy, tx, ty] + [round(float(v), 3) for v in rng.uniform(0, 50, 5)]
+
+
+def _dict_reader(path):
+    """Lectura fila por fila con csv.DictReader (nodos en orden de aparición)."""
+    graph = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            node = (int(row["from_x"]), int(row["from_y"]))
+            to = (int(row["to_x"]), int(row["to_y"]))
+            attrs = {name: float(row[name]) if row.get(name, "") != "" else None for name in EDGE_COLUMNS}
+            graph.setdefault(node, []).append((to, attrs))
+    return graph
+
+
+def test_matches_row_by_row_reading(tmp_path):
+    path = _write(tmp_path / "g.csv", HEADER, list(_rows()))
+    graph = load_graph(str(path))
+    expected = _dict_reader(path)
+    assert list(graph) == list(expected)
+    for node, edges in expected.items():
+        assert len(graph[node]) == len(edges)
+        for edge, (to, attrs) in zip(graph[node], edges):
+            assert edge.to == to
+            for name, value in attrs.items():
+                assert edge[name] == pytest.approx(value, rel=1e-6)  # float32
+                assert getattr(edge, name) == edge[name]
+            assert edge.attributes_list() == [edge[name] for name in EDGE_COLUMNS]
+    stores = {id(edges.store) for edges in graph.values()}
+    assert len(stores) == 1  # una sola EdgeStore para todo el grafo
+    store = next(iter(graph.values())).store
+    assert store.nbytes == len(store) * (2 * 4 + len(EDGE_COLUMNS) * 4)
+
+
+def test_optional_columns_default(tmp_path):
+    rows = [[0, 0, 3, 4, 12.5], [0, 0, 1, 0, 8.0], [2, 2, 2, 3, 9.0]]
+    graph = load_graph(str(_write(tmp_path / "g.csv", HEADER[:5], rows)))
+    first = graph[(0, 0)][0]
+    assert (first.risk_index, first.wave_size, first.wind_speed) == (0.0, 0.0, 0.0)
+    assert first.distance == pytest.approx(5.0)  # largo euclídeo en la grilla
+    assert cost_fuel(first, w_wind=1.0, w_waves=1.0) == 0.0
+
+
+def test_edge_list_is_a_sequence(tmp_path):
+    graph = load_graph(str(_write(tmp_path / "g.csv", HEADER, list(_rows(20, seed=3)))))
+    edges = max(graph.values(), key=len)
+    assert len(edges) >= 2
+    assert edges[-1] == list(edges)[-1] and edges[0] == Edge(edges.store, edges.start)
+    assert [e.index for e in edges[1:]] == list(range(edges.start + 1, edges.stop))
+    with pytest.raises(IndexError):
+        edges[len(edges)]
+    with pytest.raises(KeyError):
+        edges[0]["speed"]
+
+
+def test_bad_rows_and_headers_are_rejected(tmp_path):
+    bad = _write(tmp_path / "bad.csv", HEADER, [[0, 0, 1, 1, 5, 0, 0, 0, 1], [0, 0.5, 1, 1, 5, 0, 0, 0, 1]])
+    with pytest.raises(ValueError, match="data row 2"):
+        load_graph(str(bad))
+    with pytest.raises(KeyError):
+        load_graph(str(_write(tmp_path / "short.csv", HEADER[:4], [[0, 0, 1, 1]])))
+    missing = _write(tmp_path / "nan.csv", HEADER, [[0, 0, 1, 1, "", 0, 0, 0, 1]])
+    with pytest.raises(ValueError):
+        load_graph(str(missing))
@@ -0,0 +1,59 @@
+"""Caché LRU de rutas: acotado en entradas y bytes, con clave por extremos, calado, costo y versión."""
+import numpy as np
+
+from api.route_cache import ENTRY_OVERHEAD_BYTES, RouteCache
+from cost_model import CostModel
+
+
+def _put(cache, key, length=4):
+    return cache.put(key, list(range(length)), total_distance_km=1.0, total_cost=1.0, expanded=length)
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = RouteCache(max_entries=2)
+    _put(cache, "a")
+    _put(cache, "b")
+    assert cache.get("a") is not None  # "b" queda como la menos usada
+    _put(cache, "c")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+
+
+def test_byte_budget():
+    per_entry = 10 * 4 + ENTRY_OVERHEAD_BYTES  # int32
+    cache = RouteCache(max_entries=100, max_bytes=3 * per_entry)
+    for key in "abcd":
+        _put(cache, key, length=10)
+    assert cache.stats()["entries"] == 3 and cache.stats()["bytes"] == 3 * per_entry
+    assert cache.get("a") is None
+    huge = _put(cache, "huge", length=10_000)  # no entra: se devuelve sin desalojar nada
+    assert cache.get("huge") is None and cache.stats()["entries"] == 3
+    assert not huge.path.flags.writeable and huge.path.dtype == np.int32
+
+
+def test_key_separates_draft_weights_and_graph_version(grid_graph):
+    model = CostModel(grid_graph)
+    base = RouteCache.key(1, 2, None, model.key("combined"), grid_graph)
+    assert base == RouteCache.key(1, 2, None, model.key("combined", w_fuel=1.0), grid_graph)
+    others = [RouteCache.key(2, 1, None, model.key("combined"), grid_graph),
+              RouteCache.key(1, 2, 12.04, model.key("combined"), grid_graph),
+              RouteCache.key(1, 2, None, model.key("combined", w_time=2.0), grid_graph)]
+    grid_graph.version += 1
+    others.append(RouteCache.key(1, 2, None, model.key("combined"), grid_graph))
+    assert len({base, *others}) == 5
+
+
+def test_api_serves_repeated_routes_from_the_cache(api_client, grid_graph, pairs):
+    s, t = pairs[0]
+    req = {"origin": dict(zip(("lat", "lon"), grid_graph.coord(s))),
+           "destination": dict(zip(("lat", "lon"), grid_graph.coord(t)))}
+    first = api_client.post("/route", json=req).json()
+    nearby = {**req, "origin": {"lat": req["origin"]["lat"] + 0.01, "lon": req["origin"]["lon"]}}
+    assert api_client.post("/route", json=nearby).json()["node_ids"] == first["node_ids"]  # mismo nodo
+    api_client.post("/route", json={**req, "objective": "time"})
+    stats = api_client.get("/route/cache").json()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (2, 1, 2)
+    api_client.post("/admin/reload")
+    assert api_client.get("/route/cache").json()["entries"] == 0
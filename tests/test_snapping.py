@@ -0,0 +1,78 @@
+"""El snapping por KD-tree elige el mismo nodo que una búsqueda exhaustiva por gran círculo."""
+import numpy as np
+import pytest
+
+from draft_classes import DraftClasses
+from geo import EARTH_RADIUS_KM
+from snapping import NodeSnapper, load_or_build_snapper, navigable_nodes, snapper_path
+from snapshot import default_snapshot_path
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    a = (np.sin((p2 - p1) / 2) ** 2
+         + np.cos(p1) * np.cos(p2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _nearest(graph, nodes, lats, lons):
+    km = _haversine_km(lats[:, None], lons[:, None], graph.lats[nodes][None, :], graph.lons[nodes][None, :])
+    return nodes[km.argmin(axis=1)], km.min(axis=1)
+
+
+def _points(n=300, seed=2):
+    # alrededor de la grilla (-10..-7.25, 170..173.25), cruzando el antimeridiano
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(-12.0, -5.0, n)
+    lons = (rng.uniform(168.0, 185.0, n) + 180.0) % 360.0 - 180.0
+    return lats, lons
+
+
+def test_snap_matches_brute_force(grid_graph):
+    snapper = NodeSnapper(grid_graph)
+    lats, lons = _points()
+    nodes, km = snapper.snap_many(lats, lons)
+    expected, expected_km = _nearest(grid_graph, navigable_nodes(grid_graph), lats, lons)
+    np.testing.assert_allclose(km, expected_km, rtol=1e-9, atol=1e-6)
+    np.testing.assert_array_equal(nodes, expected)
+    assert snapper.snap(lats[0], lons[0]).node == nodes[0]
+
+
+def test_max_km_leaves_far_points_unsnapped(grid_graph):
+    snapper = NodeSnapper(grid_graph)
+    lats, lons = _points()
+    nodes, km = snapper.snap_many(lats, lons)
+    max_km = float(np.median(km))
+    bounded, bounded_km = snapper.snap_many(lats, lons, max_km=max_km)
+    near = km <= max_km
+    assert near.any() and not near.all()
+    np.testing.assert_array_equal(bounded[near], nodes[near])
+    assert np.all(bounded[~near] == -1) and np.all(np.isinf(bounded_km[~near]))
+
+
+def test_per_draft_trees(grid_graph):
+    classes = DraftClasses(grid_graph)
+    snapper = NodeSnapper(grid_graph, classes)
+    lats, lons = _points()
+    for draft in (3000.0, 3900.0):
+        allowed = navigable_nodes(classes.view(draft))
+        assert 0 < len(allowed) < len(snapper.nodes)
+        nodes, _ = snapper.snap_many(lats, lons, draft=draft)
+        np.testing.assert_array_equal(nodes, _nearest(grid_graph, allowed, lats, lons)[0])
+    tree, _ = snapper._index(3000.0)
+    assert snapper._index(3000.0)[0] is tree
+    snapper.invalidate_drafts()
+    assert snapper._index(3000.0)[0] is not tree
+    # ningún nodo tiene tanta agua: sin candidatos
+    assert snapper.snap(lats[0], lons[0], draft=10000.0).node == -1
+    with pytest.raises(ValueError):
+        NodeSnapper(grid_graph).snap(lats[0], lons[0], draft="panamax")
+
+
+def test_saved_index_is_reused_and_rebuilt_when_corrupt(grid_graph, grid_csv):
+    path = snapper_path(default_snapshot_path(grid_csv[0]))
+    first = load_or_build_snapper(grid_graph, path)
+    assert path.exists()
+    np.testing.assert_array_equal(load_or_build_snapper(grid_graph, path).nodes, first.nodes)
+    path.write_bytes(b"junk")
+    np.testing.assert_array_equal(load_or_build_snapper(grid_graph, path).nodes, first.nodes)
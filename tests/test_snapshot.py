@@ -0,0 +1,64 @@
+"""El snapshot se reutiliza mientras está sano y se reconstruye si se corrompe."""
+import os
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from snapshot import default_snapshot_path, load_or_build
+
+
+def _arrays(graph):
+    # copias: el snapshot original (memmap) se corrompe después en el mismo archivo
+    return [np.array(graph.offsets), np.array(graph.targets), np.array(graph.edge_attrs["distance"])]
+
+
+def _assert_same_graph(expected, graph):
+    for a, b in zip(expected, _arrays(graph)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_snapshot_is_reused(grid_csv):
+    nodes_csv, edges_csv = grid_csv
+    first = load_or_build(nodes_csv, edges_csv)
+    path = default_snapshot_path(nodes_csv)
+    mtime = os.stat(path).st_mtime_ns
+    second = load_or_build(nodes_csv, edges_csv)
+    assert os.stat(path).st_mtime_ns == mtime
+    assert second.checksum == first.checksum != ""
+    assert not second.targets.flags.writeable  # mapeado de solo lectura, no copiado
+    _assert_same_graph(_arrays(first), second)
+
+
+def test_truncated_snapshot_is_rebuilt(grid_csv):
+    nodes_csv, edges_csv = grid_csv
+    expected = _arrays(CSRGraph.from_csv(str(nodes_csv), str(edges_csv)))
+    load_or_build(nodes_csv, edges_csv)
+    path = default_snapshot_path(nodes_csv)
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size // 2)
+    rebuilt = load_or_build(nodes_csv, edges_csv)
+    assert os.path.getsize(path) == size
+    _assert_same_graph(expected, rebuilt)
+
+
+def test_garbled_header_is_rebuilt(grid_csv):
+    nodes_csv, edges_csv = grid_csv
+    expected = _arrays(CSRGraph.from_csv(str(nodes_csv), str(edges_csv)))
+    load_or_build(nodes_csv, edges_csv)
+    path = default_snapshot_path(nodes_csv)
+    with open(path, "r+b") as f:
+        f.seek(20)
+        f.write(b"\xff\x00garbage\x00")
+    rebuilt = load_or_build(nodes_csv, edges_csv)
+    _assert_same_graph(expected, rebuilt)
+
+
+def test_snapshot_of_changed_sources_is_rebuilt(grid_csv):
+    nodes_csv, edges_csv = grid_csv
+    original = load_or_build(nodes_csv, edges_csv)
+    lines = edges_csv.read_text().splitlines(keepends=True)
+    edges_csv.write_text("".join(lines[:-1]))  # se borra una arista
+    rebuilt = load_or_build(nodes_csv, edges_csv)
+    assert rebuilt.checksum != original.checksum
+    assert rebuilt.num_edges == original.num_edges - 1
@@ -0,0 +1,50 @@
+"""El spanner greedy respeta la cota de stretch en todos los pares."""
+import numpy as np
+import pytest
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra, minimum_spanning_tree
+from scipy.spatial import cKDTree
+
+from spanner import greedy_spanner, measure_stretch
+
+
+def _candidates(n=150, radius=0.18, seed=0):
+    """Grafo geométrico: puntos al azar unidos si están a menos de ``radius`` (en ambos sentidos)."""
+    points = np.random.default_rng(seed).random((n, 2))
+    pairs = cKDTree(points).query_pairs(radius, output_type="ndarray")
+    src = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    dst = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    weight = np.linalg.norm(points[src] - points[dst], axis=1)
+    return n, src, dst, weight
+
+
+def _all_pairs(n, src, dst, weight, idx):
+    return dijkstra(coo_matrix((weight[idx], (src[idx], dst[idx])), shape=(n, n)).tocsr(), directed=False)
+
+
+@pytest.mark.parametrize("stretch", [1.0, 1.2, 2.0])
+def test_every_pair_is_within_the_stretch(stretch):
+    n, src, dst, weight = _candidates()
+    kept = greedy_spanner(n, src, dst, weight, stretch=stretch)
+    full = _all_pairs(n, src, dst, weight, np.arange(len(src)))
+    sparse = _all_pairs(n, src, dst, weight, kept)
+    connected = np.isfinite(full)
+    np.testing.assert_array_equal(np.isfinite(sparse), connected)
+    assert np.all(sparse[connected] <= stretch * full[connected] * (1 + 1e-9))
+    assert len(kept) <= len(src) // 2  # cada arista no dirigida, a lo sumo una vez
+    if stretch > 1.0:
+        assert len(kept) < len(src) // 2
+    assert measure_stretch(n, src, dst, weight, kept)["max"] <= stretch * (1 + 1e-9)
+
+
+def test_infinite_stretch_is_the_minimum_spanning_tree():
+    n, src, dst, weight = _candidates()
+    kept = greedy_spanner(n, src, dst, weight, stretch=np.inf)
+    mst = minimum_spanning_tree(coo_matrix((weight, (src, dst)), shape=(n, n)).tocsr())
+    assert weight[kept].sum() == pytest.approx(mst.sum())
+    assert len(kept) == mst.nnz
+
+
+def test_stretch_below_one_is_rejected():
+    with pytest.raises(ValueError):
+        greedy_spanner(3, np.array([0]), np.array([1]), np.array([1.0]), stretch=0.9)
@@ -0,0 +1,52 @@
+"""Procesar el ráster por ventanas con halo da lo mismo que procesarlo entero."""
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from scipy.ndimage import distance_transform_edt, gaussian_filter
+
+from sampling import sample_ocean_nodes
+from tiling import process_raster_tiled, sample_from_products, window_side
+
+COASTAL_THRESHOLD = 6.0
+STEP_COAST, STEP_OPEN = 2, 7
+
+
+def _write_tif(path, rows=130, cols=170, seed=0):
+    """Elevaciones suaves con islas y costas irregulares (tierra > 0)."""
+    rng = np.random.default_rng(seed)
+    field = gaussian_filter(rng.normal(size=(rows, cols)), 6)
+    elev = (field / field.std() * 1500 - 800).astype(np.float32)
+    with rasterio.open(path, "w", driver="GTiff", height=rows, width=cols, count=1, dtype="float32",
+                       crs="EPSG:4326", transform=from_origin(-60.0, -30.0, 0.01, 0.01)) as dst:
+        dst.write(elev, 1)
+    return elev
+
+
+def test_windows_match_the_whole_raster(tmp_path):
+    elev = _write_tif(tmp_path / "tile.tif")
+    ocean = elev < 0
+    assert 0.2 < ocean.mean() < 0.9
+    cap = float(np.ceil(COASTAL_THRESHOLD))
+    dist = np.minimum(distance_transform_edt(ocean), cap).astype(np.float32)
+    rows, cols, depths = sample_ocean_nodes(elev, ocean, dist, COASTAL_THRESHOLD, STEP_COAST, STEP_OPEN)
+
+    max_memory_mb = 0.05  # ventanas de ~30 px: muchas, con halos que se cruzan
+    assert window_side(int(cap), max_memory_mb) < min(elev.shape) // 3
+    products, nodes = process_raster_tiled(tmp_path / "tile.tif", COASTAL_THRESHOLD, STEP_COAST, STEP_OPEN,
+                                           max_memory_mb=max_memory_mb, workdir=tmp_path / "work")
+    np.testing.assert_array_equal(products.elev, elev)
+    np.testing.assert_array_equal(products.ocean_mask, ocean)
+    np.testing.assert_array_equal(products.dist_to_land, dist)
+    np.testing.assert_array_equal(nodes.rows, rows)
+    np.testing.assert_array_equal(nodes.cols, cols)
+    np.testing.assert_array_equal(nodes.depths, depths)
+
+    again = sample_from_products(products, COASTAL_THRESHOLD, STEP_COAST, STEP_OPEN, max_memory_mb=max_memory_mb)
+    np.testing.assert_array_equal(again.rows, rows)
+    np.testing.assert_array_equal(again.cols, cols)
+
+
+def test_window_side_rejects_tiny_budgets():
+    with pytest.raises(ValueError):
+        window_side(50, 0.05)
@@ -0,0 +1,72 @@
+"""El cubo de pronóstico se muestrea igual con cualquier convención de longitud."""
+import numpy as np
+import pytest
+
+from weather import ForecastCube, WeatherLayer
+
+DLAT = DLON = 0.2
+LAT0 = -12.97  # centros de celda desalineados con la grilla de prueba: sin empates
+
+
+def _field(steps, lats, lons):
+    """Campo suave y periódico en la longitud, distinto en cada paso."""
+    t = np.arange(steps)[:, None, None]
+    lon = np.radians(np.asarray(lons))[None, None, :]
+    lat = np.asarray(lats)[None, :, None]
+    return (1.0 + np.sin(3 * lon + 0.5 * t) + 0.01 * lat).astype(np.float32)
+
+
+def _cube(path, lon0, nx, steps=4, ny=30):
+    lats = LAT0 + DLAT * np.arange(ny)
+    lons = lon0 + DLON * np.arange(nx)
+    return ForecastCube.write(path, {"wind_speed": _field(steps, lats, lons)}, LAT0, DLAT, lon0, DLON,
+                              dt_hours=3.0, t0="test")
+
+
+def _brute_force_cells(cube, lats, lons):
+    _, ny, nx = cube.shape
+    lat_c = cube.lat0 + cube.dlat * np.arange(ny)
+    lon_c = cube.lon0 + cube.dlon * np.arange(nx)
+    iy = np.abs(lats[:, None] - lat_c[None, :]).argmin(axis=1)
+    gap = np.abs((lons[:, None] - lon_c[None, :] + 180.0) % 360.0 - 180.0)
+    return iy, gap.argmin(axis=1)
+
+
+@pytest.fixture
+def dateline_graph(grid_graph):
+    # la grilla de prueba cubre 170°E..173.25°E; corrida 8° cruza ±180
+    lons = np.asarray(grid_graph.lons, dtype=np.float64) + 8.0
+    grid_graph.lons = (lons + 180.0) % 360.0 - 180.0
+    assert grid_graph.lons.min() < -170 and grid_graph.lons.max() > 170
+    return grid_graph
+
+
+def test_cell_index_wraps_longitude(tmp_path):
+    signed = _cube(tmp_path / "signed", -179.97, 1800)
+    positive = _cube(tmp_path / "positive", 0.03, 1800)
+    regional = _cube(tmp_path / "regional", 176.03, 40)  # 176°E..184°E (= -176°)
+    lats = np.full(4, -10.0)
+    lons = np.array([179.95, -179.95, 183.8 - 360.0, 176.5])
+    for cube in (signed, positive, regional):
+        iy, ix = cube.cell_index(lats, lons)
+        np.testing.assert_array_equal(ix, _brute_force_cells(cube, lats, lons)[1])
+        centers = cube.lon0 + cube.dlon * ix
+        np.testing.assert_allclose((centers - lons + 180.0) % 360.0 - 180.0, 0.0, atol=DLON / 2)
+
+
+def test_layer_is_independent_of_the_longitude_convention(tmp_path, dateline_graph):
+    cubes = [_cube(tmp_path / "signed", -179.97, 1800),
+             _cube(tmp_path / "positive", 0.03, 1800),
+             _cube(tmp_path / "regional", 176.03, 40)]
+    lats, lons = dateline_graph.edge_midpoints()
+    for cube in cubes:
+        assert isinstance(cube.fields["wind_speed"], np.memmap)
+        layer = WeatherLayer(dateline_graph, cube, bucket_hours=6.0)
+        iy, ix = _brute_force_cells(cube, lats, lons)
+        for bucket, step in ((0, 0), (1, 2), (5, 3)):  # buckets de 6 h sobre pasos de 3 h
+            expected = np.asarray(cube.fields["wind_speed"][step])[iy, ix]
+            np.testing.assert_array_equal(layer.edge_fields(bucket)["wind_speed"], expected)
+    first = WeatherLayer(dateline_graph, cubes[0]).edge_fields(1)["wind_speed"]
+    for cube in cubes[1:]:
+        np.testing.assert_allclose(WeatherLayer(dateline_graph, cube).edge_fields(1)["wind_speed"], first,
+                                   rtol=1e-5)